@@ -1,6 +1,18 @@
 """AI-powered code review tool for GitLab merge requests."""
 
-from .main import main
+import time
+
+# Read by the --startup-profile report
+_import_started = time.perf_counter()
 
 __version__ = "0.1.0"
 __all__ = ["main"]
+
+
+def __getattr__(name: str) -> object:
+    """Import main on first access, keeping the package import cheap."""
+    if name == "main":
+        from .main import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,356 @@
+"""Batch review of every open merge request in a set of projects and groups."""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_PER_PROJECT = 2
+DEFAULT_PROGRESS_FILE = "ai-reviewer-batch.jsonl"
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """An open merge request to review, at a specific head commit."""
+
+    project_id: int
+    mr_iid: int
+    head_sha: str
+    title: str = ""
+
+
+@dataclass
+class BatchSummary:
+    """Outcome of a batch run."""
+
+    reviewed: List[BatchItem] = field(default_factory=list)
+    failed: List[BatchItem] = field(default_factory=list)
+    skipped: int = 0
+    interrupted: bool = False
+
+
+class ProgressLog:
+    """Append-only record of reviewed merge request versions.
+
+    Each finished review is appended as one JSON line and flushed, so an
+    interrupted batch loses at most the reviews that were running. On the
+    next run, versions already recorded as reviewed are skipped; failed
+    ones are tried again.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        """Open the log, loading earlier progress if the file exists.
+
+        Args:
+            path: Progress file, or None to keep progress in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._reviewed: Set[Tuple[int, int, str]] = set()
+        self._partial_line = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._partial_line = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # The last line may be cut off by an interruption
+                        continue
+                    if entry.get("status") == "reviewed":
+                        self._reviewed.add(
+                            (entry["project_id"], entry["mr_iid"], entry["head_sha"])
+                        )
+
+    def is_reviewed(self, item: BatchItem) -> bool:
+        """Return whether this version of the merge request was reviewed."""
+        return (item.project_id, item.mr_iid, item.head_sha) in self._reviewed
+
+    def record(self, item: BatchItem, status: str, elapsed: float) -> None:
+        """Append the outcome of a review.
+
+        Args:
+            item: Merge request that was reviewed
+            status: "reviewed" or "failed"
+            elapsed: Seconds the review took
+        """
+        with self._lock:
+            if status == "reviewed":
+                self._reviewed.add((item.project_id, item.mr_iid, item.head_sha))
+            if not self.path:
+                return
+            entry = {
+                "project_id": item.project_id,
+                "mr_iid": item.mr_iid,
+                "head_sha": item.head_sha,
+                "status": status,
+                "elapsed": round(elapsed, 3),
+                "time": time.time(),
+            }
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._partial_line:
+                    # Keep the first new entry off the cut off line
+                    f.write("\n")
+                    self._partial_line = False
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+
+
+def iter_open_merge_requests(
+    gl: Any,
+    projects: Sequence[str] = (),
+    groups: Sequence[str] = (),
+    include_drafts: bool = False,
+) -> Iterator[BatchItem]:
+    """List the open merge requests of projects and groups.
+
+    Each merge request is listed once, even if it belongs to several of
+    the given projects and groups.
+
+    Args:
+        gl: Authenticated GitLab client
+        projects: Project IDs or paths
+        groups: Group IDs or paths, including their subgroups
+        include_drafts: Also list draft merge requests
+    Yields:
+        Merge requests to review
+    """
+    seen: Set[Tuple[int, int]] = set()
+    listings = [
+        gl.projects.get(project, lazy=True).mergerequests.list(
+            state="opened", iterator=True
+        )
+        for project in projects
+    ] + [
+        gl.groups.get(group, lazy=True).mergerequests.list(
+            state="opened", iterator=True
+        )
+        for group in groups
+    ]
+    for listing in listings:
+        for mr in listing:
+            key = (int(mr.project_id), int(mr.iid))
+            if key in seen:
+                continue
+            seen.add(key)
+            if not include_drafts and (
+                getattr(mr, "draft", False) or getattr(mr, "work_in_progress", False)
+            ):
+                continue
+            yield BatchItem(key[0], key[1], str(mr.sha), getattr(mr, "title", ""))
+
+
+class BatchReviewer:
+    """Reviews many merge requests with one shared reviewer.
+
+    The reviewer, and with it the authenticated GitLab client and the LLM
+    client, is shared by all workers. At most max_workers reviews run at
+    once, and at most per_project of them in the same project, so one
+    busy project cannot monopolize the workers or its own rate limit.
+    """
+
+    def __init__(
+        self,
+        reviewer: Any,
+        max_workers: int = DEFAULT_BATCH_WORKERS,
+        per_project: int = DEFAULT_PER_PROJECT,
+        progress: Optional[ProgressLog] = None,
+    ) -> None:
+        """Initialize the batch reviewer.
+
+        Args:
+            reviewer: Object with a process_merge_request(project_id, mr_iid)
+                method returning whether the review is complete, normally a
+                GitLabReviewer with a state store
+            max_workers: Merge requests reviewed at the same time
+            per_project: Merge requests of one project reviewed at the same time
+            progress: Log used to skip reviewed versions and resume
+        """
+        if max_workers < 1 or per_project < 1:
+            raise ValueError("max_workers and per_project must be at least 1")
+        self.reviewer = reviewer
+        self.max_workers = max_workers
+        self.per_project = per_project
+        self.progress = progress or ProgressLog(None)
+
+    def run(self, items: Sequence[BatchItem]) -> BatchSummary:
+        """Review the merge requests that the progress log has not seen.
+
+        Args:
+            items: Merge requests to review, in priority order
+        Returns:
+            Summary of the run
+        """
+        summary = BatchSummary()
+        pending = []
+        for item in items:
+            if self.progress.is_reviewed(item):
+                summary.skipped += 1
+            else:
+                pending.append(item)
+        total = len(pending)
+        logger.info(
+            f"Reviewing {total} merge requests "
+            f"({summary.skipped} already reviewed in an earlier run)"
+        )
+
+        running: Dict["Future[float]", BatchItem] = {}
+        per_project: Dict[int, int] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="batch-review"
+        )
+        try:
+            while pending or running:
+                # Start the first waiting items whose project has a free slot
+                for item in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    if per_project.get(item.project_id, 0) >= self.per_project:
+                        continue
+                    pending.remove(item)
+                    per_project[item.project_id] = (
+                        per_project.get(item.project_id, 0) + 1
+                    )
+                    running[executor.submit(self._review, item)] = item
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    per_project[item.project_id] -= 1
+                    self._finish(item, future, summary, total)
+        except KeyboardInterrupt:
+            summary.interrupted = True
+            logger.warning(
+                f"Interrupted with {len(pending) + len(running)} merge requests "
+                f"left; run the same command again to resume"
+            )
+        finally:
+            executor.shutdown(wait=not summary.interrupted, cancel_futures=True)
+
+        logger.info(
+            f"Batch finished: {len(summary.reviewed)} reviewed, "
+            f"{len(summary.failed)} failed, {summary.skipped} skipped"
+        )
+        return summary
+
+    def _review(self, item: BatchItem) -> float:
+        """Review one merge request, returning how long it took."""
+        started = time.monotonic()
+        try:
+            complete = self.reviewer.process_merge_request(item.project_id, item.mr_iid)
+        except SystemExit as e:
+            # GitLabReviewer exits on fatal errors in CLI mode
+            raise RuntimeError("review failed, see the log above") from e
+        if not complete:
+            # Recorded as failed, so the next run reviews it again
+            raise RuntimeError("review incomplete, strategies or comment posts failed")
+        return time.monotonic() - started
+
+    def _finish(
+        self,
+        item: BatchItem,
+        future: "Future[float]",
+        summary: BatchSummary,
+        total: int,
+    ) -> None:
+        """Record a finished review and report progress."""
+        name = f"project {item.project_id} !{item.mr_iid}"
+        try:
+            elapsed = future.result()
+        except Exception as e:
+            summary.failed.append(item)
+            self.progress.record(item, "failed", 0.0)
+            outcome = f"failed {name}: {str(e)}"
+        else:
+            summary.reviewed.append(item)
+            self.progress.record(item, "reviewed", elapsed)
+            outcome = f"reviewed {name} in {elapsed:.1f}s"
+        done = len(summary.reviewed) + len(summary.failed)
+        logger.info(f"[{done}/{total}] {outcome}")
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    """Parse the arguments of the batch command.
+
+    Args:
+        argv: Arguments after "batch"
+    Returns:
+        Parsed options
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai_reviewer batch",
+        description="Review every open merge request of projects and groups.",
+    )
+    parser.add_argument(
+        "--project",
+        dest="projects",
+        action="append",
+        default=[],
+        help="project ID or path, may be repeated",
+    )
+    parser.add_argument(
+        "--group",
+        dest="groups",
+        action="append",
+        default=[],
+        help="group ID or path, including subgroups; may be repeated",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=f"merge requests reviewed at once (default: {DEFAULT_BATCH_WORKERS})",
+    )
+    parser.add_argument(
+        "--per-project",
+        type=int,
+        default=DEFAULT_PER_PROJECT,
+        help=f"reviews at once per project (default: {DEFAULT_PER_PROJECT})",
+    )
+    parser.add_argument(
+        "--progress-file",
+        default=DEFAULT_PROGRESS_FILE,
+        help=f"file used to resume an interrupted run "
+        f"(default: {DEFAULT_PROGRESS_FILE})",
+    )
+    parser.add_argument(
+        "--include-drafts", action="store_true", help="also review draft MRs"
+    )
+    options = parser.parse_args(list(argv))
+    if not options.projects and not options.groups:
+        parser.error("at least one --project or --group is required")
+    return options
+
+
+def run_batch(reviewer: Any, options: argparse.Namespace) -> BatchSummary:
+    """Review the open merge requests selected by the batch options.
+
+    Args:
+        reviewer: Shared GitLabReviewer
+        options: Options from parse_args()
+    Returns:
+        Summary of the run
+    """
+    items = list(
+        iter_open_merge_requests(
+            reviewer.gl,
+            projects=options.projects,
+            groups=options.groups,
+            include_drafts=options.include_drafts,
+        )
+    )
+    batch = BatchReviewer(
+        reviewer,
+        max_workers=options.workers,
+        per_project=options.per_project,
+        progress=ProgressLog(options.progress_file),
+    )
+    return batch.run(items)
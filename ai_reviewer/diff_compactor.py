@@ -0,0 +1,275 @@
+"""Compaction of diffs before they are sent to the LLM."""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from .diff_parser import _HUNK_HEADER
+
+DEFAULT_CONTEXT_LINES = 3
+DEFAULT_MIN_MOVED_LINES = 3
+# Added lines longer than this are taken as minified or generated content
+DEFAULT_MAX_LINE_LENGTH = 500
+
+_BINARY_MARKER = re.compile(r"^(Binary files .* differ|GIT binary patch)$", re.M)
+
+
+def _normalized(text: str) -> str:
+    """Return a line's code with other whitespace than its indentation collapsed.
+
+    Indentation is kept as it is, since in languages such as Python and
+    YAML it changes what the code means. Blank lines become empty.
+    """
+    if not text.strip():
+        return ""
+    indent = text[: len(text) - len(text.lstrip())]
+    return indent + " ".join(text.split())
+
+
+@dataclass
+class _Line:
+    """A diff line of a hunk with its old and new line numbers."""
+
+    text: str
+    old: int
+    new: int
+
+    @property
+    def marker(self) -> str:
+        return self.text[:1]
+
+
+class DiffCompactor:
+    """Shrinks a unified diff to the lines worth an LLM's attention.
+
+    - Hunks that only change whitespace within lines, or blank lines, are
+      dropped. Changes of indentation are kept.
+    - Context is cut to context_lines around each change.
+    - Blocks of at least min_moved_lines lines that were removed in one
+      place and added unchanged in another are replaced by a one-line
+      note on each side.
+
+    The result is again a unified diff. Every run of kept lines gets its
+    own hunk header with its original line numbers, so the result parses
+    to the same old and new line numbers as the input and comments can
+    be placed on it directly. Notes are "\\" lines, which, like "\\ No
+    newline at end of file", take no line number.
+    """
+
+    def __init__(
+        self,
+        context_lines: int = DEFAULT_CONTEXT_LINES,
+        min_moved_lines: int = DEFAULT_MIN_MOVED_LINES,
+        max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+    ) -> None:
+        """Initialize the compactor.
+
+        Args:
+            context_lines: Unchanged lines kept before and after each change
+            min_moved_lines: Shortest block collapsed as a move
+            max_line_length: Files adding a longer line are not reviewed
+        """
+        self.context_lines = context_lines
+        self.min_moved_lines = min_moved_lines
+        self.max_line_length = max_line_length
+
+    def compact(self, diff: str) -> Optional[str]:
+        """Compact a file's diff.
+
+        Args:
+            diff: Unified diff text, as returned by GitLab
+        Returns:
+            Compacted diff, possibly empty, or None for binary and minified
+            files that should not be reviewed at all. Text without hunk
+            headers is returned unchanged.
+        """
+        if _BINARY_MARKER.search(diff):
+            return None
+        trailing_newline = diff.endswith("\n")
+        lines = diff.split("\n")
+        if trailing_newline:
+            lines.pop()
+        if any(len(line) > self.max_line_length for line in lines if line[:1] == "+"):
+            return None
+
+        preamble, hunks = self._split_hunks(lines)
+        if not hunks:
+            return diff
+
+        moved, notes = self._find_moves(hunks)
+        out = list(preamble)
+        for idx, hunk in enumerate(hunks):
+            if self._whitespace_only(hunk):
+                continue
+            out.extend(self._compact_hunk(idx, hunk, moved, notes))
+        if not out:
+            return ""
+        return "\n".join(out) + ("\n" if trailing_newline else "")
+
+    def _split_hunks(self, lines: List[str]) -> Tuple[List[str], List[List[_Line]]]:
+        """Split diff lines into the text before the first hunk and the hunks."""
+        preamble: List[str] = []
+        hunks: List[List[_Line]] = []
+        old = new = 0
+        for text in lines:
+            header = _HUNK_HEADER.match(text)
+            if header:
+                old, new = int(header.group(1)), int(header.group(3))
+                hunks.append([])
+                continue
+            if not hunks:
+                preamble.append(text)
+                continue
+            line = _Line(text, old, new)
+            if line.marker in ("-", " "):
+                old += 1
+            if line.marker in ("+", " "):
+                new += 1
+            hunks[-1].append(line)
+        return preamble, hunks
+
+    def _whitespace_only(self, hunk: List[_Line]) -> bool:
+        """Return whether a hunk's changes only touch whitespace within lines."""
+        removed = [_normalized(line.text[1:]) for line in hunk if line.marker == "-"]
+        added = [_normalized(line.text[1:]) for line in hunk if line.marker == "+"]
+        if not removed and not added:
+            return False
+        return [text for text in removed if text] == [text for text in added if text]
+
+    def _find_moves(
+        self, hunks: List[List[_Line]]
+    ) -> Tuple[Set[Tuple[int, int]], Dict[Tuple[int, int], str]]:
+        """Find blocks removed in one place and added unchanged in another.
+
+        Lines match if they only differ in whitespace within the line, so a
+        block moved to another indentation level is not a move. Blocks are
+        matched starting from windows of min_moved_lines lines and growing
+        for as long as the lines match.
+
+        Returns:
+            Positions (hunk, line) of moved lines, and the note replacing
+            each moved block keyed by the position of its first line
+        """
+        k = self.min_moved_lines
+        removed = [
+            (h, i)
+            for h, hunk in enumerate(hunks)
+            for i, line in enumerate(hunk)
+            if line.marker == "-"
+        ]
+        added = [
+            (h, i)
+            for h, hunk in enumerate(hunks)
+            for i, line in enumerate(hunk)
+            if line.marker == "+"
+        ]
+
+        def text(pos: Tuple[int, int]) -> str:
+            return _normalized(hunks[pos[0]][pos[1]].text[1:])
+
+        def adjacent(lines: List[Tuple[int, int]], idx: int) -> bool:
+            """Whether lines[idx] directly follows lines[idx - 1] in the diff."""
+            (h1, i1), (h2, i2) = lines[idx - 1], lines[idx]
+            return h1 == h2 and i2 == i1 + 1
+
+        def window(
+            lines: List[Tuple[int, int]], start: int
+        ) -> Optional[Tuple[str, ...]]:
+            """The k lines from start, if they form one block worth matching."""
+            if start + k > len(lines) or not all(
+                adjacent(lines, idx) for idx in range(start + 1, start + k)
+            ):
+                return None
+            key = tuple(text(pos) for pos in lines[start : start + k])
+            return key if any(key) else None
+
+        windows: Dict[Tuple[str, ...], List[int]] = {}
+        for r in range(len(removed)):
+            key = window(removed, r)
+            if key is not None:
+                windows.setdefault(key, []).append(r)
+
+        used: Set[int] = set()
+        moved: Set[Tuple[int, int]] = set()
+        notes: Dict[Tuple[int, int], str] = {}
+        a = 0
+        while a < len(added):
+            key = window(added, a)
+            candidates = [
+                r
+                for r in (windows.get(key, []) if key is not None else [])
+                if not used.intersection(range(r, r + k))
+            ]
+            if not candidates:
+                a += 1
+                continue
+            r = candidates[0]
+            length = k
+            while (
+                a + length < len(added)
+                and r + length < len(removed)
+                and r + length not in used
+                and adjacent(added, a + length)
+                and adjacent(removed, r + length)
+                and text(added[a + length]) == text(removed[r + length])
+            ):
+                length += 1
+            used.update(range(r, r + length))
+            src, dst = removed[r], added[a]
+            notes[src] = f"\\ {length} lines moved to line {hunks[dst[0]][dst[1]].new}"
+            notes[dst] = (
+                f"\\ {length} lines moved here unchanged from old line "
+                f"{hunks[src[0]][src[1]].old}"
+            )
+            moved.update(removed[r : r + length])
+            moved.update(added[a : a + length])
+            a += length
+        return moved, notes
+
+    def _compact_hunk(
+        self,
+        h: int,
+        hunk: List[_Line],
+        moved: Set[Tuple[int, int]],
+        notes: Dict[Tuple[int, int], str],
+    ) -> List[str]:
+        """Keep a hunk's changes and nearby context as one or more hunks."""
+        changed = [
+            i
+            for i, line in enumerate(hunk)
+            if line.marker in ("+", "-") and (h, i) not in moved
+        ]
+        keep = [False] * len(hunk)
+        for i in changed:
+            for j in range(
+                max(0, i - self.context_lines),
+                min(len(hunk), i + self.context_lines + 1),
+            ):
+                if hunk[j].marker == " " or j == i:
+                    keep[j] = True
+        for i, line in enumerate(hunk):
+            # "\ No newline at end of file" belongs to the line before it
+            if line.marker == "\\" and i > 0 and keep[i - 1]:
+                keep[i] = True
+
+        out: List[str] = []
+        i = 0
+        while i < len(hunk):
+            if (h, i) in notes:
+                out.append(notes[(h, i)])
+            if not keep[i]:
+                i += 1
+                continue
+            end = i
+            while end < len(hunk) and keep[end] and (end == i or (h, end) not in notes):
+                end += 1
+            run = hunk[i:end]
+            old_count = sum(1 for line in run if line.marker in ("-", " "))
+            new_count = sum(1 for line in run if line.marker in ("+", " "))
+            # An empty side starts at the line before, as in unified diffs
+            old_start = run[0].old if old_count else max(0, run[0].old - 1)
+            new_start = run[0].new if new_count else max(0, run[0].new - 1)
+            out.append(f"@@ -{old_start},{old_count} +{new_start},{new_count} @@")
+            out.extend(line.text for line in run)
+            i = end
+        return out
@@ -0,0 +1,258 @@
+"""Parsing of unified diffs into a compact hunk and line index."""
+
+import bisect
+import re
+from array import array
+from typing import Iterator, List, Optional, Set, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class Hunk:
+    """A hunk header and the diff lines it spans."""
+
+    __slots__ = ("old_start", "old_count", "new_start", "new_count", "offset", "end")
+
+    def __init__(
+        self,
+        old_start: int,
+        old_count: int,
+        new_start: int,
+        new_count: int,
+        offset: int,
+        end: int,
+    ) -> None:
+        """Create a hunk.
+
+        Args:
+            old_start: First old-file line of the hunk
+            old_count: Number of old-file lines in the hunk
+            new_start: First new-file line of the hunk
+            new_count: Number of new-file lines in the hunk
+            offset: Diff line index of the hunk header
+            end: Diff line index just past the hunk's last line
+        """
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.offset = offset
+        self.end = end
+
+    def __repr__(self) -> str:
+        """Return the hunk header."""
+        return (
+            f"Hunk(-{self.old_start},{self.old_count} "
+            f"+{self.new_start},{self.new_count} @ {self.offset})"
+        )
+
+
+class ParsedDiff:
+    """Line index of one file's unified diff.
+
+    For every diff line (an "offset", counted from 0) the old-file and
+    new-file line numbers are kept in two int arrays, with 0 meaning the
+    line does not exist on that side. Added lines have only a new line,
+    removed lines only an old line, context lines both, and headers
+    neither. The diff text itself is not kept.
+    """
+
+    __slots__ = ("hunks", "_hunk_offsets", "_hunk_new_starts", "_old", "_new")
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self.hunks: List[Hunk] = []
+        self._hunk_offsets = array("i")
+        self._hunk_new_starts = array("i")
+        self._old = array("i")
+        self._new = array("i")
+
+    @classmethod
+    def parse(cls, diff: str, fragment_start: Optional[int] = None) -> "ParsedDiff":
+        """Parse a unified diff.
+
+        Args:
+            diff: Unified diff text, as returned by GitLab
+            fragment_start: If set, text before the first hunk header is
+                treated as added lines numbered from this line, so plain
+                code fragments can be indexed too. Otherwise it is ignored.
+        Returns:
+            Parsed diff
+        """
+        parsed = cls()
+        old_line = new_line = 0
+        in_hunk = False
+        hunk: Optional[Hunk] = None
+
+        for offset, raw in enumerate(diff.split("\n")):
+            header = _HUNK_HEADER.match(raw)
+            if header:
+                if hunk is not None:
+                    hunk.end = offset
+                old_line = int(header.group(1))
+                new_line = int(header.group(3))
+                hunk = Hunk(
+                    old_start=old_line,
+                    old_count=int(header.group(2) or 1),
+                    new_start=new_line,
+                    new_count=int(header.group(4) or 1),
+                    offset=offset,
+                    end=offset + 1,
+                )
+                parsed.hunks.append(hunk)
+                parsed._hunk_offsets.append(offset)
+                parsed._hunk_new_starts.append(new_line)
+                in_hunk = True
+                parsed._old.append(0)
+                parsed._new.append(0)
+                continue
+
+            old = new = 0
+            if in_hunk:
+                marker = raw[:1]
+                if marker == "+":
+                    new = new_line
+                    new_line += 1
+                elif marker == "-":
+                    old = old_line
+                    old_line += 1
+                elif marker == " ":
+                    old, new = old_line, new_line
+                    old_line += 1
+                    new_line += 1
+            elif fragment_start is not None:
+                new = fragment_start + offset
+            parsed._old.append(old)
+            parsed._new.append(new)
+
+        if hunk is not None:
+            hunk.end = len(parsed._new)
+        return parsed
+
+    def __len__(self) -> int:
+        """Return the number of diff lines."""
+        return len(self._new)
+
+    def new_line_at(self, offset: int) -> Optional[int]:
+        """Return the new-file line of a diff line, or None if it was removed.
+
+        Args:
+            offset: Diff line index
+        Returns:
+            New-file line number
+        """
+        if 0 <= offset < len(self._new) and self._new[offset]:
+            return self._new[offset]
+        return None
+
+    def old_line_at(self, offset: int) -> Optional[int]:
+        """Return the old-file line of a diff line, or None if it was added.
+
+        Args:
+            offset: Diff line index
+        Returns:
+            Old-file line number
+        """
+        if 0 <= offset < len(self._old) and self._old[offset]:
+            return self._old[offset]
+        return None
+
+    def is_added(self, offset: int) -> bool:
+        """Return whether a diff line was added."""
+        return bool(self.new_line_at(offset)) and not self.old_line_at(offset)
+
+    def hunk_at(self, offset: int) -> Optional[Hunk]:
+        """Find the hunk containing a diff line in O(log n).
+
+        Args:
+            offset: Diff line index
+        Returns:
+            Containing hunk, or None for lines outside any hunk
+        """
+        idx = bisect.bisect_right(self._hunk_offsets, offset) - 1
+        if idx < 0:
+            return None
+        hunk = self.hunks[idx]
+        return hunk if offset < hunk.end else None
+
+    def nearest_new_line(self, offset: int) -> Optional[int]:
+        """Map any diff line to a new-file line that can carry a comment.
+
+        Removed lines and hunk headers map to the next line of their hunk
+        that exists in the new file.
+
+        Args:
+            offset: Diff line index
+        Returns:
+            New-file line number, or None if the hunk has no new lines
+        """
+        hunk = self.hunk_at(offset)
+        end = hunk.end if hunk is not None else len(self._new)
+        for idx in range(max(offset, 0), end):
+            if self._new[idx]:
+                return self._new[idx]
+        return None
+
+    def contains_new_line(self, line: int) -> bool:
+        """Return whether a new-file line is shown in the diff, in O(log n).
+
+        Args:
+            line: New-file line number
+        Returns:
+            True if a comment can be anchored to the line
+        """
+        idx = bisect.bisect_right(self._hunk_new_starts, line) - 1
+        if idx < 0:
+            return bool(not self.hunks and line in self._new)
+        hunk = self.hunks[idx]
+        return line < hunk.new_start + hunk.new_count
+
+    def hunk_new_lines(self) -> Set[int]:
+        """Return every new-file line shown in the diff's hunks.
+
+        Returns:
+            New-file line numbers, context lines included
+        """
+        return {
+            line
+            for hunk in self.hunks
+            for line in range(hunk.new_start, hunk.new_start + hunk.new_count)
+        }
+
+    def added_new_lines(self) -> Set[int]:
+        """Return every new-file line the diff adds.
+
+        Returns:
+            New-file line numbers of added lines only
+        """
+        return {new for new, old in zip(self._new, self._old) if new and not old}
+
+    def first_added_line(
+        self, start: int = 0, end: Optional[int] = None
+    ) -> Optional[int]:
+        """Return the first added line within a range of diff lines.
+
+        Args:
+            start: First diff line index to consider
+            end: Diff line index to stop at; defaults to the end of the diff
+        Returns:
+            New-file line number, or None if no line was added in the range
+        """
+        stop = len(self._new) if end is None else min(end, len(self._new))
+        for offset in range(max(start, 0), stop):
+            if self._new[offset] and not self._old[offset]:
+                return self._new[offset]
+        return None
+
+    def added_lines(self, diff: str) -> Iterator[Tuple[int, str]]:
+        """Yield the added lines of the diff this index was parsed from.
+
+        Args:
+            diff: The same diff text passed to parse()
+        Yields:
+            Tuples of new-file line number and line text without its prefix
+        """
+        first_hunk = self._hunk_offsets[0] if self.hunks else len(self._new)
+        for offset, raw in enumerate(diff.split("\n")):
+            if self._new[offset] and not self._old[offset]:
+                yield self._new[offset], raw[1:] if offset >= first_hunk else raw
@@ -0,0 +1,111 @@
+"""Index of review discussions already present on a merge request."""
+
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .review_strategies import ReviewComment
+
+logger = logging.getLogger(__name__)
+
+# Appended to every posted comment so our own discussions can be recognized
+COMMENT_MARKER = "<!-- ai-reviewer -->"
+
+DiscussionKey = Tuple[str, Optional[int], str]
+
+
+def content_fingerprint(content: str) -> str:
+    """Fingerprint comment text, ignoring case, whitespace and our marker.
+
+    Args:
+        content: Comment body
+    Returns:
+        Short hex digest of the normalized text
+    """
+    normalized = " ".join(content.replace(COMMENT_MARKER, "").split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def comment_key(comment: ReviewComment) -> DiscussionKey:
+    """Build the index key for a review comment."""
+    return (comment.path, comment.line, content_fingerprint(comment.content))
+
+
+class DiscussionIndex:
+    """In-memory index of existing discussions keyed by position and content."""
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._keys: Set[DiscussionKey] = set()
+        self._own: Dict[DiscussionKey, Any] = {}
+
+    @classmethod
+    def from_discussions(cls, discussions: Iterable[Any]) -> "DiscussionIndex":
+        """Build the index from GitLab discussion objects.
+
+        Args:
+            discussions: Discussions of a merge request
+        Returns:
+            Populated index
+        """
+        index = cls()
+        for discussion in discussions:
+            notes = discussion.attributes.get("notes") or []
+            if not notes:
+                continue
+            first = notes[0]
+            position = first.get("position") or {}
+            path = position.get("new_path")
+            if path is None:
+                continue
+            key = (path, position.get("new_line"), content_fingerprint(first["body"]))
+            index._keys.add(key)
+            if COMMENT_MARKER in first["body"] and not first.get("resolved", False):
+                index._own[key] = discussion
+        return index
+
+    def __len__(self) -> int:
+        """Return the number of indexed discussions."""
+        return len(self._keys)
+
+    def contains(self, comment: ReviewComment) -> bool:
+        """Return whether an equivalent comment is already on the MR."""
+        return comment_key(comment) in self._keys
+
+    def add(self, comment: ReviewComment) -> None:
+        """Record a comment that has just been posted."""
+        self._keys.add(comment_key(comment))
+
+    def outdated(
+        self, comments: List[ReviewComment], reviewed_lines: Dict[str, Set[int]]
+    ) -> List[Any]:
+        """Find our open discussions that the latest review no longer reports.
+
+        Only discussions on reviewed_lines are considered, since lines that
+        were not part of this review cannot have been re-checked.
+
+        Args:
+            comments: Comments produced by the latest review
+            reviewed_lines: New-file lines re-checked in this run, by path
+        Returns:
+            Discussions that can be resolved
+        """
+        current = {comment_key(comment) for comment in comments}
+        return [
+            discussion
+            for key, discussion in self._own.items()
+            if key[1] in reviewed_lines.get(key[0], ()) and key not in current
+        ]
+
+
+def fetch_discussion_index(mr: Any) -> DiscussionIndex:
+    """Fetch every discussion of a merge request, page by page, and index it.
+
+    Args:
+        mr: GitLab merge request object
+    Returns:
+        Populated index
+    """
+    index = DiscussionIndex.from_discussions(mr.discussions.list(iterator=True))
+    logger.info(f"Indexed {len(index)} existing discussions")
+    return index
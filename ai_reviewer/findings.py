@@ -0,0 +1,138 @@
+"""Parsing and local repair of the structured findings an LLM returns."""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+SEVERITIES = ("info", "warning", "error")
+DEFAULT_SEVERITY = "info"
+
+# Severity words models use instead of the ones asked for
+_SEVERITY_ALIASES = {
+    "critical": "error",
+    "high": "error",
+    "major": "error",
+    "medium": "warning",
+    "moderate": "warning",
+    "low": "info",
+    "minor": "info",
+    "note": "info",
+    "suggestion": "info",
+}
+_CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*$", re.MULTILINE)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+# Start of JSON holding objects or keys, unlike prose such as "[nit] ..."
+_JSON_START = re.compile(r"^[\[{]\s*[\[{\"]")
+
+
+class FindingScanner:
+    """Extracts finding objects from JSON output as soon as each is complete.
+
+    Nesting and strings are tracked one character at a time, so findings
+    are found in output that is still streaming or was cut off by the
+    completion token limit. Findings are the objects in the top-level
+    array, or in the array of a top-level object, such as
+    {"findings": [...]}.
+    """
+
+    def __init__(self) -> None:
+        """Create a scanner that has seen no output."""
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Scan more output.
+
+        Args:
+            text: Output following everything fed before
+        Returns:
+            Findings completed by text, in output order
+        """
+        self.text += text
+        found: List[Dict[str, Any]] = []
+        for pos in range(self._pos, len(self.text)):
+            char = self.text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._in_findings():
+                    self._start = pos
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._start is not None and self._in_findings():
+                    try:
+                        item = json.loads(self.text[self._start : pos + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        found.append(item)
+                    self._start = None
+        self._pos = len(self.text)
+        return found
+
+    def _in_findings(self) -> bool:
+        """Whether the scanner is directly inside the findings array."""
+        return self._stack == ["["] or self._stack == ["{", "["]
+
+
+def parse_findings(content: str) -> Optional[List[Dict[str, Any]]]:
+    """Parse findings from an LLM response, repairing common damage.
+
+    Code fences, text around the JSON and trailing commas are removed.
+    Output that still does not parse, typically because it was cut off,
+    keeps every finding that is complete.
+
+    Args:
+        content: Response text
+    Returns:
+        Finding objects, or None if content holds no JSON findings at all
+    """
+    text = _CODE_FENCE.sub("", content).strip()
+    starts = [idx for idx in (text.find("{"), text.find("[")) if idx >= 0]
+    if not starts:
+        return None
+    text = text[min(starts) :]
+    end = max(text.rfind("}"), text.rfind("]")) + 1
+    for candidate in (text[:end], _TRAILING_COMMA.sub(r"\1", text[:end])):
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            if "findings" in data:
+                data = data["findings"]
+            elif "comment" in data:
+                # A single finding without the wrapping object
+                data = [data]
+        if isinstance(data, list) and (
+            not data or any(isinstance(item, dict) for item in data)
+        ):
+            return [item for item in data if isinstance(item, dict)]
+        return None
+    found = FindingScanner().feed(text)
+    return found if found or _JSON_START.match(text) else None
+
+
+def normalize_severity(value: Any) -> str:
+    """Map a finding's severity to one of SEVERITIES.
+
+    Args:
+        value: Severity as returned by the model
+    Returns:
+        Known severity; DEFAULT_SEVERITY if value is not recognised
+    """
+    severity = str(value or "").strip().lower()
+    severity = _SEVERITY_ALIASES.get(severity, severity)
+    return severity if severity in SEVERITIES else DEFAULT_SEVERITY
@@ -1,10 +1,41 @@
+import difflib
+import itertools
 import os
+import queue
 import sys
 import logging
-from typing import List, Dict, Any
+import threading
+from dataclasses import dataclass, replace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 import gitlab
 
-from .review_strategies import ReviewStrategy, ReviewComment
+from . import metrics
+from .diff_parser import ParsedDiff
+from .discussion_index import (
+    COMMENT_MARKER,
+    DiscussionIndex,
+    DiscussionKey,
+    comment_key,
+    fetch_discussion_index,
+)
+from .http_transport import TransportConfig
+from .metrics import MetricsExporter
+from .rate_limit import GitLabRateLimiter
+from .review_config import FileSelector, ReviewConfig
+from .review_state import ReviewStateStore
+from .review_strategies import ReviewStrategy, ReviewComment, hunk_lines
+from .risk_scoring import ReviewTriage, RiskScorer
+from .strategy_runner import StrategyRunner
 
 # Set up logging
 logging.basicConfig(
@@ -13,17 +44,256 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_POST_WORKERS = 4
+DEFAULT_MAX_PENDING_COMMENTS = 32
+DEFAULT_DIFF_PAGE_SIZE = 50
+
+T = TypeVar("T")
+
+
+def _prefetch(items: Iterator[T], depth: int = 1) -> Iterator[T]:
+    """Iterate items while a background thread produces the next ones.
+
+    Exceptions raised while producing an item are re-raised to the
+    consumer. If the consumer stops early, the producer stops too.
+
+    Args:
+        items: Iterator that blocks while producing, e.g. on network reads
+        depth: Number of items produced ahead of the consumer
+    Yields:
+        The items, in order
+    """
+    buffer: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(kind: str, value: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put((kind, value), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put("item", item):
+                    return
+            put("done", None)
+        except BaseException as e:
+            put("error", e)
+
+    thread = threading.Thread(
+        target=metrics.bind(produce), name="prefetch", daemon=True
+    )
+    thread.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+
+
+@dataclass
+class CommentOutcome:
+    """Result of posting one review comment."""
+
+    comment: ReviewComment
+    posted: bool
+    attempts: int
+    error: Optional[str] = None
+
+
+class CommentPoster:
+    """Posts review comments while the review is still producing them.
+
+    Submitted comments pass through a bounded queue to a pool of worker
+    threads, so a review that finds comments faster than GitLab accepts
+    them waits instead of piling them up. Duplicates are dropped on submit,
+    as when posting all comments at the end: comments already on the merge
+    request, if its discussions could be fetched, and comments repeated
+    within the review in any case.
+    """
+
+    def __init__(
+        self,
+        post: Callable[[ReviewComment], CommentOutcome],
+        fetch_existing: Callable[[], Optional[DiscussionIndex]],
+        max_workers: int = DEFAULT_MAX_POST_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING_COMMENTS,
+    ) -> None:
+        """Initialize the poster; workers start with the first comment.
+
+        Args:
+            post: Posts one comment
+            fetch_existing: Indexes the discussions already on the merge
+                request; called once, when first needed
+            max_workers: Number of comments posted in parallel
+            max_pending: Comments queued before submit blocks
+        """
+        self.max_workers = max_workers
+        self.skipped = 0
+        self._post = metrics.bind(post)
+        self._fetch_existing = fetch_existing
+        self._existing: Optional[DiscussionIndex] = None
+        self._existing_fetched = False
+        self._seen: Set[DiscussionKey] = set()
+        self._queue: "queue.Queue[Optional[Tuple[int, ReviewComment]]]" = queue.Queue(
+            maxsize=max_pending
+        )
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._outcomes: Dict[int, CommentOutcome] = {}
+        self._submitted = 0
+        self._closed = False
+
+    def existing(self) -> Optional[DiscussionIndex]:
+        """Index of the discussions on the merge request, or None if unknown."""
+        with self._lock:
+            if not self._existing_fetched:
+                self._existing = self._fetch_existing()
+                self._existing_fetched = True
+            return self._existing
+
+    def submit(self, comment: ReviewComment) -> None:
+        """Queue a comment for posting unless it is a duplicate.
+
+        Safe to call from several threads. Blocks while the queue is full.
+        """
+        existing = self.existing()
+        with self._lock:
+            if self._closed:
+                logger.warning(
+                    f"Dropping comment on {comment.path}:{comment.line} found "
+                    "after posting finished"
+                )
+                return
+            key = comment_key(comment)
+            if key in self._seen or (
+                existing is not None and existing.contains(comment)
+            ):
+                self.skipped += 1
+                return
+            self._seen.add(key)
+            if existing is not None:
+                existing.add(comment)
+            index = self._submitted
+            self._submitted += 1
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work, name="comment-poster", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+        self._queue.put((index, comment))
+
+    def close(self) -> List[CommentOutcome]:
+        """Wait for the queued comments to be posted and report the outcomes.
+
+        Returns:
+            Outcome of each posted comment, in the order they were submitted
+        """
+        with self._lock:
+            self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        outcomes = [self._outcomes[idx] for idx in sorted(self._outcomes)]
+
+        if self.skipped:
+            logger.info(f"Skipping {self.skipped} duplicate comments")
+        if not outcomes:
+            return outcomes
+        failed = [outcome for outcome in outcomes if not outcome.posted]
+        metrics.add("comments_posted", len(outcomes) - len(failed))
+        metrics.add("comments_failed", len(failed))
+        logger.info(f"Posted {len(outcomes) - len(failed)} of {len(outcomes)} comments")
+        for outcome in failed:
+            logger.error(
+                f"Comment on {outcome.comment.path}:{outcome.comment.line} "
+                f"failed after {outcome.attempts} attempts: {outcome.error}"
+            )
+        return outcomes
+
+    def _work(self) -> None:
+        """Post queued comments until close() is called."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, comment = item
+            try:
+                outcome = self._post(comment)
+            except Exception as e:
+                outcome = CommentOutcome(
+                    comment, posted=False, attempts=0, error=str(e)
+                )
+            with self._lock:
+                self._outcomes[index] = outcome
+
 
 class GitLabReviewer:
     """GitLab code reviewer that processes merge requests."""
 
-    def __init__(self, strategies: List[ReviewStrategy]) -> None:
+    def __init__(
+        self,
+        strategies: List[ReviewStrategy],
+        state_store: Optional[ReviewStateStore] = None,
+        max_post_workers: int = DEFAULT_MAX_POST_WORKERS,
+        rate_limiter: Optional[GitLabRateLimiter] = None,
+        resolve_outdated: bool = False,
+        strategy_runner: Optional[StrategyRunner] = None,
+        metrics_exporter: Optional[MetricsExporter] = None,
+        diff_page_size: int = DEFAULT_DIFF_PAGE_SIZE,
+        transport: Optional[TransportConfig] = None,
+        review_config: Optional[ReviewConfig] = None,
+        risk_scorer: Optional[RiskScorer] = None,
+        llm_token_budget: Optional[int] = None,
+    ) -> None:
         """Initialize GitLab reviewer with review strategies.
 
         Args:
             strategies: List of review strategies to apply
+            state_store: Optional store of the last reviewed MR version; when
+                set, only changes pushed since that version are reviewed
+            max_post_workers: Number of comments posted in parallel
+            rate_limiter: Retry and backoff policy shared by all GitLab calls
+            resolve_outdated: Resolve our earlier discussions on reviewed files
+                that the latest review no longer reports
+            strategy_runner: Runner executing the strategies concurrently
+            metrics_exporter: Destination of each review's timing and token
+                metrics; None discards them
+            diff_page_size: Files fetched per page of the diffs API; each page
+                is reviewed while the next one downloads
+            transport: Connection pool and timeout settings; None keeps
+                python-gitlab's defaults
+            review_config: Settings from .ai-reviewer.yml deciding which
+                files are reviewed and how comments are labelled
+            risk_scorer: Decides per file whether the LLM reviews it fully,
+                only summarizes it or skips it; None reviews every file fully
+            llm_token_budget: Estimated prompt tokens one merge request may
+                spend on LLM reviews; without risk_scorer, files are served
+                in the order they are fetched
         """
         self.strategies = strategies
+        self.state_store = state_store
+        self.max_post_workers = max_post_workers
+        self.rate_limiter = rate_limiter or GitLabRateLimiter()
+        self.resolve_outdated = resolve_outdated
+        self.strategy_runner = strategy_runner or StrategyRunner()
+        self.metrics_exporter = metrics_exporter
+        self.diff_page_size = diff_page_size
+        self.review_config = review_config or ReviewConfig()
+        self.file_selector = FileSelector(self.review_config)
+        self.risk_scorer = risk_scorer
+        self.llm_token_budget = llm_token_budget
 
         # Get GitLab configuration
         gitlab_url = os.getenv("CI_SERVER_URL") or os.getenv("GITLAB_URL")
@@ -42,29 +312,57 @@ class GitLabReviewer:
             sys.exit(1)
 
         logger.info(f"Connecting to GitLab at: {gitlab_url}")
+        options: Dict[str, Any] = {}
+        if transport is not None:
+            options = {
+                "session": transport.requests_session(),
+                "timeout": transport.timeout,
+            }
         try:
             if os.getenv("CI_JOB_TOKEN"):
                 logger.info("Using CI job token for authentication")
-                self.gl = gitlab.Gitlab(url=gitlab_url, job_token=gitlab_token)
+                self.gl = gitlab.Gitlab(
+                    url=gitlab_url, job_token=gitlab_token, **options
+                )
             else:
                 logger.info("Using private token for authentication")
-                self.gl = gitlab.Gitlab(url=gitlab_url, private_token=gitlab_token)
+                self.gl = gitlab.Gitlab(
+                    url=gitlab_url, private_token=gitlab_token, **options
+                )
 
             self.gl.auth()
             logger.info("Successfully authenticated with GitLab")
+
+            # Let every GitLab response update the shared rate limit state
+            hooks = getattr(self.gl.session, "hooks", None)
+            if isinstance(hooks, dict):
+                hooks.setdefault("response", []).append(self.rate_limiter.observe)
         except Exception as e:
             logger.error(f"Failed to connect to GitLab: {str(e)}")
             sys.exit(1)
 
-    def process_merge_request(self, project_id: int, mr_iid: int) -> None:
+    def process_merge_request(self, project_id: int, mr_iid: int) -> bool:
         """Process a merge request and add review comments.
 
         Args:
             project_id: GitLab project ID
             mr_iid: Merge request internal ID
+        Returns:
+            True if the review is complete, False if some strategies failed
+            or comments could not be posted, so it should run again
         """
         logger.info(f"Processing merge request {mr_iid} in project {project_id}")
 
+        with metrics.collect(project_id=project_id, mr_iid=mr_iid) as review_metrics:
+            try:
+                return self._review_merge_request(project_id, mr_iid)
+            finally:
+                review_metrics.finish()
+                if self.metrics_exporter is not None:
+                    self.metrics_exporter.export(review_metrics)
+
+    def _review_merge_request(self, project_id: int, mr_iid: int) -> bool:
+        """Review a merge request; see process_merge_request."""
         try:
             # Get project
             logger.info(f"Fetching project {project_id}")
@@ -76,23 +374,90 @@ class GitLabReviewer:
             mr = project.mergerequests.get(mr_iid)
             logger.info(f"Found merge request: {mr.title}")
 
-            # Get changes
-            logger.info("Fetching merge request changes")
-            changes = self._get_merge_request_changes(mr)
-            logger.info(f"Found {len(changes)} changed files")
+            # Changes are fetched page by page as they are reviewed
+            pages = self._iter_change_pages(project, mr)
+
+            head_sha = mr.sha
+            if self.state_store is not None:
+                last_sha = self.state_store.load(mr)
+                if last_sha == head_sha:
+                    logger.info(f"Head {head_sha} was already reviewed, skipping")
+                    return True
+                if last_sha:
+                    all_changes = [change for page in pages for change in page]
+                    incremental = self._get_incremental_changes(
+                        project, last_sha, head_sha, all_changes
+                    )
+                    logger.info(
+                        f"Reviewing {len(incremental)} files changed since {last_sha}"
+                    )
+                    pages = iter([incremental])
+
+            if self.file_selector.max_files is not None:
+                # Ranking needs every file, so this gives up page streaming
+                pages = iter([self._select_changes(pages)])
+
+            # Apply review strategies to each page while the next one
+            # downloads, posting each comment as soon as it is found
+            poster = self._comment_poster(mr)
+            prefix = self.review_config.review_comment_prefix
+
+            def labelled(comment: ReviewComment) -> ReviewComment:
+                # A copy, since strategies may keep their comments, e.g. cached
+                if not prefix:
+                    return comment
+                return replace(comment, content=f"{prefix} {comment.content}")
+
+            def on_comment(comment: ReviewComment) -> None:
+                poster.submit(labelled(comment))
+
+            triage = None
+            if self.risk_scorer is not None or self.llm_token_budget is not None:
+                triage = ReviewTriage(self.risk_scorer, self.llm_token_budget)
+
+            changes: List[Dict[str, Any]] = []
+            all_comments: List[ReviewComment] = []
+            complete = True
+            try:
+                for page in _prefetch(pages):
+                    for change in page:
+                        # Scopes the reuse of earlier reviews of the same hunks
+                        change["project_id"] = project_id
+                    if triage is not None:
+                        triage.assign(page)
+                    changes.extend(page)
+                    logger.info(f"Reviewing {len(page)} changed files")
+                    for result in self.strategy_runner.run(
+                        self.strategies, page, on_comment=on_comment
+                    ):
+                        all_comments.extend(map(labelled, result.comments))
+                        complete = complete and result.succeeded
+                logger.info(f"Reviewed {len(changes)} changed files")
+            finally:
+                outcomes = poster.close()
+            logger.info(f"Found {len(all_comments)} review comments")
+            if not complete:
+                logger.warning(
+                    "Some strategies failed; outdated discussions are kept and "
+                    "this version will be reviewed again on the next run"
+                )
 
-            # Apply review strategies
-            all_comments = []
-            for strategy in self.strategies:
-                logger.info(f"Applying review strategy: {strategy.__class__.__name__}")
-                comments = strategy.review_changes(changes)
-                logger.info(f"Strategy generated {len(comments)} comments")
-                all_comments.extend(comments)
+            existing = poster.existing() if self.resolve_outdated else None
+            if self.resolve_outdated and complete and existing is not None:
+                self._resolve_outdated_discussions(
+                    existing, all_comments, self._reviewed_lines(changes)
+                )
 
-            # Add comments to merge request
-            logger.info(f"Adding {len(all_comments)} review comments")
-            self._add_review_comments(mr, all_comments)
-            logger.info("Successfully added review comments")
+            failed_posts = sum(1 for outcome in outcomes if not outcome.posted)
+            if failed_posts:
+                logger.warning(
+                    f"{failed_posts} comments could not be posted; this version "
+                    "will be reviewed again on the next run"
+                )
+            complete = complete and not failed_posts
+            if self.state_store is not None and complete:
+                self.state_store.save(mr, head_sha)
+            return complete
 
         except gitlab.exceptions.GitlabError as e:
             logger.error(f"GitLab API error: {str(e)}")
@@ -105,51 +470,402 @@ class GitLabReviewer:
             logger.error(f"Unexpected error: {str(e)}")
             sys.exit(1)
 
-    def _get_merge_request_changes(self, mr: Any) -> List[Dict[str, Any]]:
+    def _iter_change_pages(
+        self, project: Any, mr: Any
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Fetch merge request changes one page of files at a time.
+
+        Uses the paginated merge request diffs API, which unlike
+        mr.changes() is not truncated on large merge requests. Nothing is
+        fetched until the first page is requested. GitLab versions without
+        that API get all changes from mr.changes() as a single page.
+
+        Args:
+            project: GitLab project object
+            mr: GitLab merge request object
+        Yields:
+            Non-empty lists of changes, in the order GitLab returns them
+        """
+        entries: Optional[Iterator[Dict[str, Any]]] = None
+        page_number = 0
+        while True:
+            page_number += 1
+            with metrics.span("fetch_changes", page=page_number) as fetch_span:
+                if entries is None:
+                    entries = self._list_diffs(mr)
+                if entries is None:
+                    logger.info("Diffs API not available, fetching all changes")
+                    page = self._get_merge_request_changes(mr, project)
+                    fetch_span.attributes["files"] = len(page)
+                    if page:
+                        yield page
+                    return
+                raw_page = list(itertools.islice(entries, self.diff_page_size))
+                page = []
+                for entry in raw_page:
+                    change = self._change_from_entry(project, mr, entry)
+                    if change is not None:
+                        page.append(change)
+                fetch_span.attributes["files"] = len(page)
+            if page:
+                yield page
+            if len(raw_page) < self.diff_page_size:
+                return
+
+    def _select_changes(
+        self, pages: Iterator[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Keep the max_files_per_review highest priority changes.
+
+        Args:
+            pages: Pages of changes, already without excluded files
+        Returns:
+            Selected changes, in merge request order
+        """
+        selected, skipped = self.file_selector.select(
+            [change for page in pages for change in page]
+        )
+        if skipped:
+            logger.info(
+                f"Reviewing the {len(selected)} highest priority files, "
+                f"skipping {len(skipped)}: {', '.join(skipped)}"
+            )
+            metrics.add("files_skipped", len(skipped))
+        return selected
+
+    def _list_diffs(self, mr: Any) -> Optional[Iterator[Dict[str, Any]]]:
+        """Start listing the MR's file diffs, or return None if unsupported.
+
+        The first page is requested immediately; later pages are requested
+        as the returned iterator reaches them.
+        """
+        path = f"/projects/{mr.project_id}/merge_requests/{mr.iid}/diffs"
+        try:
+            return iter(
+                self.rate_limiter.call(
+                    self.gl.http_list,
+                    path,
+                    iterator=True,
+                    per_page=self.diff_page_size,
+                )
+            )
+        except gitlab.exceptions.GitlabHttpError as e:
+            if e.response_code == 404:
+                return None
+            raise
+
+    def _get_merge_request_changes(
+        self, mr: Any, project: Any = None
+    ) -> List[Dict[str, Any]]:
         """Get changes from merge request.
 
         Args:
             mr: GitLab merge request object
+            project: GitLab project object, needed to fetch files whose diff
+                was too large for GitLab to include
         Returns:
             List of changes with file and diff information
         """
         logger.info("Fetching merge request changes")
-        changes = mr.changes()["changes"]
+        data = mr.changes()
+        changes = data["changes"]
+        if data.get("overflow"):
+            logger.warning(
+                f"GitLab truncated the changes to {len(changes)} of "
+                f"{data.get('changes_count')} files; the rest are not reviewed"
+            )
         processed_changes = []
 
         for change in changes:
             logger.debug(f"Processing change in file: {change.get('new_path')}")
-            if "diff" in change and change["diff"]:
-                processed_changes.append(
-                    {
-                        "new_path": change["new_path"],
-                        "diff": change["diff"],
-                        "line": 1,  # Default to first line if not specified
-                    }
-                )
+            built = self._change_from_entry(project, mr, change)
+            if built is not None:
+                processed_changes.append(built)
 
         return processed_changes
 
-    def _add_review_comments(self, mr: Any, comments: List[ReviewComment]) -> None:
+    def _change_from_entry(
+        self, project: Any, mr: Any, entry: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Build a change from a GitLab diff entry, fetching oversized files.
+
+        Args:
+            project: GitLab project object, or None to skip oversized files
+            mr: GitLab merge request object
+            entry: Diff entry returned by GitLab
+        Returns:
+            Change, or None if there is nothing to review
+        """
+        if self.file_selector.is_excluded(entry["new_path"]):
+            logger.debug(f"Skipping excluded file {entry['new_path']}")
+            metrics.add("files_excluded")
+            return None
+        diff = entry.get("diff")
+        if not diff and (entry.get("too_large") or entry.get("collapsed")):
+            if project is None:
+                logger.warning(f"Skipping {entry.get('new_path')}: diff too large")
+                return None
+            diff = self._fetch_raw_diff(project, mr, entry)
+        if not diff:
+            return None
+        return self._build_change(entry["new_path"], diff)
+
+    def _fetch_raw_diff(
+        self, project: Any, mr: Any, entry: Dict[str, Any]
+    ) -> Optional[str]:
+        """Diff a file GitLab did not include, from its raw old and new versions.
+
+        Args:
+            project: GitLab project object
+            mr: GitLab merge request object
+            entry: Diff entry marked too large or collapsed
+        Returns:
+            Unified diff without file headers, or None if it cannot be built
+        """
+        path = entry["new_path"]
+        if entry.get("deleted_file"):
+            return None
+        logger.info(f"Fetching {path} separately, its diff was too large")
+        refs = mr.diff_refs or {}
+        try:
+            new = self.rate_limiter.call(
+                project.files.raw, file_path=path, ref=refs.get("head_sha") or mr.sha
+            )
+            old = b""
+            if not entry.get("new_file"):
+                old = self.rate_limiter.call(
+                    project.files.raw,
+                    file_path=entry.get("old_path") or path,
+                    ref=refs["base_sha"],
+                )
+            old_lines = old.decode("utf-8").splitlines()
+            new_lines = new.decode("utf-8").splitlines()
+        except UnicodeDecodeError:
+            logger.info(f"Skipping binary file {path}")
+            return None
+        except Exception as e:
+            logger.warning(f"Could not fetch {path}, skipping it: {str(e)}")
+            return None
+        lines = difflib.unified_diff(old_lines, new_lines, lineterm="")
+        # Drop the ---/+++ file headers, GitLab diffs start at the first hunk
+        return "\n".join(itertools.islice(lines, 2, None)) or None
+
+    def _build_change(self, new_path: str, diff: str) -> Dict[str, Any]:
+        """Parse a file diff into the change model passed to strategies.
+
+        Args:
+            new_path: Path of the file in the new version
+            diff: Unified diff of the file
+        Returns:
+            Change with its parsed diff and the first changed line
+        """
+        parsed = ParsedDiff.parse(diff)
+        line = parsed.first_added_line() or parsed.nearest_new_line(0) or 1
+        return {"new_path": new_path, "diff": diff, "line": line, "parsed": parsed}
+
+    def _get_incremental_changes(
+        self,
+        project: Any,
+        last_sha: str,
+        head_sha: str,
+        changes: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Narrow merge request changes to what was pushed since last_sha.
+
+        Only hunks that add lines shown in the merge request's own diff are
+        kept, so changes pulled in from the target branch by a rebase are
+        ignored, even in files the merge request touches. If the old head
+        no longer exists, the full changes are returned.
+
+        Args:
+            project: GitLab project object
+            last_sha: Head SHA of the previously reviewed version
+            head_sha: Current head SHA of the merge request
+            changes: Full merge request changes
+        Returns:
+            List of changes with only the newly changed hunks
+        """
+        try:
+            compare = project.repository_compare(last_sha, head_sha)
+        except gitlab.exceptions.GitlabError as e:
+            logger.warning(
+                f"Cannot compare {last_sha}..{head_sha}, reviewing all changes: "
+                f"{str(e)}"
+            )
+            return changes
+
+        mr_diffs: Dict[str, ParsedDiff] = {}
+        for change in changes:
+            parsed = change.get("parsed")
+            if parsed is None:
+                parsed = ParsedDiff.parse(change["diff"])
+            mr_diffs[change["new_path"]] = parsed
+        incremental = []
+        for diff in compare["diffs"]:
+            mr_diff = mr_diffs.get(diff["new_path"])
+            if mr_diff is None or not diff.get("diff"):
+                continue
+            kept = self._hunks_in_diff(diff["diff"], mr_diff)
+            if kept:
+                incremental.append(self._build_change(diff["new_path"], kept))
+        return incremental
+
+    def _hunks_in_diff(self, diff: str, mr_diff: ParsedDiff) -> str:
+        """Keep the hunks of diff that add lines shown in the MR's diff.
+
+        Args:
+            diff: Diff of a file between two heads of the merge request
+            mr_diff: Parsed diff of the same file in the merge request
+        Returns:
+            Diff text of the kept hunks, empty if none is kept
+        """
+        parsed = ParsedDiff.parse(diff)
+        lines = diff.split("\n")
+        kept: List[str] = []
+        for hunk in parsed.hunks:
+            added = [
+                parsed.new_line_at(offset)
+                for offset in range(hunk.offset, hunk.end)
+                if parsed.is_added(offset)
+            ]
+            if any(line and mr_diff.contains_new_line(line) for line in added):
+                kept.extend(lines[hunk.offset : hunk.end])
+        return "\n".join(kept)
+
+    def _fetch_existing_discussions(self, mr: Any) -> Optional[DiscussionIndex]:
+        """Index the discussions already on the MR, or None if that fails."""
+        try:
+            return self.rate_limiter.call(fetch_discussion_index, mr)
+        except Exception as e:
+            logger.warning(
+                f"Could not fetch existing discussions, duplicates will not be "
+                f"skipped: {str(e)}"
+            )
+            return None
+
+    def _comment_poster(
+        self, mr: Any, existing: Optional[DiscussionIndex] = None
+    ) -> CommentPoster:
+        """Create a poster for comments on a merge request.
+
+        Args:
+            mr: GitLab merge request object
+            existing: Index of existing discussions; fetched when needed
+                if not given
+        Returns:
+            Poster whose workers start with the first comment
+        """
+        return CommentPoster(
+            post=lambda comment: self._post_comment(mr, comment),
+            fetch_existing=lambda: (
+                existing
+                if existing is not None
+                else self._fetch_existing_discussions(mr)
+            ),
+            max_workers=self.max_post_workers,
+        )
+
+    def _add_review_comments(
+        self,
+        mr: Any,
+        comments: List[ReviewComment],
+        existing: Optional[DiscussionIndex] = None,
+    ) -> List[CommentOutcome]:
         """Add review comments to merge request.
 
+        Comments that are already on the merge request, or repeated within
+        comments, are skipped. The rest are posted by a bounded pool of
+        workers. Rate limited and transient failures are retried; other
+        failures are logged and do not stop the remaining comments.
+
         Args:
             mr: GitLab merge request object
             comments: List of review comments to add
+            existing: Index of existing discussions; fetched when not given
+        Returns:
+            Outcome of each posted comment, in the same order as comments
         """
+        if not comments:
+            return []
+        poster = self._comment_poster(mr, existing)
         for comment in comments:
-            logger.info(f"Adding comment to {comment.path} at line {comment.line}")
+            poster.submit(comment)
+        return poster.close()
+
+    def _post_comment(self, mr: Any, comment: ReviewComment) -> CommentOutcome:
+        """Post a single comment as a merge request discussion."""
+        logger.info(f"Adding comment to {comment.path} at line {comment.line}")
+        attempts = 0
+
+        def create() -> Any:
+            nonlocal attempts
+            attempts += 1
+            return mr.discussions.create(
+                {
+                    "body": f"{comment.content}\n\n{COMMENT_MARKER}",
+                    "position": {
+                        "position_type": "text",
+                        "new_path": comment.path,
+                        "new_line": comment.line,
+                    },
+                }
+            )
+
+        with metrics.span("post_comment", path=comment.path) as post_span:
             try:
-                mr.discussions.create(
-                    {
-                        "body": comment.content,
-                        "position": {
-                            "position_type": "text",
-                            "new_path": comment.path,
-                            "new_line": comment.line,
-                        },
-                    }
+                self.rate_limiter.call(create)
+            except Exception as e:
+                post_span.attributes.update(attempts=attempts, posted=False)
+                return CommentOutcome(
+                    comment, posted=False, attempts=attempts, error=str(e)
+                )
+            post_span.attributes.update(attempts=attempts, posted=True)
+        return CommentOutcome(comment, posted=True, attempts=attempts)
+
+    def _reviewed_lines(self, changes: List[Dict[str, Any]]) -> Dict[str, Set[int]]:
+        """Map each reviewed file to the lines every strategy re-checked.
+
+        A discussion may come from any strategy, so only a line checked by
+        all of them shows that its finding is gone. In an incremental
+        review these are the lines of the newly pushed hunks.
+
+        Args:
+            changes: Changes reviewed in this run
+        Returns:
+            New-file line numbers by path
+        """
+        reviewed: Dict[str, Set[int]] = {}
+        for change in changes:
+            lines = [
+                (
+                    strategy.reviewed_lines(change)
+                    if isinstance(strategy, ReviewStrategy)
+                    else hunk_lines(change)
                 )
+                for strategy in self.strategies
+            ]
+            reviewed[change["new_path"]] = set.intersection(*lines) if lines else set()
+        return reviewed
+
+    def _resolve_outdated_discussions(
+        self,
+        existing: DiscussionIndex,
+        comments: List[ReviewComment],
+        reviewed_lines: Dict[str, Set[int]],
+    ) -> None:
+        """Resolve our discussions whose findings were not reported again.
+
+        Args:
+            existing: Index of discussions present before this review
+            comments: Comments produced by this review
+            reviewed_lines: New-file lines re-checked in this run, by path
+        """
+        outdated = existing.outdated(comments, reviewed_lines)
+        for discussion in outdated:
+            discussion.resolved = True
+            try:
+                self.rate_limiter.call(discussion.save)
             except Exception as e:
-                logger.error(f"Failed to add comment: {str(e)}")
-                # Continue with other comments even if one fails
+                logger.error(f"Failed to resolve outdated discussion: {str(e)}")
+        if outdated:
+            logger.info(f"Resolved {len(outdated)} outdated discussions")
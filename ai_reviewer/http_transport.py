@@ -0,0 +1,243 @@
+"""Connection pooling, keep-alive and timeouts shared by the HTTP clients."""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import importlib
+import importlib.util
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Coroutine, Dict, Optional, Tuple, TypeVar
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE_SECONDS = 30.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """HTTP settings for the GitLab and LLM clients.
+
+    Both clients keep a pool of connections per host and reuse them for
+    later requests, so a review pays for TCP and TLS handshakes once per
+    pooled connection instead of once per request. Each client counts the
+    requests it sends and the connections it opens in the review metrics
+    as <client>_http_requests and <client>_connections_opened; requests
+    minus connections is the number of requests that reused one.
+    """
+
+    pool_size: int = DEFAULT_POOL_SIZE
+    keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Read the settings from AI_REVIEWER_HTTP_* environment variables."""
+        return cls(
+            pool_size=int(
+                os.getenv("AI_REVIEWER_HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE))
+            ),
+            keepalive_seconds=float(
+                os.getenv("AI_REVIEWER_HTTP_KEEPALIVE", str(DEFAULT_KEEPALIVE_SECONDS))
+            ),
+            connect_timeout=float(
+                os.getenv(
+                    "AI_REVIEWER_HTTP_CONNECT_TIMEOUT", str(DEFAULT_CONNECT_TIMEOUT)
+                )
+            ),
+            read_timeout=float(
+                os.getenv("AI_REVIEWER_HTTP_READ_TIMEOUT", str(DEFAULT_READ_TIMEOUT))
+            ),
+            http2=os.getenv("AI_REVIEWER_HTTP2", "").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Connect and read timeouts in the form requests expects."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def requests_session(self, name: str = "gitlab") -> Any:
+        """Create a pooled requests session, as used by python-gitlab.
+
+        requests cannot speak HTTP/2 and keeps idle connections until the
+        server closes them, so http2 is ignored and a keep-alive of 0 only
+        turns keep-alive off.
+
+        Args:
+            name: Client name used in the metric names
+        Returns:
+            requests.Session
+        """
+        import requests
+
+        session = requests.Session()
+        adapter = _counting_adapter(name, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if self.keepalive_seconds <= 0:
+            session.headers["Connection"] = "close"
+        session.hooks["response"].append(
+            lambda response, *args, **kwargs: metrics.add(f"{name}_http_requests")
+        )
+        return session
+
+    def async_http_client(self, name: str = "llm") -> Any:
+        """Create a pooled httpx client for the OpenAI SDK.
+
+        Args:
+            name: Client name used in the metric names
+        Returns:
+            httpx.AsyncClient with the SDK's defaults for everything else
+        """
+        import openai
+
+        httpx = _import_httpx()
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 needs the h2 package; using HTTP/1.1")
+            http2 = False
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                metrics.add(f"{name}_connections_opened")
+
+        async def on_request(request: Any) -> None:
+            metrics.add(f"{name}_http_requests")
+            request.extensions["trace"] = trace
+
+        return openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=(
+                    self.pool_size if self.keepalive_seconds > 0 else 0
+                ),
+                keepalive_expiry=self.keepalive_seconds,
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            http2=http2,
+            event_hooks={"request": [on_request]},
+        )
+
+
+def _import_httpx() -> Any:
+    """Import httpx, or the httpx2 fork that some openai releases are built on.
+
+    Imported by name, so type checking does not depend on which is installed.
+    """
+    try:
+        return importlib.import_module("httpx")
+    except ImportError:
+        return importlib.import_module("httpx2")
+
+
+def _counting_connection(base: Any, name: str) -> Any:
+    """Subclass a urllib3 connection class to count new connections."""
+
+    class CountingConnection(base):
+        def connect(self) -> None:
+            metrics.add(f"{name}_connections_opened")
+            super().connect()
+
+    return CountingConnection
+
+
+def _counting_adapter(name: str, pool_maxsize: int) -> Any:
+    """Create a requests adapter whose pools count the connections they open.
+
+    Args:
+        name: Client name used in the metric name
+        pool_maxsize: Connections kept per host
+    Returns:
+        requests.adapters.HTTPAdapter
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    pool_classes = {
+        scheme: type(
+            pool.__name__,
+            (pool,),
+            {"ConnectionCls": _counting_connection(pool.ConnectionCls, name)},
+        )
+        for scheme, pool in (
+            ("http", HTTPConnectionPool),
+            ("https", HTTPSConnectionPool),
+        )
+    }
+
+    class CountingAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    return CountingAdapter(pool_maxsize=pool_maxsize)
+
+
+class EventLoopThread:
+    """An event loop running in a daemon thread, for clients that outlive a call.
+
+    asyncio.run() closes its loop, and with it every pooled connection,
+    when the call returns. Running all calls on one long-lived loop lets an
+    async client keep its connections between calls and threads.
+    """
+
+    def __init__(self, name: str = "event-loop") -> None:
+        """Create the thread; it starts on first use.
+
+        Args:
+            name: Thread name
+        """
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the loop and wait for its result.
+
+        The coroutine runs in a copy of the caller's context, so it records
+        into the caller's review metrics.
+
+        Args:
+            coro: Coroutine to run
+        Returns:
+            The coroutine's result
+        """
+        loop = self._start()
+        context = contextvars.copy_context()
+        result: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+
+        def copy_outcome(task: "asyncio.Task[T]") -> None:
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        def start() -> None:
+            task = loop.create_task(coro, context=context)
+            task.add_done_callback(copy_outcome)
+
+        loop.call_soon_threadsafe(start)
+        return result.result()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop's thread unless it is running."""
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.loop.run_forever, name=self.name, daemon=True
+                ).start()
+            return self.loop
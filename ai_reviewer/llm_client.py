@@ -1,6 +1,64 @@
-from typing import Any, Dict, List, TypedDict
-import openai
+import asyncio
+import logging
+import re
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+)
+from . import metrics
+from .diff_compactor import DiffCompactor
+from .diff_parser import Hunk, ParsedDiff
+from .findings import FindingScanner, normalize_severity, parse_findings
+from .http_transport import EventLoopThread, TransportConfig
+from .rate_limit import RETRYABLE_STATUS_CODES, LLMRateLimiter
+from .request_planner import (
+    DEFAULT_INPUT_TOKEN_BUDGET,
+    RequestPlan,
+    RequestPlanner,
+    estimate_tokens,
+)
+from .review_cache import ALL_PROJECTS, ReviewCache, cache_key, hunk_fingerprint
+from .resilience import (
+    CircuitBreaker,
+    IncompleteReviewError,
+    LatencyTracker,
+    LLMUnavailableError,
+)
 from .review_strategies import ReviewComment
+from .risk_scoring import FULL_REVIEW, NO_REVIEW, SUMMARY_REVIEW
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUEST_TIMEOUT = 120.0
+
+SYSTEM_PROMPT = "You are a helpful code reviewer. Provide concise feedback."
+FINDINGS_INSTRUCTION = (
+    ' Reply only with JSON: {"findings": [{"path": "<file>", "line": <new-file'
+    ' line>, "severity": "info|warning|error", "comment": "<feedback>"}]}.'
+    " Give one finding per issue, possibly several per file, counting lines"
+    ' from the "+" start of hunk headers. Use an empty list if nothing needs'
+    " to change."
+)
+USER_PROMPT_TEMPLATE = "Review this code change in {path}:\n{diff}"
+SUMMARY_PROMPT_TEMPLATE = (
+    "In one or two sentences, summarize the risks of this code change in {path}:"
+    "\n{diff}"
+)
+# Per-file "### <path>" sections, which models that ignore the JSON format
+# tend to fall back to
+_SECTION_HEADING = re.compile(r"^###[ \t]*(.+?)[ \t]*$", re.MULTILINE)
+
+Emit = Callable[[ReviewComment], Awaitable[None]]
 
 
 class ChatMessage(TypedDict):
@@ -13,30 +71,760 @@ class ChatMessage(TypedDict):
 class LLMClient:
     """Client for interacting with OpenAI's API."""
 
-    def __init__(self, api_key: str):
-        """Initialize the LLM client with API key."""
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_tokens: int = 500,
+        max_input_tokens: int = DEFAULT_INPUT_TOKEN_BUDGET,
+        cache: Optional[ReviewCache] = None,
+        transport: Optional[TransportConfig] = None,
+        rate_limiter: Optional[LLMRateLimiter] = None,
+        compactor: Optional[DiffCompactor] = None,
+        share_across_projects: bool = False,
+        request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT,
+        latency: Optional[LatencyTracker] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """Initialize the LLM client.
 
-    def analyze_code(self, code_changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        Args:
+            api_key: OpenAI API key
+            model: Chat completion model to use
+            max_concurrency: Maximum number of requests in flight at once
+            max_tokens: Completion token limit for each request
+            max_input_tokens: Input token budget for each request
+            cache: Optional cache of results from earlier reviews
+            transport: Connection pool and timeout settings; None keeps the
+                SDK's defaults
+            rate_limiter: Request and token limits, possibly shared with
+                other clients; by default limits are learned from responses
+            compactor: Shrinks diffs before they are sent; None sends them
+                as they are
+            share_across_projects: Reuse the cached reviews of hunks from
+                every project, not only from the change's own project
+            request_timeout: Seconds each attempt of a request may take,
+                streaming included, before it is retried; None waits
+                indefinitely
+            latency: Recent request latencies; a request slower than their
+                hedge delay is sent a second time and the first answer wins.
+                None never hedges.
+            circuit_breaker: Stops sending requests while the API keeps
+                failing; None uses a default breaker
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_tokens = max_tokens
+        self.planner = RequestPlanner(
+            prompt_tokens=estimate_tokens(SYSTEM_PROMPT + FINDINGS_INSTRUCTION),
+            max_input_tokens=max_input_tokens,
+            user_template=self._user_template,
+        )
+        self.last_plan: Optional[RequestPlan] = None
+        self.cache = cache
+        self.transport = transport
+        self.rate_limiter = rate_limiter or LLMRateLimiter()
+        self.compactor = compactor
+        # Summary-only reviews are sent the changed lines alone
+        self._summary_compactor = DiffCompactor(context_lines=0)
+        self.share_across_projects = share_across_projects
+        self.request_timeout = request_timeout
+        self.latency = latency
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # One loop and one client for every call, so pooled connections
+        # are reused across reviews and threads
+        self._loop = EventLoopThread(name="llm-client")
+        self._client: Any = None
+
+    def analyze_code(
+        self,
+        code_changes: List[Dict[str, Any]],
+        on_comment: Optional[Callable[[ReviewComment], None]] = None,
+    ) -> List[ReviewComment]:
         """
         Analyze code changes using OpenAI's API and return review comments.
+
+        Synchronous wrapper around analyze_code_async, safe to call from
+        several threads at once.
         Args:
             code_changes: List of dictionaries containing code change information
+            on_comment: Called with each comment as soon as it is complete
         Returns:
             List of ReviewComment objects with suggestions
         """
-        messages = self._prepare_messages(code_changes)
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500,
+        return self._loop.run(self.analyze_code_async(code_changes, on_comment))
+
+    async def analyze_code_async(
+        self,
+        code_changes: List[Dict[str, Any]],
+        on_comment: Optional[Callable[[ReviewComment], None]] = None,
+    ) -> List[ReviewComment]:
+        """
+        Review code changes concurrently, one request per batch of files.
+
+        Comments are returned in the order of the changes, regardless of
+        which request finishes first. Files found in the cache are not sent.
+        Changes may carry a "review_depth": files with NO_REVIEW are left
+        out, and files with SUMMARY_REVIEW only get a short summary of
+        their changed lines.
+
+        With on_comment, completions are streamed and each comment is passed
+        on as soon as its file's feedback is complete, while the other
+        requests are still running. on_comment runs in a worker thread and
+        may block to slow the review down.
+        Args:
+            code_changes: List of dictionaries containing code change information
+            on_comment: Called with each comment as soon as it is complete
+        Returns:
+            List of ReviewComment objects with suggestions
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open, either from
+                the start or after it left files unreviewed, so the review
+                falls back to the local strategies and runs again later
+            IncompleteReviewError: If requests for some files failed for
+                good; the error keeps the comments on the other files
+        """
+        if self.circuit_breaker.is_open:
+            metrics.add("llm_reviews_short_circuited")
+            raise LLMUnavailableError("OpenAI API is failing, not sending requests")
+        code_changes = self._compact_changes(
+            [c for c in code_changes if c.get("review_depth") != NO_REVIEW]
+        )
+        emit = self._emitter(on_comment) if on_comment is not None else None
+        cached: Dict[int, List[ReviewComment]] = {}
+        keys: Dict[int, str] = {}
+        if self.cache is not None:
+            for idx, change in enumerate(code_changes):
+                keys[idx] = cache_key(
+                    self.model, self._prompt_template(change), change["diff"]
+                )
+                hit = self.cache.get(keys[idx], change["new_path"], change["diff"])
+                if hit is not None:
+                    cached[idx] = hit
+        # Hunks reviewed before, in this or another merge request, are not
+        # sent again; only the rest of their file is
+        reused: Dict[int, List[ReviewComment]] = {}
+        sent: Dict[int, Dict[str, Any]] = {}
+        for idx, change in enumerate(code_changes):
+            if idx in cached:
+                continue
+            if self.cache is not None:
+                reused[idx], remaining = self._reuse_hunks(change)
+                if remaining is None:
+                    continue
+                change = remaining
+            sent[idx] = change
+        if cached:
+            metrics.add("llm_cache_hits", len(cached))
+        if emit is not None:
+            for hits in list(cached.values()) + list(reused.values()):
+                for comment in hits:
+                    await emit(comment)
+        pending = list(sent.values())
+
+        batches = self._batch_changes(pending)
+        results: List[Optional[List[ReviewComment]]] = []
+        if batches:
+            shared = asyncio.get_running_loop() is self._loop.loop
+            client = self._shared_client() if shared else self._create_client()
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            try:
+                results = await asyncio.gather(
+                    *(
+                        self._review_batch(client, semaphore, batch, emit)
+                        for batch in batches
+                    )
+                )
+            finally:
+                if not shared:
+                    await client.close()
+
+        by_path: Dict[str, List[ReviewComment]] = {}
+        failed_paths: Set[str] = set()
+        for batch, batch_comments in zip(batches, results):
+            if batch_comments is None:
+                failed_paths.update(change["new_path"] for change in batch)
+                continue
+            for comment in batch_comments:
+                by_path.setdefault(comment.path, []).append(comment)
+
+        comments: List[ReviewComment] = []
+        for idx, change in enumerate(code_changes):
+            if idx in cached:
+                comments.extend(cached[idx])
+                continue
+            file_comments = reused.get(idx, [])
+            failed = change["new_path"] in failed_paths
+            if idx in sent:
+                reviewed = by_path.pop(change["new_path"], [])
+                if self.cache is not None and not failed:
+                    self._record_hunks(sent[idx], reviewed)
+                file_comments = sorted(file_comments + reviewed, key=lambda c: c.line)
+            comments.extend(file_comments)
+            if self.cache is not None and not failed:
+                self.cache.put(keys[idx], file_comments, change["diff"])
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            logger.info(
+                f"Review cache: {len(cached)} of {len(code_changes)} files cached "
+                f"({stats['hits']} hits, {stats['misses']} misses in total)"
             )
-            return self._parse_response(response, code_changes)
-        except Exception as e:
-            print(f"Error calling OpenAI API: {str(e)}")
-            return []
+        if failed_paths and self.circuit_breaker.is_open:
+            raise LLMUnavailableError(
+                f"OpenAI API is failing, {len(failed_paths)} files were not reviewed"
+            )
+        if failed_paths:
+            raise IncompleteReviewError(
+                f"{len(failed_paths)} files were not reviewed", comments
+            )
+        return comments
+
+    def reviewed_lines(self, change: Dict[str, Any]) -> Set[int]:
+        """Return the new-file lines of a change that a full review is sent.
+
+        Summary-only and skipped files are not checked line by line, and
+        lines cut by the compactor, such as moved blocks and whitespace
+        changes, are not sent at all.
+
+        Args:
+            change: Code change as passed to analyze_code
+        Returns:
+            New-file line numbers
+        """
+        if change.get("review_depth", FULL_REVIEW) != FULL_REVIEW:
+            return set()
+        diff = change["diff"]
+        if self.compactor is not None:
+            diff = self.compactor.compact(diff)
+            if not diff:
+                return set()
+        return ParsedDiff.parse(diff).hunk_new_lines()
+
+    def _hunk_scopes(self, change: Dict[str, Any]) -> List[str]:
+        """Scopes to look a change's hunks up in: its project, then all projects.
+
+        Hunks are always stored in both, so sharing can be turned on later.
+        """
+        scopes = [str(change.get("project_id", ""))]
+        if self.share_across_projects:
+            scopes.append(ALL_PROJECTS)
+        return scopes
+
+    def _hunk_fingerprints(
+        self, change: Dict[str, Any]
+    ) -> List[Tuple[Hunk, Optional[str]]]:
+        """Pair each hunk of a change's diff with its fingerprint, if it has one."""
+        parsed = change.get("parsed")
+        if parsed is None or not parsed.hunks:
+            parsed = ParsedDiff.parse(change["diff"])
+        lines = change["diff"].split("\n")
+        return [
+            (
+                hunk,
+                hunk_fingerprint(
+                    self.model,
+                    self._prompt_template(change),
+                    lines[hunk.offset + 1 : hunk.end],
+                ),
+            )
+            for hunk in parsed.hunks
+        ]
+
+    def _reuse_hunks(
+        self, change: Dict[str, Any]
+    ) -> Tuple[List[ReviewComment], Optional[Dict[str, Any]]]:
+        """Reuse the comments of hunks that were reviewed before.
+
+        Reused comments are re-anchored to the hunk's lines in this diff.
+        A comment stored under several hunks of the file is reused once.
+
+        Args:
+            change: Change to review
+        Returns:
+            Reused comments, and the change with only the hunks still to
+            review, or None if every hunk was reviewed before
+        """
+        assert self.cache is not None
+        scopes = self._hunk_scopes(change)
+        comments: List[ReviewComment] = []
+        contents: Set[str] = set()
+        new_hunks: List[Hunk] = []
+        pairs = self._hunk_fingerprints(change)
+        for hunk, fingerprint in pairs:
+            stored = None
+            # Hunks without a fingerprint are always reviewed again
+            if fingerprint is not None:
+                for scope in scopes:
+                    stored = self.cache.get_hunk(fingerprint, scope)
+                    if stored is not None:
+                        break
+            if stored is None:
+                new_hunks.append(hunk)
+                continue
+            for offset, content in stored:
+                if not 0 <= offset < hunk.new_count:
+                    continue
+                if content not in contents:
+                    contents.add(content)
+                    comments.append(
+                        ReviewComment(
+                            path=change["new_path"],
+                            line=hunk.new_start + offset,
+                            content=content,
+                        )
+                    )
+        reused = len(pairs) - len(new_hunks)
+        if not reused:
+            return [], change
+        metrics.add("llm_hunks_reused", reused)
+        logger.info(
+            f"Reusing earlier reviews of {reused} of {len(pairs)} hunks "
+            f"in {change['new_path']}"
+        )
+        if not new_hunks:
+            return comments, None
+        lines = change["diff"].split("\n")
+        diff = "\n".join(
+            line for hunk in new_hunks for line in lines[hunk.offset : hunk.end]
+        )
+        return comments, {**change, "diff": diff, "parsed": ParsedDiff.parse(diff)}
+
+    def _record_hunks(
+        self, change: Dict[str, Any], comments: List[ReviewComment]
+    ) -> None:
+        """Store the comments of a reviewed change under each of its hunks.
+
+        A hunk keeps only the comments placed on its own new lines, by
+        offset from its first new line; comments elsewhere in the file are
+        not about it.
+        """
+        assert self.cache is not None
+        hunks: Dict[str, List[Tuple[int, str]]] = {}
+        for hunk, fingerprint in self._hunk_fingerprints(change):
+            if fingerprint is None:
+                continue
+            end = hunk.new_start + hunk.new_count
+            hunks[fingerprint] = [
+                (c.line - hunk.new_start, c.content)
+                for c in comments
+                if hunk.new_start <= c.line < end
+            ]
+        for scope in (str(change.get("project_id", "")), ALL_PROJECTS):
+            self.cache.put_hunks(hunks, scope)
+
+    def _emitter(self, on_comment: Callable[[ReviewComment], None]) -> Emit:
+        """Wrap a callback so it runs in a thread, recording into this review.
+
+        A blocking callback then slows the review down without stalling
+        the event loop that other reviews share.
+        """
+        callback = metrics.bind(on_comment)
+
+        async def emit(comment: ReviewComment) -> None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, callback, comment)
+
+        return emit
+
+    def _compact_changes(
+        self, code_changes: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Compact the diffs and drop files that are not worth a request.
+
+        Compacted changes get their diff parsed again. Its hunk headers
+        keep the original line numbers, so comments land on the same lines.
+        Changes for a summary-only review keep no context at all.
+
+        Args:
+            code_changes: Changes to review
+        Returns:
+            Changes with compacted diffs, without binary, minified and
+            whitespace-only files
+        """
+        compacted: List[Dict[str, Any]] = []
+        tokens_before = tokens_after = 0
+        for change in code_changes:
+            compactor = self.compactor
+            if change.get("review_depth") == SUMMARY_REVIEW:
+                compactor = self._summary_compactor
+            if compactor is None:
+                compacted.append(change)
+                continue
+            original = change["diff"]
+            diff = compactor.compact(original)
+            tokens_before += estimate_tokens(original)
+            if not diff:
+                logger.info(
+                    f"Not reviewing {change['new_path']}: binary, minified "
+                    "or whitespace-only change"
+                )
+                metrics.add("files_compacted_away")
+                continue
+            tokens_after += estimate_tokens(diff)
+            if diff != original:
+                change = {**change, "diff": diff, "parsed": ParsedDiff.parse(diff)}
+            compacted.append(change)
+        saved = tokens_before - tokens_after
+        if saved > 0:
+            metrics.add("llm_tokens_saved", saved)
+            logger.info(
+                f"Diff compaction saved about {saved} of {tokens_before} prompt tokens"
+            )
+        return compacted
+
+    def _shared_client(self) -> Any:
+        """Return the client kept open on the client's own event loop."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> Any:
+        """Create an OpenAI client using the transport settings."""
+        # Deferred: importing openai takes longer than most reviews
+        import openai
+
+        if self.transport is None:
+            http_client = openai.DefaultAsyncHttpxClient()
+        else:
+            http_client = self.transport.async_http_client()
+        http_client.event_hooks["response"].append(self._observe_rate_limits)
+        # Retries go through the rate limiter instead of the SDK's own backoff
+        return openai.AsyncOpenAI(
+            api_key=self.api_key, http_client=http_client, max_retries=0
+        )
+
+    async def _observe_rate_limits(self, response: Any) -> None:
+        """Let the rate limiter learn from every API response."""
+        self.rate_limiter.observe(response.status_code, response.headers)
+
+    def _prompt_template(self, change: Dict[str, Any]) -> str:
+        """Return every fixed prompt fragment that shapes a change's review."""
+        return SYSTEM_PROMPT + FINDINGS_INSTRUCTION + self._user_template(change)
+
+    def _user_template(self, change: Dict[str, Any]) -> str:
+        """Return the user prompt template for a change's review depth."""
+        if change.get("review_depth") == SUMMARY_REVIEW:
+            return SUMMARY_PROMPT_TEMPLATE
+        return USER_PROMPT_TEMPLATE
+
+    def _batch_changes(
+        self, code_changes: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Split code changes into groups that are reviewed by one request each."""
+        plan = self.planner.plan(code_changes)
+        self.last_plan = plan
+        logger.info(
+            f"Planned {plan.request_count} LLM requests for {len(code_changes)} "
+            f"changes (~{plan.total_tokens} input tokens)"
+        )
+        return [request.changes for request in plan.requests]
+
+    async def _review_batch(
+        self,
+        client: Any,
+        semaphore: asyncio.Semaphore,
+        batch: List[Dict[str, Any]],
+        emit: Optional[Emit] = None,
+    ) -> Optional[List[ReviewComment]]:
+        """Send a single batch to the API, returning None on failure.
+
+        The request waits for the rate limiter, and throttled, failed or
+        timed out requests are retried with jittered backoff. With emit,
+        the completion is streamed and each comment is emitted once; once a
+        request is hedged, only the winning copy's comments are emitted, as
+        it finishes. While the circuit breaker is open the request fails
+        without being sent.
+
+        Every copy sent reserves estimated tokens, settled against the
+        usage of the answer. Requests the API rejected used none; those
+        that timed out keep their reservation, as the API may have used it.
+        """
+        messages = self._prepare_messages(batch)
+        estimated = self.max_tokens + sum(
+            estimate_tokens(message["content"]) for message in messages
+        )
+        # Comments emitted so far, kept across retries
+        emitted: Dict[Tuple[str, int, str], ReviewComment] = {}
+        async with semaphore:
+            with metrics.span("llm_request", files=len(batch)) as request_span:
+                attempt = 0
+                while True:
+                    if not self.circuit_breaker.allow():
+                        request_span.attributes["error"] = "circuit open"
+                        metrics.add("llm_requests_short_circuited")
+                        return None
+                    wait = self.rate_limiter.reserve(estimated)
+                    copies = 1
+                    if wait > 0:
+                        metrics.add("llm_throttle_seconds", wait)
+                        await asyncio.sleep(wait)
+
+                    hedged = False
+
+                    async def stream(comment: ReviewComment) -> None:
+                        key = (comment.path, comment.line, comment.content)
+                        if emit is not None and not hedged and key not in emitted:
+                            emitted[key] = comment
+                            await emit(comment)
+
+                    def send() -> Awaitable[Any]:
+                        if emit is None:
+                            request: Awaitable[Any] = client.chat.completions.create(
+                                model=self.model,
+                                messages=messages,
+                                temperature=0.7,
+                                max_tokens=self.max_tokens,
+                                response_format={"type": "json_object"},
+                            )
+                            return request
+                        return self._stream_completion(client, messages, batch, stream)
+
+                    streamed = len(emitted)
+
+                    def start_hedge() -> bool:
+                        nonlocal hedged, copies
+                        # A duplicate would repeat comments already passed on,
+                        # and the copies word their findings differently
+                        if len(emitted) != streamed:
+                            return False
+                        if self.rate_limiter.reserve(estimated) > 0:
+                            # No room for a duplicate; give the tokens back
+                            self.rate_limiter.settle(estimated, 0)
+                            return False
+                        hedged = True
+                        copies += 1
+                        return True
+
+                    try:
+                        response = await self._hedged(send, start_hedge)
+                        self.circuit_breaker.record_success()
+                        break
+                    except Exception as e:
+                        if getattr(e, "status_code", None) is not None:
+                            for _ in range(copies):
+                                self.rate_limiter.settle(estimated, 0)
+                        if self._is_upstream_failure(e):
+                            self.circuit_breaker.record_failure()
+                        else:
+                            # The API answered, only not with a completion
+                            self.circuit_breaker.record_success()
+                        if (
+                            not self._is_retryable(e)
+                            or attempt >= self.rate_limiter.max_retries
+                        ):
+                            request_span.attributes["error"] = str(e)
+                            metrics.add("llm_requests_failed")
+                            logger.error(f"Error calling OpenAI API: {str(e)}")
+                            return None
+                        delay = self.rate_limiter.backoff(attempt)
+                        attempt += 1
+                        metrics.add("llm_retries")
+                        logger.warning(
+                            f"OpenAI request failed ({str(e)}), retry "
+                            f"{attempt}/{self.rate_limiter.max_retries} in {delay:.1f}s"
+                        )
+                        await asyncio.sleep(delay)
+                request_span.attributes["attempts"] = attempt + 1
+                used = self._record_usage(response, request_span)
+                if used is not None:
+                    # A cancelled copy was sent the same prompt and used at
+                    # most as many tokens as the answer
+                    for _ in range(copies):
+                        self.rate_limiter.settle(estimated, used)
+        comments = self._parse_response(response, batch)
+        if emit is not None:
+            for idx, comment in enumerate(comments):
+                key = (comment.path, comment.line, comment.content)
+                if key in emitted:
+                    comments[idx] = emitted[key]
+                else:
+                    emitted[key] = comment
+                    await emit(comment)
+            # Comments passed on by a failed attempt were posted all the same
+            kept = set(map(id, comments))
+            comments += [c for c in emitted.values() if id(c) not in kept]
+        return comments
+
+    async def _hedged(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        may_hedge: Callable[[], bool],
+    ) -> Any:
+        """Send a request within the deadline, hedging it if it is slow.
+
+        If no answer has arrived by the latency tracker's hedge delay, the
+        request is sent a second time, unless may_hedge(), called just
+        before and responsible for reserving room for the duplicate, says
+        no. The first successful answer is returned and the other copy is
+        cancelled.
+
+        Args:
+            send: Starts one copy of the request
+            may_hedge: Whether a duplicate may be sent now
+        Returns:
+            The response of the copy that answered first
+        Raises:
+            asyncio.TimeoutError: If no copy answered within request_timeout
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = None
+        if self.request_timeout is not None:
+            deadline = started + self.request_timeout
+        hedge_at = None
+        delay = self.latency.hedge_delay() if self.latency is not None else None
+        if delay is not None:
+            hedge_at = started + delay
+        primary = asyncio.ensure_future(send())
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wake = min(
+                    (t for t in (hedge_at, deadline) if t is not None), default=None
+                )
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if wake is None else max(0.0, wake - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if self.latency is not None:
+                            self.latency.observe(loop.time() - started)
+                        if task is not primary:
+                            metrics.add("llm_hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    # Keep waiting for the other copy, if any
+                    continue
+                now = loop.time()
+                if deadline is not None and now >= deadline:
+                    metrics.add("llm_request_timeouts")
+                    raise asyncio.TimeoutError(
+                        f"No response within {self.request_timeout:.0f}s"
+                    )
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    if not may_hedge():
+                        continue
+                    metrics.add("llm_hedged_requests")
+                    logger.info(
+                        f"OpenAI request unanswered after {now - started:.1f}s, "
+                        "sending a hedged duplicate"
+                    )
+                    pending.add(asyncio.ensure_future(send()))
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _stream_completion(
+        self,
+        client: Any,
+        messages: List[ChatMessage],
+        batch: List[Dict[str, Any]],
+        emit: Emit,
+    ) -> Any:
+        """Stream a completion, emitting each finding once it is complete.
+
+        A finding is complete when its JSON object closes. Models that
+        answer with "### <path>" sections instead have a file's section
+        emitted when the next heading starts. The rest is left to the
+        caller once the stream ends.
+
+        Args:
+            client: OpenAI client
+            messages: Prompt messages
+            batch: Changes reviewed by the request
+            emit: Receives each comment, possibly more than once
+        Returns:
+            Response-like object with the whole content and the usage
+        """
+        stream = await client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=self.max_tokens,
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        if not hasattr(stream, "__aiter__"):
+            # Not streamed after all, e.g. by a proxy
+            return stream
+        content = ""
+        closed = 0
+        usage = None
+        scanner = FindingScanner()
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            for choice in chunk.choices or []:
+                delta = choice.delta.content or ""
+                content += delta
+                found = [
+                    comment
+                    for finding in scanner.feed(delta)
+                    for comment in [self._finding_comment(finding, batch)]
+                    if comment is not None
+                ]
+                if len(batch) > 1 and "\n" in delta:
+                    complete_lines = content[: content.rfind("\n") + 1]
+                    headings = list(_SECTION_HEADING.finditer(complete_lines))
+                    if headings and headings[-1].start() > closed:
+                        closed = headings[-1].start()
+                        found += self._split_sections(content[:closed], batch)
+                for comment in found:
+                    await emit(comment)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message={"content": content})], usage=usage
+        )
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Return whether a failed request may succeed when sent again."""
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+            # Includes the SDK's own timeouts
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+    def _is_upstream_failure(self, error: Exception) -> bool:
+        """Return whether a failed request counts against the API's health.
+
+        Timeouts, connection errors and server errors do; throttling and
+        rejected requests show the API is up.
+        """
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+            return True
+        status = getattr(error, "status_code", None)
+        return isinstance(status, int) and status >= 500
+
+    def _record_usage(self, response: Any, request_span: metrics.Span) -> Optional[int]:
+        """Add the token usage reported by the API to the review metrics.
+
+        Returns:
+            Total tokens used, or None if the API did not report them
+        """
+        usage = getattr(response, "usage", None)
+        total: Optional[int] = None
+        for kind in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, kind, None)
+            if isinstance(tokens, int):
+                request_span.attributes[kind] = tokens
+                metrics.add(f"llm_{kind}", tokens)
+                total = (total or 0) + tokens
+        return total
 
     def _prepare_messages(
         self, code_changes: List[Dict[str, Any]]
@@ -44,15 +832,15 @@ class LLMClient:
         """Prepare messages for the OpenAI API."""
         system_msg: ChatMessage = {
             "role": "system",
-            "content": "You are a helpful code reviewer. Provide concise feedback.",
+            "content": SYSTEM_PROMPT + FINDINGS_INSTRUCTION,
         }
         user_msgs: List[ChatMessage] = []
         for change in code_changes:
-            path = change["new_path"]
-            diff = change["diff"]
             msg: ChatMessage = {
                 "role": "user",
-                "content": f"Review this code change in {path}:\n{diff}",
+                "content": self._user_template(change).format(
+                    path=change["new_path"], diff=change["diff"]
+                ),
             }
             user_msgs.append(msg)
         return [system_msg] + user_msgs
@@ -60,18 +848,131 @@ class LLMClient:
     def _parse_response(
         self, response: Any, code_changes: List[Dict[str, Any]]
     ) -> List[ReviewComment]:
-        """Parse OpenAI API response into ReviewComment objects."""
+        """Parse OpenAI API response into ReviewComment objects.
+
+        The JSON findings of the first choice become one comment each.
+        Output that is not JSON is split into "### <path>" sections, and
+        failing that kept as a single comment on the first file.
+        """
+        if not getattr(response, "choices", None):
+            return []
+        content = self._message_content(response.choices[0])
+        findings = parse_findings(content)
+        if findings is None:
+            return self._parse_multi_file_content(content, code_changes)
         comments: List[ReviewComment] = []
-        if not hasattr(response, "choices"):
-            return comments
+        for finding in findings:
+            comment = self._finding_comment(finding, code_changes)
+            if comment is not None:
+                comments.append(comment)
+        return comments
 
-        for idx, choice in enumerate(response.choices):
-            if idx < len(code_changes):
+    def _finding_comment(
+        self, finding: Dict[str, Any], code_changes: List[Dict[str, Any]]
+    ) -> Optional[ReviewComment]:
+        """Turn one JSON finding into a comment on a reviewed file.
+
+        Paths are matched loosely, and a line the file's diff does not add
+        is replaced by the line a comment on the reviewed piece goes to by
+        default. Comments are posted with a new line only, which GitLab
+        rejects for unchanged context lines.
+
+        Returns:
+            Comment, or None if the finding is empty or names no reviewed
+            file
+        """
+        text = str(finding.get("comment") or finding.get("message") or "").strip()
+        change = self._finding_change(str(finding.get("path") or ""), code_changes)
+        if not text or change is None:
+            return None
+        line = finding.get("line")
+        parsed = change.get("parsed") or ParsedDiff.parse(change["diff"])
+        if isinstance(line, str) and line.strip().isdigit():
+            line = int(line)
+        if not isinstance(line, int) or line not in parsed.added_new_lines():
+            line = self._comment_line({**change, "parsed": parsed})
+        severity = normalize_severity(finding.get("severity"))
+        return ReviewComment(
+            path=change["new_path"],
+            line=line,
+            content=f"**{severity.capitalize()}:** {text}",
+        )
+
+    def _finding_change(
+        self, path: str, code_changes: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Find the reviewed change a finding's path refers to.
+
+        The path may be quoted or carry a diff "a/" or "b/" prefix. A
+        request reviewing a single file gets every finding.
+        """
+        path = path.strip("`*\"' ")
+        for candidate in (path, path[2:] if path[:2] in ("a/", "b/") else None):
+            for change in code_changes:
+                if change["new_path"] == candidate:
+                    return change
+        if len(code_changes) == 1:
+            return code_changes[0]
+        return None
+
+    def _message_content(self, choice: Any) -> str:
+        """Return the text of a choice's message, given as an object or dict."""
+        message = choice.message
+        if isinstance(message, dict):
+            return str(message.get("content") or "")
+        return str(message.content or "")
+
+    def _comment_line(self, change: Dict[str, Any]) -> int:
+        """Pick the new-file line a comment on a change should be placed on.
+
+        For split diffs, this is the first line added in the piece that was
+        reviewed rather than the first line of the whole file.
+        """
+        parsed = change.get("parsed")
+        if parsed is not None:
+            line = parsed.first_added_line(
+                change.get("diff_offset", 0), change.get("diff_end")
+            )
+            if line is not None:
+                return int(line)
+        return int(change["line"])
+
+    def _parse_multi_file_content(
+        self, content: str, code_changes: List[Dict[str, Any]]
+    ) -> List[ReviewComment]:
+        """Split feedback for a packed request into one comment per file."""
+        comments = []
+        if len(code_changes) > 1:
+            comments = self._split_sections(content, code_changes)
+        if not comments and content.strip():
+            # The model ignored the format, keep the feedback on the first file
+            comments.append(
+                ReviewComment(
+                    path=code_changes[0]["new_path"],
+                    line=self._comment_line(code_changes[0]),
+                    content=content.strip(),
+                )
+            )
+        return comments
+
+    def _split_sections(
+        self, content: str, code_changes: List[Dict[str, Any]]
+    ) -> List[ReviewComment]:
+        """Turn the "### <path>" sections of feedback into comments."""
+        changes_by_path: Dict[str, Dict[str, Any]] = {}
+        for code_change in code_changes:
+            changes_by_path.setdefault(code_change["new_path"], code_change)
+
+        sections = _SECTION_HEADING.split(content)
+        comments: List[ReviewComment] = []
+        for heading, body in zip(sections[1::2], sections[2::2]):
+            change = changes_by_path.get(heading.strip("`*"))
+            if change is not None and body.strip():
                 comments.append(
                     ReviewComment(
-                        path=code_changes[idx]["new_path"],
-                        line=code_changes[idx]["line"],
-                        content=choice.message["content"].strip(),
+                        path=change["new_path"],
+                        line=self._comment_line(change),
+                        content=body.strip(),
                     )
                 )
         return comments
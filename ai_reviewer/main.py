@@ -1,19 +1,72 @@
+import importlib
 import os
 import sys
+import time
+from typing import TYPE_CHECKING, List, Optional
 
-from .llm_client import LLMClient
-from .gitlab_reviewer import GitLabReviewer
-from .review_strategies import StandardReviewStrategy, SecurityReviewStrategy
+if TYPE_CHECKING:
+    from .gitlab_reviewer import GitLabReviewer
 
+# Imported on first use so that configuration errors and --startup-profile
+# do not pay for them; listed here for the startup profile
+HEAVY_MODULES = (
+    "gitlab",
+    "openai",
+    "yaml",
+    "ai_reviewer.gitlab_reviewer",
+    "ai_reviewer.llm_client",
+)
+
+
+def _env_flag(name: str) -> bool:
+    """Return whether a boolean environment variable is enabled."""
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def _env_number(name: str) -> Optional[float]:
+    """Return a numeric environment variable, or None if it is not set."""
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main entry point for the GitLab AI reviewer.
+
+    Args:
+        argv: Command line arguments; defaults to sys.argv[1:]. Pass "serve"
+            to run the webhook server, or "batch" followed by batch options
+            to review every open MR of projects and groups, instead of
+            reviewing a single MR.
+    """
+    args = sys.argv[1:] if argv is None else argv
+
+    if "--startup-profile" in args:
+        print(startup_profile())
+        return
 
-def main() -> None:
-    """Main entry point for the GitLab AI reviewer."""
     # Check for required environment variables
     openai_key = os.getenv("OPENAI_API_KEY")
     if not openai_key:
         print("Error: OPENAI_API_KEY environment variable must be set")
         sys.exit(1)
 
+    if args[:1] == ["serve"]:
+        serve(build_reviewer(openai_key))
+        return
+
+    if args[:1] == ["batch"]:
+        from .batch import parse_args, run_batch
+
+        options = parse_args(args[1:])
+        # The state store lets batch runs skip MRs whose head was reviewed
+        # and review only what changed on the others
+        summary = run_batch(build_reviewer(openai_key, incremental=True), options)
+        if summary.interrupted:
+            sys.exit(130)
+        if summary.failed:
+            sys.exit(1)
+        return
+
     # Get GitLab CI/CD environment variables
     project_id = os.getenv("CI_PROJECT_ID")  # GitLab CI provides this
     mr_iid = os.getenv("CI_MERGE_REQUEST_IID")  # GitLab CI provides this
@@ -32,14 +85,189 @@ def main() -> None:
             print("- CI_MERGE_REQUEST_IID or GITLAB_MR_IID must be set")
         sys.exit(1)
 
-    # Initialize components
-    llm_client = LLMClient(api_key=openai_key)
-    strategies = [StandardReviewStrategy(llm_client), SecurityReviewStrategy()]
-    reviewer = GitLabReviewer(strategies)
-
     # Review the merge request
+    reviewer = build_reviewer(openai_key)
     reviewer.process_merge_request(int(project_id), int(mr_iid))
 
 
+def build_reviewer(
+    openai_key: str, incremental: Optional[bool] = None
+) -> "GitLabReviewer":
+    """Create the reviewer and its components from environment variables.
+
+    Args:
+        openai_key: OpenAI API key
+        incremental: Track reviewed commits in an MR note; defaults to
+            AI_REVIEWER_INCREMENTAL
+    Returns:
+        Authenticated GitLab reviewer
+    """
+    from .diff_compactor import DEFAULT_CONTEXT_LINES, DiffCompactor
+    from .gitlab_reviewer import GitLabReviewer
+    from .http_transport import TransportConfig
+    from .llm_client import LLMClient
+    from .rate_limit import LLMRateLimiter
+    from .resilience import CircuitBreaker, LatencyTracker
+    from .metrics import MetricsExporter
+    from .review_cache import ReviewCache
+    from .review_config import CONFIG_FILE, load_review_config
+    from .review_state import ReviewStateStore
+    from .review_strategies import SecurityReviewStrategy, StandardReviewStrategy
+    from .risk_scoring import RiskScorer
+    from .strategy_runner import StrategyRunner
+
+    max_concurrency = int(os.getenv("AI_REVIEWER_LLM_CONCURRENCY", "4"))
+    max_input_tokens = int(os.getenv("AI_REVIEWER_REQUEST_TOKEN_BUDGET", "3000"))
+    cache = None
+    cache_dir = os.getenv("AI_REVIEWER_CACHE_DIR")
+    if cache_dir:
+        max_mb = int(os.getenv("AI_REVIEWER_CACHE_MAX_MB", "100"))
+        max_age_days = float(os.getenv("AI_REVIEWER_CACHE_MAX_AGE_DAYS", "30"))
+        cache = ReviewCache(
+            cache_dir,
+            max_bytes=max_mb * 1024 * 1024,
+            max_age_seconds=max_age_days * 24 * 60 * 60,
+        )
+    cache_scope = os.getenv("AI_REVIEWER_CACHE_SCOPE", "project").lower()
+    compactor = None
+    if os.getenv("AI_REVIEWER_COMPACT_DIFFS", "true").lower() not in (
+        "0",
+        "false",
+        "no",
+    ):
+        compactor = DiffCompactor(
+            context_lines=int(
+                os.getenv("AI_REVIEWER_CONTEXT_LINES", str(DEFAULT_CONTEXT_LINES))
+            )
+        )
+    request_timeout = float(os.getenv("AI_REVIEWER_LLM_REQUEST_TIMEOUT", "120"))
+    hedge_percentile = float(os.getenv("AI_REVIEWER_LLM_HEDGE_PERCENTILE", "95"))
+    # Both clients pool connections with the same settings
+    transport = TransportConfig.from_env()
+    llm_client = LLMClient(
+        api_key=openai_key,
+        max_concurrency=max_concurrency,
+        max_input_tokens=max_input_tokens,
+        cache=cache,
+        transport=transport,
+        rate_limiter=LLMRateLimiter(
+            requests_per_minute=_env_number("AI_REVIEWER_LLM_RPM"),
+            tokens_per_minute=_env_number("AI_REVIEWER_LLM_TPM"),
+            state_path=os.getenv("AI_REVIEWER_LLM_RATE_STATE") or None,
+        ),
+        compactor=compactor,
+        share_across_projects=cache_scope == "global",
+        request_timeout=request_timeout if request_timeout > 0 else None,
+        latency=LatencyTracker(hedge_percentile) if hedge_percentile > 0 else None,
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("AI_REVIEWER_LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("AI_REVIEWER_LLM_BREAKER_RESET", "60")),
+        ),
+    )
+    rule_files = [
+        path
+        for path in os.getenv("AI_REVIEWER_SECURITY_RULES", "").split(os.pathsep)
+        if path
+    ]
+    try:
+        review_config = load_review_config(os.getenv("AI_REVIEWER_CONFIG", CONFIG_FILE))
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    available = {
+        "standard": lambda: StandardReviewStrategy(llm_client),
+        "security": lambda: SecurityReviewStrategy(rule_files=rule_files),
+    }
+    strategies = [available[name]() for name in review_config.review_strategies]
+    risk_scorer = None
+    if _env_flag("AI_REVIEWER_RISK_TRIAGE"):
+        # Hits of the configured security rules make a file riskier
+        risk_scorer = RiskScorer(SecurityReviewStrategy(rule_files=rule_files).scanner)
+    llm_token_budget = _env_number("AI_REVIEWER_LLM_TOKEN_BUDGET")
+    if incremental is None:
+        incremental = _env_flag("AI_REVIEWER_INCREMENTAL")
+    state_store = None
+    if incremental:
+        state_store = ReviewStateStore()
+    max_post_workers = int(os.getenv("AI_REVIEWER_POST_CONCURRENCY", "4"))
+    metrics_exporter = None
+    json_lines_path = os.getenv("AI_REVIEWER_METRICS_JSONL")
+    prometheus_path = os.getenv("AI_REVIEWER_METRICS_PROMETHEUS")
+    log_summary = _env_flag("AI_REVIEWER_METRICS_SUMMARY")
+    if json_lines_path or prometheus_path or log_summary:
+        metrics_exporter = MetricsExporter(
+            json_lines_path=json_lines_path,
+            prometheus_path=prometheus_path,
+            log_summary=log_summary,
+        )
+    return GitLabReviewer(
+        strategies,
+        state_store=state_store,
+        max_post_workers=max_post_workers,
+        resolve_outdated=_env_flag("AI_REVIEWER_RESOLVE_OUTDATED"),
+        strategy_runner=StrategyRunner(
+            timeout=float(os.getenv("AI_REVIEWER_STRATEGY_TIMEOUT", "600")),
+            process_workers=int(
+                os.getenv(
+                    "AI_REVIEWER_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))
+                )
+            ),
+        ),
+        metrics_exporter=metrics_exporter,
+        diff_page_size=int(os.getenv("AI_REVIEWER_DIFF_PAGE_SIZE", "50")),
+        transport=transport,
+        review_config=review_config,
+        risk_scorer=risk_scorer,
+        llm_token_budget=int(llm_token_budget) if llm_token_budget else None,
+    )
+
+
+def serve(reviewer: "GitLabReviewer") -> None:
+    """Run the webhook server until interrupted.
+
+    Args:
+        reviewer: Reviewer shared by all workers
+    """
+    from .server import DEFAULT_WORKERS, ReviewServer
+
+    server = ReviewServer(
+        reviewer,
+        host=os.getenv("AI_REVIEWER_SERVER_HOST", "0.0.0.0"),
+        port=int(os.getenv("AI_REVIEWER_SERVER_PORT", "8080")),
+        workers=int(os.getenv("AI_REVIEWER_WORKERS", str(DEFAULT_WORKERS))),
+        secret=os.getenv("AI_REVIEWER_WEBHOOK_SECRET"),
+    )
+    server.serve_forever()
+
+
+def startup_profile() -> str:
+    """Time the imports that the first review pays for.
+
+    Each module is imported in the order of HEAVY_MODULES, so a time
+    includes the dependencies that no earlier module imported.
+
+    Returns:
+        Report with one line per module, in milliseconds
+    """
+    package = sys.modules.get("ai_reviewer")
+    started = getattr(package, "_import_started", None)
+    lines = ["Startup profile (ms):"]
+    if started is not None:
+        elapsed = (time.perf_counter() - started) * 1000
+        lines.append(f"  {'ai_reviewer to main()':<30} {elapsed:8.1f}")
+    total = 0.0
+    for name in HEAVY_MODULES:
+        if name in sys.modules:
+            lines.append(f"  {name:<30} {'loaded':>8}")
+            continue
+        before = time.perf_counter()
+        importlib.import_module(name)
+        elapsed = (time.perf_counter() - before) * 1000
+        total += elapsed
+        lines.append(f"  {name:<30} {elapsed:8.1f}")
+    lines.append(f"  {'deferred imports':<30} {total:8.1f}")
+    return "\n".join(lines)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,312 @@
+"""Per-review timing and token metrics with JSON lines and Prometheus export."""
+
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _format_number(value: float) -> str:
+    """Format a counter exactly; "%g" would round it to six digits."""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+@dataclass
+class Span:
+    """A timed section of a review."""
+
+    name: str
+    start: float
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class ReviewMetrics:
+    """Spans and counters collected while reviewing one merge request.
+
+    Spans and counters may be recorded from several threads at once.
+    """
+
+    def __init__(self, **labels: Any) -> None:
+        """Create an empty collection.
+
+        Args:
+            labels: Attributes identifying the review, e.g. project_id
+        """
+        self.labels = labels
+        self.started = time.time()
+        self._monotonic_start = time.monotonic()
+        self._monotonic_end: Optional[float] = None
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        """Seconds the review took, or has taken so far."""
+        end = self._monotonic_end
+        return (end if end is not None else time.monotonic()) - self._monotonic_start
+
+    def finish(self) -> None:
+        """Stop the review's clock."""
+        self._monotonic_end = time.monotonic()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block.
+
+        Attributes may be added to the yielded span inside the block.
+
+        Args:
+            name: Phase name, e.g. "llm_request"
+            attributes: Details of this occurrence, e.g. the file path
+        Yields:
+            The span being timed
+        """
+        span = Span(name=name, start=time.time(), attributes=attributes)
+        started = time.monotonic()
+        try:
+            yield span
+        finally:
+            span.duration = time.monotonic() - started
+            with self._lock:
+                self.spans.append(span)
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Increase a counter, e.g. the number of prompt tokens."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def phases(self) -> Dict[str, Tuple[int, float]]:
+        """Return the number of spans and their total seconds per name."""
+        totals: Dict[str, Tuple[int, float]] = {}
+        with self._lock:
+            for span in self.spans:
+                count, seconds = totals.get(span.name, (0, 0.0))
+                totals[span.name] = (count + 1, seconds + span.duration)
+        return totals
+
+
+_current: contextvars.ContextVar[Optional[ReviewMetrics]] = contextvars.ContextVar(
+    "ai_reviewer_metrics", default=None
+)
+
+
+@contextmanager
+def collect(**labels: Any) -> Iterator[ReviewMetrics]:
+    """Collect the metrics recorded by the enclosed block.
+
+    Args:
+        labels: Attributes identifying the review
+    Yields:
+        Metrics of the review, complete once the block exits
+    """
+    metrics = ReviewMetrics(**labels)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as part of the current review.
+
+    Outside of collect() the block still runs, but nothing is recorded.
+
+    Args:
+        name: Phase name
+        attributes: Details of this occurrence
+    Yields:
+        The span being timed
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield Span(name=name, start=time.time(), attributes=attributes)
+        return
+    with metrics.span(name, **attributes) as current:
+        yield current
+
+
+def add(name: str, value: float = 1) -> None:
+    """Increase a counter of the current review, if any."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(name, value)
+
+
+def bind(func: Callable[..., T]) -> Callable[..., T]:
+    """Make func record into the caller's review when run in another thread.
+
+    Thread pools do not inherit context variables, so work submitted to
+    them is wrapped with bind() by the submitting thread.
+
+    Args:
+        func: Function to run in a worker thread
+    Returns:
+        Function running func in a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        # Each call gets its own copy so the function can run concurrently
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
+
+
+def _prometheus_labels(labels: Dict[str, Any]) -> str:
+    """Format a Prometheus label set."""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsExporter:
+    """Writes the metrics of finished reviews to the configured outputs."""
+
+    def __init__(
+        self,
+        json_lines_path: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+        log_summary: bool = False,
+    ) -> None:
+        """Initialize the exporter.
+
+        Args:
+            json_lines_path: File to append one JSON object per span and one
+                per review to
+            prometheus_path: Prometheus textfile collector file, rewritten
+                after every review with totals since the process started
+            log_summary: Log a one-line summary of every review
+        """
+        self.json_lines_path = json_lines_path
+        self.prometheus_path = prometheus_path
+        self.log_summary = log_summary
+        self._lock = threading.Lock()
+        self._reviews = 0
+        self._review_seconds = 0.0
+        self._phases: Dict[str, Tuple[int, float]] = {}
+        self._counters: Dict[str, float] = {}
+
+    def export(self, metrics: ReviewMetrics) -> None:
+        """Write the metrics of a finished review.
+
+        Export failures are logged and never fail the review.
+
+        Args:
+            metrics: Metrics collected for the review
+        """
+        with self._lock:
+            self._accumulate(metrics)
+            try:
+                if self.json_lines_path:
+                    self._write_json_lines(metrics)
+                if self.prometheus_path:
+                    self._write_prometheus()
+            except OSError as e:
+                logger.error(f"Failed to write review metrics: {str(e)}")
+        if self.log_summary:
+            logger.info(self.summary(metrics))
+
+    def summary(self, metrics: ReviewMetrics) -> str:
+        """Format a review's metrics as a single log line."""
+        parts = [f"total={metrics.duration:.2f}s"]
+        for name, (count, seconds) in metrics.phases().items():
+            calls = f"({count})" if count > 1 else ""
+            parts.append(f"{name}={seconds:.2f}s{calls}")
+        for name, value in sorted(metrics.counters.items()):
+            parts.append(f"{name}={_format_number(value)}")
+        return "Review metrics: " + " ".join(parts)
+
+    def _accumulate(self, metrics: ReviewMetrics) -> None:
+        """Add a review to the process-wide totals."""
+        self._reviews += 1
+        self._review_seconds += metrics.duration
+        for name, (count, seconds) in metrics.phases().items():
+            total_count, total_seconds = self._phases.get(name, (0, 0.0))
+            self._phases[name] = (total_count + count, total_seconds + seconds)
+        for name, value in metrics.counters.items():
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _write_json_lines(self, metrics: ReviewMetrics) -> None:
+        """Append the review's spans and totals as JSON lines."""
+        assert self.json_lines_path is not None
+        lines = [
+            {
+                "type": "span",
+                "name": span.name,
+                "start": span.start,
+                "duration": span.duration,
+                **metrics.labels,
+                **span.attributes,
+            }
+            for span in metrics.spans
+        ]
+        lines.append(
+            {
+                "type": "review",
+                "start": metrics.started,
+                "duration": metrics.duration,
+                **metrics.labels,
+                **metrics.counters,
+            }
+        )
+        with open(self.json_lines_path, "a") as f:
+            for line in lines:
+                f.write(json.dumps(line, default=str) + "\n")
+
+    def _write_prometheus(self) -> None:
+        """Atomically rewrite the Prometheus textfile with current totals."""
+        assert self.prometheus_path is not None
+        out = [
+            "# HELP ai_reviewer_reviews_total Merge requests reviewed",
+            "# TYPE ai_reviewer_reviews_total counter",
+            f"ai_reviewer_reviews_total {self._reviews}",
+            "# HELP ai_reviewer_review_seconds_total Time spent reviewing",
+            "# TYPE ai_reviewer_review_seconds_total counter",
+            f"ai_reviewer_review_seconds_total {self._review_seconds:.6f}",
+            "# HELP ai_reviewer_phase_seconds_total Time spent in each phase",
+            "# TYPE ai_reviewer_phase_seconds_total counter",
+        ]
+        for name, (_, seconds) in sorted(self._phases.items()):
+            labels = _prometheus_labels({"phase": name})
+            out.append(f"ai_reviewer_phase_seconds_total{labels} {seconds:.6f}")
+        out += [
+            "# HELP ai_reviewer_phase_calls_total Times each phase ran",
+            "# TYPE ai_reviewer_phase_calls_total counter",
+        ]
+        for name, (count, _) in sorted(self._phases.items()):
+            labels = _prometheus_labels({"phase": name})
+            out.append(f"ai_reviewer_phase_calls_total{labels} {count}")
+        for name, value in sorted(self._counters.items()):
+            metric = f"ai_reviewer_{name}_total"
+            out += [f"# TYPE {metric} counter", f"{metric} {_format_number(value)}"]
+
+        directory = os.path.dirname(os.path.abspath(self.prometheus_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("\n".join(out) + "\n")
+            os.replace(tmp_path, self.prometheus_path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
@@ -0,0 +1,385 @@
+"""Shared retry, backoff and rate limiting for GitLab and LLM API calls."""
+
+import email.utils
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_retry_after(value: str, now: float) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or as an HTTP date.
+
+    Args:
+        value: Header value
+        now: Current time as a UNIX timestamp
+    Returns:
+        Seconds to wait, or None if the value cannot be parsed
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class GitLabRateLimiter:
+    """Rate limit state shared by every thread talking to one GitLab instance.
+
+    observe() is installed as a requests response hook, so every response
+    updates the shared state. Workers call call() which waits while GitLab
+    has asked clients to slow down and retries throttled or transient
+    failures with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            max_retries: Retries after the first attempt before giving up
+            base_delay: Backoff delay for the first retry, in seconds
+            max_delay: Upper bound for any single wait, in seconds
+            sleep: Function used to wait, replaceable in tests
+            clock: Function returning the current UNIX time
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+    def observe(self, response: Any, *args: Any, **kwargs: Any) -> Any:
+        """Record rate limit headers from a GitLab response.
+
+        Args:
+            response: requests.Response returned by GitLab
+        Returns:
+            The response unchanged, as required for requests hooks
+        """
+        headers = response.headers
+        now = self._clock()
+        resume_at: Optional[float] = None
+
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and response.status_code == 429:
+            delay = parse_retry_after(retry_after, now)
+            if delay is not None:
+                resume_at = now + delay
+
+        if resume_at is None and headers.get("RateLimit-Remaining") == "0":
+            reset = headers.get("RateLimit-Reset")
+            if reset is not None and reset.isdigit():
+                resume_at = float(reset)
+
+        if resume_at is not None:
+            with self._lock:
+                self._blocked_until = max(
+                    self._blocked_until, min(resume_at, now + self.max_delay)
+                )
+        return response
+
+    def wait(self) -> None:
+        """Block until GitLab's rate limit window allows new requests."""
+        with self._lock:
+            delay = self._blocked_until - self._clock()
+        if delay > 0:
+            logger.info(f"GitLab rate limit reached, waiting {delay:.1f}s")
+            self._sleep(delay)
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call func, retrying rate limited and transient server errors.
+
+        Args:
+            func: Function performing a GitLab API call
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+        Returns:
+            Result of func
+        Raises:
+            The last exception if the call still fails after all retries, or
+            immediately for errors that are not worth retrying
+        """
+        attempt = 0
+        while True:
+            self.wait()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                code = getattr(e, "response_code", None)
+                if code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise
+                backoff = min(self.max_delay, self.base_delay * 2**attempt)
+                delay = random.uniform(backoff / 2, backoff)
+                with self._lock:
+                    delay = max(delay, self._blocked_until - self._clock())
+                attempt += 1
+                logger.warning(
+                    f"GitLab returned {code}, retry {attempt}/{self.max_retries} "
+                    f"in {delay:.1f}s"
+                )
+                self._sleep(delay)
+
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """Parse an OpenAI x-ratelimit-reset-* header such as "1m30s" or "20ms".
+
+    Args:
+        value: Header value
+    Returns:
+        Seconds until the limit resets, or None if the value cannot be parsed
+    """
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value.strip():
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+@dataclass
+class TokenBucket:
+    """A token bucket; capacity None means the limit is not known yet."""
+
+    capacity: Optional[float] = None
+    balance: float = 0.0
+    updated: float = 0.0
+
+    def refill(self, now: float) -> None:
+        """Add what has refilled since the last update, up to capacity."""
+        if self.capacity is not None:
+            rate = self.capacity / 60
+            self.balance = min(
+                self.capacity, self.balance + (now - self.updated) * rate
+            )
+        self.updated = now
+
+    def take(self, amount: float) -> float:
+        """Take amount, possibly going into debt.
+
+        Returns:
+            Seconds until the debt is repaid, when the reservation may be used
+        """
+        if self.capacity is None or self.capacity <= 0:
+            return 0.0
+        self.balance -= amount
+        return max(0.0, -self.balance / (self.capacity / 60))
+
+
+class LLMRateLimiter:
+    """Client-side request and token limits for an OpenAI-compatible API.
+
+    Two per-minute token buckets, one for requests and one for tokens,
+    start from the configured limits and are corrected by the
+    x-ratelimit-* headers of every response, so they converge on the
+    account's real limits. reserve() never refuses: it takes from both
+    buckets, going into debt if needed, and returns how long the caller
+    must wait, which queues concurrent callers in reservation order.
+
+    One limiter may be shared by many threads. With state_path set, the
+    buckets live in that file under an exclusive lock, so every process
+    on the machine using the same file shares them.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        state_path: Optional[str] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request limit to start with; None until the
+                API reports one
+            tokens_per_minute: Token limit to start with; None until the API
+                reports one
+            state_path: File holding state shared with other processes
+            max_retries: Retries of a throttled or failed request
+            base_delay: Backoff delay for the first retry, in seconds
+            max_delay: Upper bound for any single wait, in seconds
+            clock: Function returning the current UNIX time
+        """
+        self.state_path = state_path
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self._buckets = {
+            "requests": TokenBucket(
+                requests_per_minute, requests_per_minute or 0.0, now
+            ),
+            "tokens": TokenBucket(tokens_per_minute, tokens_per_minute or 0.0, now),
+        }
+        self._blocked_until = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request of an estimated size.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._state() as now:
+            delay = max(
+                self._buckets["requests"].take(1),
+                self._buckets["tokens"].take(tokens),
+                self._blocked_until - now,
+            )
+        return min(delay, self.max_delay)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Return the tokens a request reserved but did not use.
+
+        Args:
+            reserved: Tokens passed to reserve()
+            used: Tokens the API reported for the request
+        """
+        if used >= reserved:
+            return
+        with self._state():
+            bucket = self._buckets["tokens"]
+            if bucket.capacity is not None:
+                bucket.balance = min(bucket.capacity, bucket.balance + reserved - used)
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> None:
+        """Learn the limits and remaining budget from a response.
+
+        Args:
+            status: HTTP status code
+            headers: Response headers
+        """
+        with self._state() as now:
+            for kind, bucket in self._buckets.items():
+                limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+                if limit is not None and limit > 0:
+                    if bucket.capacity is None:
+                        bucket.balance = limit
+                    bucket.capacity = limit
+                remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+                if remaining is not None and bucket.capacity is not None:
+                    # Requests reserved but not sent yet are not in the
+                    # server's count, so only ever lower the balance
+                    bucket.balance = min(bucket.balance, remaining)
+                    if remaining <= 0:
+                        reset = parse_reset_duration(
+                            headers.get(f"x-ratelimit-reset-{kind}", "")
+                        )
+                        if reset is not None:
+                            self._block(now + reset, now)
+            retry_after = headers.get("retry-after")
+            if status == 429 and retry_after is not None:
+                delay = parse_retry_after(retry_after, now)
+                if delay is not None:
+                    self._block(now + delay, now)
+
+    def backoff(self, attempt: int) -> float:
+        """Return the jittered delay before retry number attempt + 1.
+
+        Never shorter than a wait the API asked for.
+        """
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        delay = random.uniform(backoff / 2, backoff)
+        with self._state() as now:
+            return min(self.max_delay, max(delay, self._blocked_until - now))
+
+    def _block(self, until: float, now: float) -> None:
+        """Hold all requests until a time, capped at max_delay from now."""
+        self._blocked_until = max(self._blocked_until, min(until, now + self.max_delay))
+
+    @contextmanager
+    def _state(self) -> Iterator[float]:
+        """Lock and refill the buckets, loading and saving shared state.
+
+        Yields:
+            The current time
+        """
+        with self._lock:
+            if self.state_path is None:
+                now = self._clock()
+                for bucket in self._buckets.values():
+                    bucket.refill(now)
+                yield now
+                return
+
+            import fcntl
+
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "r+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                self._load(f.read())
+                now = self._clock()
+                for bucket in self._buckets.values():
+                    bucket.refill(now)
+                yield now
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(self._dump()))
+                f.flush()
+
+    def _load(self, text: str) -> None:
+        """Replace the local state with state saved by any process."""
+        try:
+            data = json.loads(text)
+            buckets = {
+                kind: TokenBucket(**data["buckets"][kind]) for kind in self._buckets
+            }
+            blocked_until = float(data["blocked_until"])
+        except (ValueError, KeyError, TypeError):
+            # New or damaged file: keep what this process knows
+            return
+        for kind, bucket in buckets.items():
+            if bucket.capacity is None:
+                # Keep limits configured here until some process learns them
+                bucket.capacity = self._buckets[kind].capacity
+        self._buckets = buckets
+        self._blocked_until = blocked_until
+
+    def _dump(self) -> Dict[str, Any]:
+        """Serialize the state for other processes."""
+        return {
+            "buckets": {kind: asdict(b) for kind, b in self._buckets.items()},
+            "blocked_until": self._blocked_until,
+        }
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Read a numeric header, or None if it is missing or malformed."""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,223 @@
+"""Token-budgeted planning of LLM review requests."""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .diff_parser import _HUNK_HEADER
+
+DEFAULT_INPUT_TOKEN_BUDGET = 3000
+DEFAULT_USER_TEMPLATE = "Review this code change in {path}:\n{diff}"
+
+# Fixed cost the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of BPE tokens in text without calling any API.
+
+    Words and punctuation each count as at least one token, and long
+    identifiers are charged roughly one token per four characters.
+
+    Args:
+        text: Text to estimate
+    Returns:
+        Estimated token count
+    """
+    return sum(
+        max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PIECE.findall(text)
+    )
+
+
+@dataclass
+class PlannedRequest:
+    """A group of changes that will be sent in one LLM request."""
+
+    changes: List[Dict[str, Any]] = field(default_factory=list)
+    estimated_tokens: int = 0
+
+
+@dataclass
+class RequestPlan:
+    """All requests needed to review one merge request."""
+
+    requests: List[PlannedRequest] = field(default_factory=list)
+
+    @property
+    def request_count(self) -> int:
+        """Number of LLM requests in the plan."""
+        return len(self.requests)
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated input tokens across all requests."""
+        return sum(request.estimated_tokens for request in self.requests)
+
+
+class RequestPlanner:
+    """Packs diffs into requests that fill a fixed input token budget."""
+
+    def __init__(
+        self,
+        prompt_tokens: int,
+        max_input_tokens: int = DEFAULT_INPUT_TOKEN_BUDGET,
+        user_template: Optional[Callable[[Dict[str, Any]], str]] = None,
+    ) -> None:
+        """Initialize the planner.
+
+        Args:
+            prompt_tokens: Tokens used by the fixed prompt of every request
+            max_input_tokens: Input token budget for a single request
+            user_template: Returns the user message template, with {path}
+                and {diff} fields, a change is sent with; defaults to
+                DEFAULT_USER_TEMPLATE for every change
+        """
+        if max_input_tokens <= prompt_tokens + MESSAGE_OVERHEAD_TOKENS:
+            raise ValueError("max_input_tokens must leave room for a diff")
+        self.prompt_tokens = prompt_tokens
+        self.max_input_tokens = max_input_tokens
+        self.user_template = user_template or (lambda change: DEFAULT_USER_TEMPLATE)
+
+    def plan(self, code_changes: List[Dict[str, Any]]) -> RequestPlan:
+        """Group code changes into requests, preserving their order.
+
+        Changes are packed into the current request until the next one does
+        not fit. Changes that do not fit in an empty request are split at hunk
+        boundaries, or at line boundaries for oversized hunks.
+
+        Args:
+            code_changes: List of code changes to review
+        Returns:
+            Plan describing every request to send
+        """
+        plan = RequestPlan()
+        current = PlannedRequest(estimated_tokens=self.prompt_tokens)
+
+        for change in code_changes:
+            for piece in self._split_change(change):
+                cost = self._change_tokens(piece)
+                if (
+                    current.changes
+                    and current.estimated_tokens + cost > self.max_input_tokens
+                ):
+                    plan.requests.append(current)
+                    current = PlannedRequest(estimated_tokens=self.prompt_tokens)
+                current.changes.append(piece)
+                current.estimated_tokens += cost
+
+        if current.changes:
+            plan.requests.append(current)
+        return plan
+
+    def _change_tokens(self, change: Dict[str, Any]) -> int:
+        """Estimate the tokens of the user message for a change."""
+        message = self.user_template(change).format(
+            path=change["new_path"], diff=change["diff"]
+        )
+        return estimate_tokens(message) + MESSAGE_OVERHEAD_TOKENS
+
+    def _split_change(self, change: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split a change into pieces that each fit in an empty request."""
+        budget = self.max_input_tokens - self.prompt_tokens
+        if self._change_tokens(change) <= budget:
+            return [change]
+
+        diff_budget = budget - self._change_tokens({**change, "diff": ""})
+        base = change.get("diff_offset", 0)
+        pieces: List[Dict[str, Any]] = []
+        current: List[Tuple[str, int, int]] = []
+        for block in self._split_diff(change["diff"], diff_budget):
+            text = "".join(b[0] for b in current) + block[0]
+            if current and estimate_tokens(text) > diff_budget:
+                pieces.append(self._make_piece(change, current, base))
+                current = []
+            current.append(block)
+        if current:
+            pieces.append(self._make_piece(change, current, base))
+        return pieces
+
+    def _make_piece(
+        self,
+        change: Dict[str, Any],
+        blocks: List[Tuple[str, int, int]],
+        base: int,
+    ) -> Dict[str, Any]:
+        """Join diff blocks into a change covering their original lines.
+
+        diff_offset and diff_end give the range of lines of the original
+        diff that the piece covers, so comments can be mapped back to it.
+        """
+        return {
+            **change,
+            "diff": "".join(block[0] for block in blocks),
+            "diff_offset": base + blocks[0][1],
+            "diff_end": base + blocks[-1][2],
+        }
+
+    def _split_diff(self, diff: str, diff_budget: int) -> List[Tuple[str, int, int]]:
+        """Split a diff into hunks, breaking oversized hunks by lines.
+
+        Returns:
+            Tuples of block text and the range of original diff lines it
+            covers; each block of a split hunk gets a header of its own
+        """
+        lines = diff.splitlines(keepends=True)
+        starts = [i for i, line in enumerate(lines) if line.startswith("@@ ")]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+
+        blocks: List[Tuple[str, int, int]] = []
+        for start, end in zip(starts, starts[1:] + [len(lines)]):
+            hunk = "".join(lines[start:end])
+            if estimate_tokens(hunk) <= diff_budget:
+                blocks.append((hunk, start, end))
+                continue
+            header = _HUNK_HEADER.match(lines[start])
+            if header is None:
+                blocks.extend(self._split_lines(lines, start, end, diff_budget))
+                continue
+            # Line numbers of the next old and new line; an empty side's
+            # start is the line before it
+            old = int(header.group(1)) + (header.group(2) == "0")
+            new = int(header.group(3)) + (header.group(4) == "0")
+            section = lines[start][header.end() :]
+            # Leave room for the longest header a block may get
+            budget = diff_budget - estimate_tokens(lines[start])
+            for text, piece_start, piece_end in self._split_lines(
+                lines, start + 1, end, budget
+            ):
+                body = lines[piece_start:piece_end]
+                old_count = sum(1 for line in body if line[:1] in ("-", " "))
+                new_count = sum(1 for line in body if line[:1] in ("+", " "))
+                old_start = old if old_count else max(0, old - 1)
+                new_start = new if new_count else max(0, new - 1)
+                block_header = (
+                    f"@@ -{old_start},{old_count} +{new_start},{new_count} @@" + section
+                )
+                # The first block also covers the original header line
+                if piece_start == start + 1:
+                    piece_start = start
+                blocks.append((block_header + text, piece_start, piece_end))
+                old += old_count
+                new += new_count
+        return blocks
+
+    def _split_lines(
+        self, lines: List[str], start: int, end: int, budget: int
+    ) -> List[Tuple[str, int, int]]:
+        """Split lines[start:end] into runs of lines that each fit the budget."""
+        runs: List[Tuple[str, int, int]] = []
+        piece, piece_start = "", start
+        for idx in range(start, end):
+            candidate = piece + lines[idx]
+            if piece and estimate_tokens(candidate) > budget:
+                runs.append((piece, piece_start, idx))
+                piece, piece_start = lines[idx], idx
+            else:
+                piece = candidate
+        if piece:
+            runs.append((piece, piece_start, end))
+        return runs
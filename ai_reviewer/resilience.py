@@ -0,0 +1,166 @@
+"""Latency tracking for hedged LLM requests and a circuit breaker."""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional
+
+if TYPE_CHECKING:
+    from .review_strategies import ReviewComment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_LATENCY_WINDOW = 50
+# Fewer samples say too little about the tail to hedge on
+DEFAULT_MIN_SAMPLES = 10
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised instead of calling an LLM API that is known to be failing."""
+
+
+class IncompleteReviewError(RuntimeError):
+    """Raised after a review that could not review every file.
+
+    Comments found for the other files were passed on already and are
+    kept in comments, but the review as a whole must run again.
+    """
+
+    def __init__(self, message: str, comments: List["ReviewComment"]) -> None:
+        """Initialize the error.
+
+        Args:
+            message: Error message
+            comments: Comments of the files that were reviewed
+        """
+        super().__init__(message)
+        self.comments = comments
+
+
+class LatencyTracker:
+    """Latencies of recent successful requests, shared by every review.
+
+    The hedge delay is a percentile of the recent latencies: a request
+    still unanswered by then is slower than almost all of its peers and
+    is probably stuck behind a slow upstream replica.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        window: int = DEFAULT_LATENCY_WINDOW,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            percentile: Percentile of recent latencies to hedge after, from
+                0 to 100
+            window: Number of recent latencies kept
+            min_samples: Latencies needed before requests are hedged
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a successful request."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return seconds after which a request should be hedged.
+
+        Returns:
+            The configured percentile of recent latencies, or None while
+            there are too few of them
+        """
+        with self._lock:
+            if len(self._latencies) < max(1, self.min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        rank = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        return ordered[max(0, rank)]
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing, then probes it again.
+
+    After failure_threshold consecutive failures the circuit opens and
+    allow() refuses every request for reset_timeout seconds. Then a single
+    trial request is let through: its success closes the circuit and its
+    failure opens it again. Every allowed request must be followed by
+    record_success() or record_failure().
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a closed circuit.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial
+            clock: Monotonic time source
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused, trial included."""
+        with self._lock:
+            return self._opened_at is not None and (
+                self._trial or self.clock() - self._opened_at < self.reset_timeout
+            )
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self.clock() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        """Record that the upstream answered, closing the circuit."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("LLM API answered again, closing the circuit")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """Record a failed or timed out request."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    f"LLM API failed {self._failures} times in a row, refusing "
+                    f"requests for {self.reset_timeout:.0f}s"
+                )
+                self._opened_at = self.clock()
+                self._trial = False
@@ -0,0 +1,324 @@
+"""Persistent, content-addressed cache of LLM review results."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .diff_parser import ParsedDiff
+from .review_strategies import ReviewComment
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = "review-cache.sqlite3"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+# Hunks with fewer non-blank lines, such as a lone "+import os", are too
+# common to tell apart and are never reused
+MIN_FINGERPRINT_LINES = 3
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@", re.MULTILINE)
+_TABLES = ("reviews", "hunks")
+# Scope of hunk reviews shared by every project
+ALL_PROJECTS = "*"
+
+
+def normalize_diff(diff: str) -> str:
+    """Normalize a diff so rebases and line-ending changes hit the same entry.
+
+    Hunk header offsets and trailing whitespace are dropped, since they
+    change when a branch is rebased without changing the reviewed code.
+
+    Args:
+        diff: Unified diff text
+    Returns:
+        Normalized diff text
+    """
+    diff = _HUNK_HEADER.sub("@@", diff.replace("\r\n", "\n"))
+    return "\n".join(line.rstrip() for line in diff.split("\n")).strip("\n")
+
+
+def cache_key(model: str, prompt_template: str, diff: str) -> str:
+    """Build the cache key for reviewing one file's diff.
+
+    Args:
+        model: Model used for the review
+        prompt_template: Full prompt text the diff is embedded in
+        diff: Unified diff text of the file
+    Returns:
+        Hex digest identifying the review input
+    """
+    digest = hashlib.sha256()
+    for part in (model, prompt_template, normalize_diff(diff)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def hunk_fingerprint(
+    model: str, prompt_template: str, lines: Iterable[str]
+) -> Optional[str]:
+    """Fingerprint the code a hunk changes, wherever and in whichever file.
+
+    Added, removed and context lines count, with runs of whitespace
+    collapsed and blank lines left out. The hunk header and file path are
+    not part of it, so the same change in the same surroundings
+    fingerprints alike after a rebase, a reindent, a cherry-pick to another
+    branch or a rename.
+
+    Args:
+        model: Model used for the review
+        prompt_template: Full prompt text the diff is embedded in
+        lines: Diff lines of the hunk, without its header
+    Returns:
+        Hex digest, or None if the hunk only changes blank lines or has
+        fewer than MIN_FINGERPRINT_LINES non-blank lines
+    """
+    kept = [
+        f"{line[0]}{' '.join(line[1:].split())}"
+        for line in lines
+        if line[:1] in ("+", "-", " ") and line[1:].strip()
+    ]
+    if len(kept) < MIN_FINGERPRINT_LINES or all(line[0] == " " for line in kept):
+        return None
+    return cache_key(model, prompt_template, "\n".join(kept))
+
+
+class ReviewCache:
+    """SQLite-backed store of review comments keyed by review input.
+
+    Besides whole files, the comments on single hunks are kept by hunk
+    fingerprint and scope (usually the project), so a change reviewed in
+    one merge request is not reviewed again in another. The cache lives in
+    a single file inside cache_dir, so CI runners can share it by mounting
+    the same directory.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ) -> None:
+        """Open or create the cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            max_bytes: Total size of stored results before the oldest are evicted
+            max_age_seconds: Age after which entries are evicted
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            for table in _TABLES:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " key TEXT PRIMARY KEY,"
+                    " comments TEXT NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_accessed_at"
+                    f" ON {table} (accessed_at)"
+                )
+        self.evict()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection, committing on success.
+
+        Connections are not kept open, so other processes sharing the cache
+        directory only wait for the duration of a single statement batch.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str, path: str, diff: str) -> Optional[List[ReviewComment]]:
+        """Look up cached comments for a review input.
+
+        The key ignores hunk header offsets, so comments are stored by hunk
+        and offset within it and placed on the matching lines of diff.
+        Comments that do not map into diff are dropped.
+
+        Args:
+            key: Cache key from cache_key()
+            path: File path to attach the cached comments to
+            diff: Diff the key was built from, to place the comments on
+        Returns:
+            Cached comments, or None on a miss
+        """
+        items = self._get("reviews", key)
+        with self._lock:
+            if items is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        hunks = ParsedDiff.parse(diff).hunks
+        comments = []
+        for item in items:
+            if "hunk" in item:
+                if item["hunk"] >= len(hunks):
+                    continue
+                hunk = hunks[item["hunk"]]
+                if not 0 <= item["offset"] < hunk.new_count:
+                    continue
+                line = hunk.new_start + item["offset"]
+            elif "line" in item and not hunks:
+                # Without hunk headers there are no offsets to move
+                line = item["line"]
+            else:
+                continue
+            comments.append(
+                ReviewComment(path=path, line=line, content=item["content"])
+            )
+        return comments
+
+    def put(self, key: str, comments: List[ReviewComment], diff: str) -> None:
+        """Store the comments produced for a review input.
+
+        Comments outside the hunks of a diff are not stored, since they
+        could not be placed again.
+
+        Args:
+            key: Cache key from cache_key()
+            comments: Comments generated for the file
+            diff: Diff the key was built from
+        """
+        hunks = ParsedDiff.parse(diff).hunks
+        items: List[Dict[str, Any]] = []
+        for comment in comments:
+            if not hunks:
+                items.append({"line": comment.line, "content": comment.content})
+                continue
+            for idx, hunk in enumerate(hunks):
+                offset = comment.line - hunk.new_start
+                if 0 <= offset < hunk.new_count:
+                    items.append(
+                        {"hunk": idx, "offset": offset, "content": comment.content}
+                    )
+                    break
+        self._put("reviews", {key: items})
+
+    def get_hunk(self, fingerprint: str, scope: str) -> Optional[List[Tuple[int, str]]]:
+        """Look up the comments left on a hunk in an earlier review.
+
+        Args:
+            fingerprint: Fingerprint from hunk_fingerprint()
+            scope: Scope the hunk was stored in, e.g. the project ID
+        Returns:
+            Tuples of line offset from the hunk's first new line and comment
+            content, or None if the hunk was not reviewed before
+        """
+        items = self._get("hunks", f"{scope}/{fingerprint}")
+        if items is None:
+            return None
+        return [(item["offset"], item["content"]) for item in items]
+
+    def put_hunks(self, hunks: Dict[str, List[Tuple[int, str]]], scope: str) -> None:
+        """Store the comments left on reviewed hunks.
+
+        Args:
+            hunks: Line offsets and contents of comments by hunk fingerprint;
+                an empty list records a hunk that got no comments
+            scope: Scope to store the hunks in, e.g. the project ID
+        """
+        self._put(
+            "hunks",
+            {
+                f"{scope}/{fingerprint}": [
+                    {"offset": offset, "content": content}
+                    for offset, content in comments
+                ]
+                for fingerprint, comments in hunks.items()
+            },
+        )
+
+    def _get(self, table: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Read an unexpired entry and mark it as used."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                f"SELECT comments FROM {table} WHERE key = ? AND created_at >= ?",
+                (key, now - self.max_age_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                f"UPDATE {table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        items: List[Dict[str, Any]] = json.loads(row[0])
+        return items
+
+    def _put(self, table: str, entries: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Store entries, then evict to stay within the limits."""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, items in entries.items():
+            payload = json.dumps(items)
+            rows.append((key, payload, len(payload), now, now))
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table}"
+                " (key, comments, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then least recently used ones over max_bytes."""
+        with self._lock, self._connect() as conn:
+            total = 0
+            for table in _TABLES:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE created_at < ?",
+                    (time.time() - self.max_age_seconds,),
+                )
+                total += conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM {table}"
+                ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute(
+                " UNION ALL ".join(
+                    f"SELECT '{table}', key, size, accessed_at FROM {table}"
+                    for table in _TABLES
+                )
+                + " ORDER BY accessed_at"
+            ).fetchall()
+            stale: Dict[str, List[Tuple[str]]] = {table: [] for table in _TABLES}
+            for table, key, size, _ in rows:
+                if total <= self.max_bytes:
+                    break
+                stale[table].append((key,))
+                total -= size
+            for table, keys in stale.items():
+                conn.executemany(f"DELETE FROM {table} WHERE key = ?", keys)
+            count = sum(len(keys) for keys in stale.values())
+            logger.info(f"Evicted {count} entries from review cache")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for this process and the stored entry count."""
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -0,0 +1,228 @@
+"""Per-project review settings from .ai-reviewer.yml and file selection."""
+
+import fnmatch
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = ".ai-reviewer.yml"
+STRATEGY_NAMES = ("standard", "security")
+
+# Files that are never worth an LLM request: lockfiles, vendored
+# dependencies, minified bundles and generated code
+DEFAULT_EXCLUDED_FILES: Tuple[str, ...] = (
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "Cargo.lock",
+    "go.sum",
+    "vendor/*",
+    "*/vendor/*",
+    "node_modules/*",
+    "*/node_modules/*",
+    "third_party/*",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.go",
+    "*.generated.*",
+    "*.snap",
+)
+
+# Kinds of files, which rank changes here and weigh their risk in
+# risk_scoring. Source code gets the most out of a review.
+SOURCE_EXTENSIONS = frozenset(
+    ".py .js .jsx .ts .tsx .go .java .kt .rb .php .cs .c .h .cc .cpp .hpp .rs"
+    " .swift .scala .sh .sql".split()
+)
+CONFIG_EXTENSIONS = frozenset(".yml .yaml .json .toml .ini .cfg .xml .tf".split())
+DOC_EXTENSIONS = frozenset({".md", ".rst", ".txt", ".adoc"})
+TEST_PATH = re.compile(r"(^|/)(tests?|spec|__tests__)/|(^|/)test_|_test\.|\.spec\.")
+SENSITIVE_PATH = re.compile(
+    r"auth|login|passw|secret|token|crypt|permission|payment|security|session",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ReviewConfig:
+    """Review settings of a project, as read from .ai-reviewer.yml."""
+
+    review_strategies: Tuple[str, ...] = STRATEGY_NAMES
+    max_files_per_review: Optional[int] = None
+    excluded_files: Tuple[str, ...] = ()
+    review_comment_prefix: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Any, source: str = CONFIG_FILE) -> "ReviewConfig":
+        """Validate parsed YAML.
+
+        Args:
+            data: Parsed file content; None for an empty file
+            source: File name used in error messages
+        Returns:
+            Review configuration
+        Raises:
+            ValueError: If the configuration is malformed
+        """
+        if data is None:
+            return cls()
+        if not isinstance(data, dict):
+            raise ValueError(f"{source} must contain a mapping")
+        settings = data.get("settings") or {}
+        if not isinstance(settings, dict):
+            raise ValueError(f"settings in {source} must be a mapping")
+
+        strategies = tuple(data.get("review_strategies") or STRATEGY_NAMES)
+        unknown = [name for name in strategies if name not in STRATEGY_NAMES]
+        if unknown:
+            raise ValueError(
+                f"Unknown review strategies in {source}: {', '.join(map(str, unknown))}"
+            )
+        max_files = settings.get("max_files_per_review")
+        if max_files is not None and (
+            not isinstance(max_files, int)
+            or isinstance(max_files, bool)
+            or max_files < 1
+        ):
+            raise ValueError(f"max_files_per_review in {source} must be at least 1")
+        excluded = settings.get("excluded_files") or []
+        if not isinstance(excluded, list):
+            raise ValueError(f"excluded_files in {source} must be a list")
+        prefix = settings.get("review_comment_prefix")
+        return cls(
+            review_strategies=strategies,
+            max_files_per_review=max_files,
+            excluded_files=tuple(str(pattern) for pattern in excluded),
+            review_comment_prefix=str(prefix) if prefix else None,
+        )
+
+
+def load_review_config(path: str) -> ReviewConfig:
+    """Load a review configuration file; a missing file gives the defaults.
+
+    Args:
+        path: Path of .ai-reviewer.yml
+    Returns:
+        Review configuration
+    Raises:
+        ValueError: If the file is malformed
+    """
+    if not os.path.exists(path):
+        return ReviewConfig()
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}") from e
+    logger.info(f"Loaded review configuration from {path}")
+    return ReviewConfig.from_dict(data, source=path)
+
+
+def priority(change: Dict[str, Any]) -> float:
+    """Score how much a changed file is worth reviewing, without parsing it.
+
+    Bigger changes score higher, with diminishing returns. Source code
+    ranks above configuration, tests and documentation, and paths that
+    look security sensitive get a boost.
+
+    Args:
+        change: Change with new_path and diff
+    Returns:
+        Score; higher is reviewed first
+    """
+    path = change["new_path"]
+    changed = sum(
+        1
+        for line in change["diff"].splitlines()
+        if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+    )
+    score = math.log2(1 + changed)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in SOURCE_EXTENSIONS:
+        score *= 3
+    elif extension in CONFIG_EXTENSIONS:
+        score *= 1.5
+    elif extension in DOC_EXTENSIONS:
+        score *= 0.5
+    if TEST_PATH.search(path):
+        score *= 0.7
+    if SENSITIVE_PATH.search(path):
+        score *= 2
+    return score
+
+
+def _compile_globs(patterns: Iterable[str]) -> "re.Pattern[str]":
+    """Compile globs into one regex; with no globs it matches nothing."""
+    alternatives = [f"(?:{fnmatch.translate(p)})" for p in patterns]
+    return re.compile("|".join(alternatives) or r"(?!)")
+
+
+class FileSelector:
+    """Decides which changed files are sent to the review strategies.
+
+    The default and configured exclude globs are compiled into regexes
+    once, so each file costs at most two matches. Globs without a "/" are
+    matched against the file name, so "*.md" excludes Markdown files in
+    every directory; other globs are matched against the whole path.
+    """
+
+    def __init__(self, config: Optional[ReviewConfig] = None) -> None:
+        """Compile the exclude globs.
+
+        Args:
+            config: Review configuration; None uses the defaults
+        """
+        self.config = config or ReviewConfig()
+        patterns = DEFAULT_EXCLUDED_FILES + self.config.excluded_files
+        self._name_excluded = _compile_globs(p for p in patterns if "/" not in p)
+        self._path_excluded = _compile_globs(p for p in patterns if "/" in p)
+
+    @property
+    def max_files(self) -> Optional[int]:
+        """Most files reviewed per merge request, or None for no limit."""
+        return self.config.max_files_per_review
+
+    def is_excluded(self, path: str) -> bool:
+        """Return whether a file is never reviewed."""
+        name = path.rsplit("/", 1)[-1]
+        return bool(self._name_excluded.match(name) or self._path_excluded.match(path))
+
+    def select(
+        self, changes: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Drop excluded files and keep the highest priority ones.
+
+        Args:
+            changes: Changes of the merge request
+        Returns:
+            Tuple of the changes to review, in their original order, and
+            the paths left out
+        """
+        kept: List[Dict[str, Any]] = []
+        skipped: List[str] = []
+        for change in changes:
+            if self.is_excluded(change["new_path"]):
+                skipped.append(change["new_path"])
+            else:
+                kept.append(change)
+        limit = self.max_files
+        if limit is not None and len(kept) > limit:
+            ranked = sorted(range(len(kept)), key=lambda i: -priority(kept[i]))
+            chosen = set(ranked[:limit])
+            skipped += [kept[i]["new_path"] for i in ranked[limit:]]
+            kept = [change for i, change in enumerate(kept) if i in chosen]
+        return kept, skipped
@@ -0,0 +1,58 @@
+"""Tracking of the last merge request version the reviewer processed."""
+
+import logging
+import re
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_MARKER = "ai-reviewer-state"
+_STATE_PATTERN = re.compile(rf"<!-- {STATE_MARKER}: head_sha=([0-9a-f]+) -->")
+
+
+class ReviewStateStore:
+    """Stores the last reviewed head SHA in a hidden merge request note.
+
+    Keeping the state on the merge request itself means every CI runner
+    sees it without any shared storage.
+    """
+
+    def load(self, mr: Any) -> Optional[str]:
+        """Return the head SHA recorded by the last review, if any.
+
+        Args:
+            mr: GitLab merge request object
+        Returns:
+            Last reviewed head SHA, or None if the MR was never reviewed
+        """
+        note = self._find_note(mr)
+        if note is None:
+            return None
+        match = _STATE_PATTERN.search(note.body)
+        return match.group(1) if match else None
+
+    def save(self, mr: Any, head_sha: str) -> None:
+        """Record head_sha as reviewed, editing the existing note if present.
+
+        Args:
+            mr: GitLab merge request object
+            head_sha: Head commit SHA that was reviewed
+        """
+        body = (
+            f"AI review is up to date with {head_sha[:8]}.\n\n"
+            f"<!-- {STATE_MARKER}: head_sha={head_sha} -->"
+        )
+        note = self._find_note(mr)
+        if note is None:
+            mr.notes.create({"body": body})
+        else:
+            note.body = body
+            note.save()
+        logger.info(f"Recorded reviewed head SHA {head_sha}")
+
+    def _find_note(self, mr: Any) -> Optional[Any]:
+        """Find the note holding the review state."""
+        for note in mr.notes.list(iterator=True):
+            if not getattr(note, "system", False) and _STATE_PATTERN.search(note.body):
+                return note
+        return None
@@ -1,7 +1,15 @@
+import inspect
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-import re
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+from .diff_parser import ParsedDiff
+from .security_scanner import (
+    DEFAULT_RULES,
+    SecurityRule,
+    compile_rules,
+    load_rule_pack,
+)
 
 
 @dataclass
@@ -13,9 +21,45 @@ class ReviewComment:
     content: str
 
 
+class SupportsReview(Protocol):
+    """What a strategy needs at the least: ReviewStrategy's review_changes.
+
+    The other ReviewStrategy attributes and methods are optional.
+    """
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Review code changes and return comments."""
+        ...
+
+
+def _parsed_diff(change: Dict[str, Any]) -> ParsedDiff:
+    """Return a change's parsed diff, parsing it if it was not yet."""
+    parsed = change.get("parsed")
+    if parsed is None or not parsed.hunks:
+        parsed = ParsedDiff.parse(change["diff"])
+    return parsed
+
+
+def hunk_lines(change: Dict[str, Any]) -> Set[int]:
+    """Return the new-file lines shown in the hunks of a change's diff."""
+    return _parsed_diff(change).hunk_new_lines()
+
+
 class ReviewStrategy(ABC):
     """Base class for code review strategies."""
 
+    # Seconds the strategy may run before its results are dropped; None
+    # falls back to the runner's default timeout
+    timeout: Optional[float] = None
+    # Whether review_changes is pure Python work that holds the GIL. The
+    # runner may then review shards of the changes in worker processes,
+    # so such strategies must be picklable and must not rely on comments
+    # spanning shards.
+    cpu_bound: bool = False
+    # Change keys sent to worker processes; other keys are left out to
+    # keep the shards cheap to pickle
+    shard_fields: Tuple[str, ...] = ("new_path", "diff", "line", "new_line", "parsed")
+
     @abstractmethod
     def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
         """Review code changes and return comments.
@@ -27,6 +71,41 @@ class ReviewStrategy(ABC):
         """
         pass
 
+    def stream_changes(
+        self,
+        changes: List[Dict[str, Any]],
+        on_comment: Callable[[ReviewComment], None],
+    ) -> List[ReviewComment]:
+        """Review code changes, passing on each comment as soon as it is found.
+
+        Strategies that find comments one at a time override this; by
+        default every comment is passed on when the review is done.
+
+        Args:
+            changes: List of code changes to review
+            on_comment: Called with each comment, possibly from another thread
+        Returns:
+            List of review comments, the same as review_changes returns
+        """
+        comments = self.review_changes(changes)
+        for comment in comments:
+            on_comment(comment)
+        return comments
+
+    def reviewed_lines(self, change: Dict[str, Any]) -> Set[int]:
+        """Return the new-file lines of a change that a review checks.
+
+        Earlier comments on these lines that the review does not repeat
+        are taken as fixed. By default every line of the diff's hunks is
+        checked.
+
+        Args:
+            change: Code change as passed to review_changes
+        Returns:
+            New-file line numbers
+        """
+        return hunk_lines(change)
+
 
 class StandardReviewStrategy(ReviewStrategy):
     """AI-powered code review strategy."""
@@ -47,24 +126,74 @@ class StandardReviewStrategy(ReviewStrategy):
         Returns:
             List of review comments
         """
-        return self.llm_client.analyze_code(changes)
+        comments: List[ReviewComment] = self.llm_client.analyze_code(changes)
+        return comments
+
+    def stream_changes(
+        self,
+        changes: List[Dict[str, Any]],
+        on_comment: Callable[[ReviewComment], None],
+    ) -> List[ReviewComment]:
+        """Review code changes using AI, passing on comments as they stream in.
+
+        Args:
+            changes: List of code changes to review
+            on_comment: Called with each comment as soon as it is complete
+        Returns:
+            List of review comments
+        """
+        if (
+            "on_comment"
+            not in inspect.signature(self.llm_client.analyze_code).parameters
+        ):
+            # Clients that cannot stream pass on comments when they are done
+            return super().stream_changes(changes, on_comment)
+        comments: List[ReviewComment] = self.llm_client.analyze_code(
+            changes, on_comment=on_comment
+        )
+        return comments
+
+    def reviewed_lines(self, change: Dict[str, Any]) -> Set[int]:
+        """Return the lines the LLM is sent, if the client can tell.
+
+        Args:
+            change: Code change as passed to review_changes
+        Returns:
+            New-file line numbers
+        """
+        if not hasattr(self.llm_client, "reviewed_lines"):
+            return super().reviewed_lines(change)
+        lines: Set[int] = self.llm_client.reviewed_lines(change)
+        return lines
 
 
 class SecurityReviewStrategy(ReviewStrategy):
     """Security-focused code review strategy."""
 
-    def __init__(self) -> None:
-        """Initialize security review strategy."""
-        self.patterns = {
-            r"password\s*=": "Avoid hardcoding passwords",
-            r"token\s*=": "Avoid hardcoding tokens",
-            r"eval\(": "Avoid using eval() for security reasons",
-            r"exec\(": "Avoid using exec() for security reasons",
-        }
+    cpu_bound = True
+
+    def __init__(
+        self,
+        rules: Optional[Sequence[SecurityRule]] = None,
+        rule_files: Sequence[str] = (),
+    ) -> None:
+        """Initialize security review strategy.
+
+        Args:
+            rules: Rules to apply; defaults to the built-in rules
+            rule_files: YAML or JSON rule packs to load in addition to rules
+        """
+        all_rules = list(DEFAULT_RULES if rules is None else rules)
+        for path in rule_files:
+            all_rules.extend(load_rule_pack(path))
+        self.scanner = compile_rules(tuple(all_rules))
 
     def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
         """Review code changes for security issues.
 
+        Only added lines are scanned, and each finding is placed on its
+        line in the new file.
+
         Args:
             changes: List of code changes to review
         Returns:
@@ -72,14 +201,28 @@ class SecurityReviewStrategy(ReviewStrategy):
         """
         comments: List[ReviewComment] = []
         for change in changes:
-            diff = change["diff"]
-            for pattern, message in self.patterns.items():
-                if re.search(pattern, diff):
-                    comments.append(
-                        ReviewComment(
-                            path=change["new_path"],
-                            line=change.get("new_line", change.get("line", 1)),
-                            content=f"Security Issue: {message}",
-                        )
+            findings = self.scanner.scan_diff(
+                change["diff"],
+                first_line=change.get("new_line", change.get("line", 1)),
+                parsed=change.get("parsed"),
+            )
+            for finding in findings:
+                comments.append(
+                    ReviewComment(
+                        path=change["new_path"],
+                        line=finding.line,
+                        content=f"Security Issue: {finding.rule.message}",
                     )
+                )
         return comments
+
+    def reviewed_lines(self, change: Dict[str, Any]) -> Set[int]:
+        """Return the added lines of a change, the only ones scanned.
+
+        Args:
+            change: Code change as passed to review_changes
+        Returns:
+            New-file line numbers
+        """
+        parsed = _parsed_diff(change)
+        return {line for line, _ in parsed.added_lines(change["diff"])}
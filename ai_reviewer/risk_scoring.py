@@ -0,0 +1,240 @@
+"""Local risk scoring that decides how deeply each changed file is reviewed."""
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .request_planner import estimate_tokens
+from .review_config import (
+    CONFIG_EXTENSIONS,
+    DOC_EXTENSIONS,
+    SENSITIVE_PATH,
+    SOURCE_EXTENSIONS,
+    TEST_PATH,
+)
+from .security_scanner import DEFAULT_RULES, CompiledRuleSet, compile_rules
+
+logger = logging.getLogger(__name__)
+
+# Values of a change's "review_depth"
+FULL_REVIEW = "full"
+SUMMARY_REVIEW = "summary"
+NO_REVIEW = "none"
+
+DEFAULT_FULL_THRESHOLD = 4.0
+DEFAULT_SUMMARY_THRESHOLD = 1.5
+
+# Words in changed lines that often come with subtle bugs
+_RISKY_KEYWORDS = re.compile(
+    r"\b(auth\w*|password|secret|token|credential|crypt\w*|hash|random|sql|query|"
+    r"exec|eval|subprocess|shell|pickle|deserializ\w*|permission|admin|sudo|"
+    r"lock|mutex|thread|async|await|transaction|retry|timeout|delete|drop)\b",
+    re.IGNORECASE,
+)
+# A changed line that only sets a version, as in a version bump or a
+# dependency pin: version = "1.2.3", "lodash": "^4.17.21", requests==2.31.0
+_VERSION_LINE = re.compile(
+    r"""^\s*["']?[\w.@/-]+["']?\s*(?:[:=]|==|>=|~=)\s*["']?[\^~v]?"""
+    r"""\d+(?:\.\d+)+[\w.+-]*["']?,?\s*$"""
+)
+_MAX_KEYWORDS = 5
+_MAX_SECURITY_HITS = 3
+
+
+@dataclass
+class RiskAssessment:
+    """How risky a changed file looks and how deeply it is reviewed."""
+
+    path: str
+    score: float
+    depth: str
+    reasons: List[str] = field(default_factory=list)
+    # Estimated prompt tokens of the review at this depth
+    tokens: int = 0
+
+
+class RiskScorer:
+    """Scores changes from their diff alone, without calling any API.
+
+    The score grows with churn, with the risky keywords and security rule
+    hits on changed lines, and with security-sensitive paths. It is scaled
+    down for configuration, documentation and tests. Renames without
+    changes and pure version bumps score 0.
+    """
+
+    def __init__(
+        self,
+        scanner: Optional[CompiledRuleSet] = None,
+        full_threshold: float = DEFAULT_FULL_THRESHOLD,
+        summary_threshold: float = DEFAULT_SUMMARY_THRESHOLD,
+    ) -> None:
+        """Initialize the scorer.
+
+        Args:
+            scanner: Security rules whose hits raise the score; defaults to
+                the built-in rules
+            full_threshold: Lowest score that gets a full LLM review
+            summary_threshold: Lowest score that gets a summary-only review
+        """
+        self.scanner = scanner or compile_rules(DEFAULT_RULES)
+        self.full_threshold = full_threshold
+        self.summary_threshold = summary_threshold
+
+    def assess(self, change: Dict[str, Any]) -> RiskAssessment:
+        """Score a change and pick its review depth.
+
+        Args:
+            change: Change with new_path and diff
+        Returns:
+            Assessment; tokens is the estimated cost of the chosen depth
+        """
+        path = change["new_path"]
+        changed = [
+            line[1:]
+            for line in change["diff"].splitlines()
+            if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+        ]
+        if not changed:
+            return RiskAssessment(path, 0.0, NO_REVIEW, ["no changed lines"])
+        if all(_VERSION_LINE.match(line) for line in changed):
+            return RiskAssessment(path, 0.0, NO_REVIEW, ["version bump"])
+
+        reasons = [f"{len(changed)} changed lines"]
+        score = math.log2(1 + len(changed))
+        keywords = sorted(
+            {
+                match.group(0).lower()
+                for line in changed
+                for match in _RISKY_KEYWORDS.finditer(line)
+            }
+        )
+        if keywords:
+            reasons.append(f"keywords {', '.join(keywords[:_MAX_KEYWORDS])}")
+            score += 1.5 * min(len(keywords), _MAX_KEYWORDS)
+        hits = self.scanner.scan_diff(
+            change["diff"],
+            first_line=change.get("new_line", change.get("line", 1)),
+            parsed=change.get("parsed"),
+        )
+        if hits:
+            reasons.append(f"{len(hits)} security rule hits")
+            score += 4 * min(len(hits), _MAX_SECURITY_HITS)
+
+        extension = os.path.splitext(path)[1].lower()
+        if TEST_PATH.search(path):
+            reasons.append("test file")
+            score *= 0.75
+        elif extension in SOURCE_EXTENSIONS:
+            score *= 1.5
+        elif extension in CONFIG_EXTENSIONS:
+            reasons.append("configuration")
+            score *= 0.8
+        elif extension in DOC_EXTENSIONS:
+            reasons.append("documentation")
+            score *= 0.3
+        if SENSITIVE_PATH.search(path):
+            reasons.append("sensitive path")
+            score += 2
+
+        if score >= self.full_threshold:
+            depth = FULL_REVIEW
+        elif score >= self.summary_threshold:
+            depth = SUMMARY_REVIEW
+        else:
+            depth = NO_REVIEW
+        return RiskAssessment(path, score, depth, reasons, self.cost(change, depth))
+
+    def cost(self, change: Dict[str, Any], depth: str) -> int:
+        """Estimate the prompt tokens of reviewing a change at a depth."""
+        return review_cost(change, depth)
+
+
+def review_cost(change: Dict[str, Any], depth: str) -> int:
+    """Estimate the prompt tokens of reviewing a change at a depth.
+
+    A summary-only review is sent the changed lines without context.
+
+    Args:
+        change: Change with a diff
+        depth: Review depth
+    Returns:
+        Estimated prompt tokens
+    """
+    if depth == FULL_REVIEW:
+        return estimate_tokens(change["diff"])
+    if depth == SUMMARY_REVIEW:
+        return estimate_tokens(
+            "\n".join(
+                line for line in change["diff"].splitlines() if line[:1] in ("+", "-")
+            )
+        )
+    return 0
+
+
+class ReviewTriage:
+    """Assigns review depths to the files of one merge request.
+
+    Files are assessed page by page as they are fetched. Within a page the
+    riskiest files are served first, and a file whose review would exceed
+    the remaining token budget is downgraded to a summary, or not sent at
+    all. Earlier pages therefore spend the budget first. Without a scorer
+    every file starts out with a full review, in the order fetched.
+    """
+
+    def __init__(
+        self, scorer: Optional[RiskScorer], token_budget: Optional[int] = None
+    ) -> None:
+        """Initialize the triage of one merge request.
+
+        Args:
+            scorer: Scorer of single changes; None only enforces the budget
+            token_budget: Estimated prompt tokens the merge request may
+                spend on LLM reviews; None does not limit them
+        """
+        self.scorer = scorer
+        self.remaining = token_budget
+
+    def assign(self, changes: List[Dict[str, Any]]) -> List[RiskAssessment]:
+        """Set each change's "review_depth" and log the decisions.
+
+        Args:
+            changes: Changes of one page, updated in place
+        Returns:
+            Assessments in the order of changes
+        """
+        assessments = [self._assess(change) for change in changes]
+        for idx in sorted(range(len(changes)), key=lambda i: -assessments[i].score):
+            change, assessment = changes[idx], assessments[idx]
+            if self.remaining is not None:
+                for depth in (FULL_REVIEW, SUMMARY_REVIEW):
+                    if assessment.depth == depth and assessment.tokens > self.remaining:
+                        assessment.depth = (
+                            SUMMARY_REVIEW if depth == FULL_REVIEW else NO_REVIEW
+                        )
+                        assessment.tokens = review_cost(change, assessment.depth)
+                        if "over token budget" not in assessment.reasons:
+                            assessment.reasons.append("over token budget")
+                self.remaining -= assessment.tokens
+            change["review_depth"] = assessment.depth
+            metrics.add(f"files_{assessment.depth}_review")
+            logger.info(
+                f"Risk {assessment.score:.1f} for {assessment.path} "
+                f"({'; '.join(assessment.reasons)}): {assessment.depth} review"
+            )
+        return assessments
+
+    def _assess(self, change: Dict[str, Any]) -> RiskAssessment:
+        """Score a change, or give it a full review if there is no scorer."""
+        if self.scorer is not None:
+            return self.scorer.assess(change)
+        return RiskAssessment(
+            change["new_path"],
+            0.0,
+            FULL_REVIEW,
+            ["no risk triage"],
+            review_cost(change, FULL_REVIEW),
+        )
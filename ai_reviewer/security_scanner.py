@@ -0,0 +1,297 @@
+"""Single-pass, multi-pattern scanning of diffs for security issues."""
+
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .diff_parser import ParsedDiff
+
+try:
+    # Private modules of re; without them no rule is prefiltered
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:
+    sre_constants = sre_parse = None
+
+# Shorter literals would match most lines and not filter anything out
+MIN_LITERAL_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SecurityRule:
+    """A pattern that flags a security issue in added code."""
+
+    id: str
+    pattern: str
+    message: str
+    ignore_case: bool = False
+
+
+DEFAULT_RULES: Tuple[SecurityRule, ...] = (
+    SecurityRule("hardcoded-password", r"password\s*=", "Avoid hardcoding passwords"),
+    SecurityRule("hardcoded-token", r"token\s*=", "Avoid hardcoding tokens"),
+    SecurityRule("eval", r"eval\(", "Avoid using eval() for security reasons"),
+    SecurityRule("exec", r"exec\(", "Avoid using exec() for security reasons"),
+)
+
+
+@dataclass(frozen=True)
+class SecurityFinding:
+    """A rule match on an added line."""
+
+    rule: SecurityRule
+    line: int
+
+
+def _required_literal(pattern: str) -> Tuple[str, bool]:
+    """Find the longest literal that every match of pattern must contain.
+
+    Only top-level literal runs are considered, which is enough for the
+    typical "call(" or "name = " style rules.
+
+    Args:
+        pattern: Regular expression
+    Returns:
+        Tuple of the literal (empty if none, or if the regex parser is not
+        available) and whether the pattern sets the inline ignore-case flag
+    """
+    if sre_parse is None:
+        return "", False
+    parsed = sre_parse.parse(pattern)
+    best = current = ""
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            current += chr(av)
+        else:
+            best = max(best, current, key=len)
+            current = ""
+    ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+    return max(best, current, key=len), ignore_case
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex matching any of words, structured as a trie.
+
+    The regex engine rejects a trie branch after a single character
+    comparison, so matching cost grows with word length rather than with
+    the number of words.
+
+    Args:
+        words: Literal strings
+    Returns:
+        Regular expression source
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + emit(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = "|".join(branches)
+        if "" in node:
+            return f"(?:{body})?"
+        return body if len(branches) == 1 else f"(?:{body})"
+
+    return emit(trie)
+
+
+class _Prefilter:
+    """Finds which rule literals occur in a line with one regex search."""
+
+    def __init__(self, literals: Dict[str, List[int]], ignore_case: bool) -> None:
+        """Compile the literal trie.
+
+        Args:
+            literals: Rule indexes keyed by their required literal
+            ignore_case: Whether literals are matched case-insensitively
+        """
+        self.ignore_case = ignore_case
+        # A matched literal also implies every indexed literal that prefixes it
+        self.candidates: Dict[str, List[int]] = {}
+        for literal in literals:
+            self.candidates[literal] = sorted(
+                idx
+                for prefix, indexes in literals.items()
+                if literal.startswith(prefix)
+                for idx in indexes
+            )
+        flags = re.IGNORECASE if ignore_case else 0
+        # The lookahead reports a literal at every start position, so
+        # overlapping literals are not hidden by each other
+        self.regex = re.compile(f"(?=({_trie_pattern(literals)}))", flags)
+
+    def find(self, text: str) -> Set[int]:
+        """Return indexes of rules whose literal occurs in text."""
+        found: Set[int] = set()
+        for match in self.regex.finditer(text):
+            literal = match.group(1)
+            if self.ignore_case:
+                literal = literal.lower()
+            found.update(self.candidates.get(literal, ()))
+        return found
+
+
+class CompiledRuleSet:
+    """Rules compiled once and matched against each line in a single pass.
+
+    A literal that every match of a rule must contain is extracted from
+    its pattern, and all literals are merged into one trie regex. One
+    search per line finds the candidate rules, and only those rules run
+    their full pattern, so adding rules barely slows down lines that do
+    not match them. Rules without a usable literal run on every line.
+    """
+
+    def __init__(self, rules: Sequence[SecurityRule]) -> None:
+        """Validate and compile the rules.
+
+        Args:
+            rules: Rules to compile
+        Raises:
+            ValueError: If a rule pattern is invalid
+        """
+        self.rules = tuple(rules)
+        self._patterns: List[Pattern[str]] = []
+        self._always: Set[int] = set()
+        literals: Dict[bool, Dict[str, List[int]]] = {False: {}, True: {}}
+
+        for idx, rule in enumerate(self.rules):
+            try:
+                self._patterns.append(
+                    re.compile(rule.pattern, re.IGNORECASE if rule.ignore_case else 0)
+                )
+                literal, inline_ignore_case = _required_literal(rule.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern for rule {rule.id}: {e}") from e
+            if len(literal) < MIN_LITERAL_LENGTH:
+                self._always.add(idx)
+                continue
+            ignore_case = rule.ignore_case or inline_ignore_case
+            key = literal.lower() if ignore_case else literal
+            literals[ignore_case].setdefault(key, []).append(idx)
+
+        self._prefilters = [
+            _Prefilter(group, ignore_case)
+            for ignore_case, group in literals.items()
+            if group
+        ]
+
+    def scan_line(self, text: str) -> Iterator[SecurityRule]:
+        """Yield every rule matching text, in rule order.
+
+        Args:
+            text: Line content without the diff prefix
+        Yields:
+            Matching rules
+        """
+        candidates = set(self._always)
+        for prefilter in self._prefilters:
+            candidates |= prefilter.find(text)
+        for idx in sorted(candidates):
+            if self._patterns[idx].search(text):
+                yield self.rules[idx]
+
+    def scan_diff(
+        self,
+        diff: str,
+        first_line: int = 1,
+        parsed: Optional[ParsedDiff] = None,
+    ) -> List[SecurityFinding]:
+        """Scan the added lines of a unified diff.
+
+        Text before the first hunk header is treated as plain new content
+        starting at first_line, which lets callers scan code fragments.
+
+        Args:
+            diff: Unified diff text
+            first_line: Line number of fragment text before any hunk header
+            parsed: Index of diff, parsed here if not given
+        Returns:
+            Findings with new-file line numbers, in diff order
+        """
+        if parsed is None:
+            parsed = ParsedDiff.parse(diff, fragment_start=first_line)
+        return [
+            SecurityFinding(rule, line)
+            for line, text in parsed.added_lines(diff)
+            for rule in self.scan_line(text)
+        ]
+
+
+@functools.lru_cache(maxsize=32)
+def compile_rules(rules: Tuple[SecurityRule, ...]) -> CompiledRuleSet:
+    """Compile a rule set, reusing the compiled form for identical rules.
+
+    Args:
+        rules: Rules to compile
+    Returns:
+        Compiled rule set
+    """
+    return CompiledRuleSet(rules)
+
+
+def load_rule_pack(path: str) -> Tuple[SecurityRule, ...]:
+    """Load rules from a YAML or JSON rule pack.
+
+    The file contains either a list of rules or a mapping with a "rules"
+    list. Each rule needs "pattern" and "message", and may set "id" and
+    "ignore_case".
+
+    Args:
+        path: Path of the rule pack
+    Returns:
+        Loaded rules
+    Raises:
+        ValueError: If the rule pack is malformed
+    """
+    mtime = os.stat(path).st_mtime
+    return _load_rule_pack(os.path.abspath(path), mtime)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_rule_pack(path: str, mtime: float) -> Tuple[SecurityRule, ...]:
+    """Load a rule pack, cached until the file changes."""
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        data: Any = yaml.safe_load(f)
+    entries: Optional[Any] = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"Rule pack {path} must contain a list of rules")
+
+    rules = []
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, dict) or "pattern" not in entry:
+            raise ValueError(f"Rule {idx} in {path} needs a pattern")
+        if "message" not in entry:
+            raise ValueError(f"Rule {idx} in {path} needs a message")
+        rules.append(
+            SecurityRule(
+                id=str(entry.get("id", f"{os.path.basename(path)}:{idx}")),
+                pattern=str(entry["pattern"]),
+                message=str(entry["message"]),
+                ignore_case=bool(entry.get("ignore_case", False)),
+            )
+        )
+    return tuple(rules)
@@ -0,0 +1,287 @@
+"""Long-running webhook server that reviews merge requests from a queue."""
+
+import hmac
+import json
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+REVIEWED_ACTIONS = frozenset({"open", "reopen", "update"})
+
+MergeRequestKey = Tuple[int, int]
+
+
+class ReviewQueue:
+    """FIFO of merge requests to review that coalesces repeated events.
+
+    A merge request is queued at most once. Events for a merge request
+    that is already waiting are dropped, and one that is being reviewed is
+    queued again but not handed to a second worker until the running
+    review finishes.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty queue."""
+        self._cond = threading.Condition()
+        self._order: Deque[MergeRequestKey] = deque()
+        self._pending: Set[MergeRequestKey] = set()
+        self._active: Set[MergeRequestKey] = set()
+        self._closed = False
+
+    def put(self, key: MergeRequestKey) -> bool:
+        """Queue a merge request for review.
+
+        Args:
+            key: Tuple of project ID and merge request IID
+        Returns:
+            False if the merge request was already waiting
+        """
+        with self._cond:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self._order.append(key)
+            self._cond.notify_all()
+            return True
+
+    def get(self) -> Optional[MergeRequestKey]:
+        """Wait for the next merge request that is not already being reviewed.
+
+        Returns:
+            Merge request key, or None once the queue is closed
+        """
+        with self._cond:
+            while not self._closed:
+                for key in self._order:
+                    if key not in self._active:
+                        self._order.remove(key)
+                        self._pending.discard(key)
+                        self._active.add(key)
+                        return key
+                self._cond.wait()
+            return None
+
+    def done(self, key: MergeRequestKey) -> None:
+        """Mark a review returned by get() as finished."""
+        with self._cond:
+            self._active.discard(key)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Stop handing out work and wake every waiting worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued or being reviewed.
+
+        Args:
+            timeout: Seconds to wait; None waits indefinitely
+        Returns:
+            True if the queue became idle
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._order and not self._active, timeout
+            )
+
+    def __len__(self) -> int:
+        """Return the number of merge requests waiting."""
+        with self._cond:
+            return len(self._order)
+
+
+def parse_merge_request_event(payload: Dict[str, Any]) -> Optional[MergeRequestKey]:
+    """Extract the merge request to review from a GitLab webhook payload.
+
+    Only events that can change the code under review are accepted:
+    opening, reopening and updates that pushed new commits.
+
+    Args:
+        payload: Decoded webhook body
+    Returns:
+        Tuple of project ID and merge request IID, or None to ignore the event
+    Raises:
+        ValueError: If the project ID or merge request IID is not an integer
+    """
+    if payload.get("object_kind") != "merge_request":
+        return None
+    attributes = payload.get("object_attributes") or {}
+    action = attributes.get("action")
+    if action not in REVIEWED_ACTIONS:
+        return None
+    if action == "update" and "oldrev" not in attributes:
+        return None
+    project_id = (payload.get("project") or {}).get("id")
+    mr_iid = attributes.get("iid")
+    if project_id is None or mr_iid is None:
+        return None
+    try:
+        return int(project_id), int(mr_iid)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid merge request reference: {str(e)}") from e
+
+
+class ReviewServer:
+    """HTTP webhook receiver feeding a fixed pool of review workers.
+
+    The reviewer is created and authenticated once and shared by all
+    workers, so each event only pays for the review itself.
+    """
+
+    def __init__(
+        self,
+        reviewer: Any,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        workers: int = DEFAULT_WORKERS,
+        secret: Optional[str] = None,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+            reviewer: Object with a process_merge_request(project_id, mr_iid)
+                method, normally a GitLabReviewer
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+            workers: Number of merge requests reviewed in parallel
+            secret: Expected X-Gitlab-Token header; None accepts any request
+        """
+        self.reviewer = reviewer
+        self.secret = secret
+        self.queue = ReviewQueue()
+        self.httpd = ThreadingHTTPServer((host, port), _WebhookHandler)
+        self.httpd.daemon_threads = True
+        setattr(self.httpd, "review_server", self)
+        self._workers: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"review-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._http_thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return int(self.httpd.server_address[1])
+
+    def start(self) -> None:
+        """Start the workers and serve HTTP in a background thread."""
+        for worker in self._workers:
+            worker.start()
+        self._http_thread = threading.Thread(
+            target=self.httpd.serve_forever, name="webhook-http", daemon=True
+        )
+        self._http_thread.start()
+        logger.info(
+            f"Listening for GitLab webhooks on port {self.port} "
+            f"with {len(self._workers)} workers"
+        )
+
+    def serve_forever(self) -> None:
+        """Start the server and block until interrupted."""
+        self.start()
+        try:
+            if self._http_thread is not None:
+                self._http_thread.join()
+        except KeyboardInterrupt:
+            logger.info("Shutting down webhook server")
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop accepting webhooks and let workers finish their current review."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.queue.close()
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join()
+
+    def handle_event(self, headers: Any, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Validate a webhook request and queue its merge request.
+
+        Args:
+            headers: Request headers
+            body: Raw request body
+        Returns:
+            Tuple of HTTP status code and JSON response body
+        """
+        if self.secret is not None:
+            token = headers.get("X-Gitlab-Token") or ""
+            if not hmac.compare_digest(token.encode(), self.secret.encode()):
+                return 401, {"status": "unauthorized"}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"status": "invalid json"}
+        if not isinstance(payload, dict):
+            return 400, {"status": "invalid payload"}
+
+        try:
+            key = parse_merge_request_event(payload)
+        except ValueError:
+            return 400, {"status": "invalid payload"}
+        if key is None:
+            return 200, {"status": "ignored"}
+        if self.queue.put(key):
+            logger.info(f"Queued merge request {key[1]} in project {key[0]}")
+            return 202, {"status": "queued"}
+        logger.info(f"Merge request {key[1]} in project {key[0]} already queued")
+        return 202, {"status": "coalesced"}
+
+    def _work(self) -> None:
+        """Review queued merge requests until the queue is closed."""
+        while True:
+            key = self.queue.get()
+            if key is None:
+                return
+            project_id, mr_iid = key
+            try:
+                self.reviewer.process_merge_request(project_id, mr_iid)
+            except SystemExit:
+                # GitLabReviewer exits on fatal errors in CLI mode
+                logger.error(f"Review of MR {mr_iid} in project {project_id} failed")
+            except Exception as e:
+                logger.error(
+                    f"Review of MR {mr_iid} in project {project_id} failed: {str(e)}"
+                )
+            finally:
+                self.queue.done(key)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the owning ReviewServer."""
+
+    def do_GET(self) -> None:
+        """Serve the health check."""
+        if self.path != "/healthz":
+            self._reply(404, {"status": "not found"})
+            return
+        server: ReviewServer = getattr(self.server, "review_server")
+        self._reply(200, {"status": "ok", "queued": len(server.queue)})
+
+    def do_POST(self) -> None:
+        """Accept a GitLab webhook."""
+        server: ReviewServer = getattr(self.server, "review_server")
+        length = int(self.headers.get("Content-Length") or 0)
+        status, body = server.handle_event(self.headers, self.rfile.read(length))
+        self._reply(status, body)
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        """Send a JSON response."""
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Route access logs through logging instead of stderr."""
+        logger.debug(format % args)
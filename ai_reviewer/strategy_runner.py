@@ -0,0 +1,263 @@
+"""Concurrent execution of review strategies."""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import metrics
+from .review_strategies import ReviewComment, SupportsReview
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY_TIMEOUT = 600.0
+# Diff bytes per worker process below which a CPU-bound strategy runs in
+# its thread, since pickling and process round trips would cost more
+DEFAULT_MIN_SHARD_BYTES = 256 * 1024
+
+
+@dataclass
+class StrategyResult:
+    """Outcome of running one review strategy."""
+
+    name: str
+    comments: List[ReviewComment] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the strategy finished without error or timeout."""
+        return self.error is None and not self.timed_out
+
+
+class StrategyRunner:
+    """Runs all review strategies at the same time in a thread pool.
+
+    A strategy that raises or exceeds its timeout only loses its own
+    comments. Results are returned in the order of the strategies, so the
+    combined comments do not depend on which strategy finishes first.
+
+    Strategies marked cpu_bound would hold the GIL and stall the threads
+    waiting on the LLM, so with process_workers set their changes are
+    split into contiguous shards of similar diff size and reviewed in a
+    process pool. Shard comments are merged in change order.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = DEFAULT_STRATEGY_TIMEOUT,
+        process_workers: int = 0,
+        min_shard_bytes: int = DEFAULT_MIN_SHARD_BYTES,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            timeout: Seconds each strategy may run, unless the strategy sets
+                its own timeout; None waits indefinitely
+            process_workers: Worker processes for CPU-bound strategies; 0
+                runs every strategy in a thread
+            min_shard_bytes: Smallest diff size worth a worker process
+        """
+        self.timeout = timeout
+        self.process_workers = process_workers
+        self.min_shard_bytes = min_shard_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def run(
+        self,
+        strategies: Sequence[SupportsReview],
+        changes: List[Dict[str, Any]],
+        on_comment: Optional[Callable[[ReviewComment], None]] = None,
+    ) -> List[StrategyResult]:
+        """Run strategies concurrently over the same changes.
+
+        Args:
+            strategies: Strategies to run
+            changes: List of code changes to review
+            on_comment: Called with each comment as soon as its strategy
+                finds it, from the strategy's thread. Comments passed on
+                before a strategy failed or timed out are not taken back.
+        Returns:
+            One result per strategy, in the same order as strategies
+        """
+        if not strategies:
+            return []
+
+        start = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=len(strategies), thread_name_prefix="review-strategy"
+        )
+        try:
+            futures = [
+                executor.submit(
+                    metrics.bind(self._timed), strategy, changes, on_comment
+                )
+                for strategy in strategies
+            ]
+            results = [
+                self._collect(strategy, future, start)
+                for strategy, future in zip(strategies, futures)
+            ]
+        finally:
+            # Do not wait for strategies that timed out
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for result in results:
+            if result.succeeded:
+                logger.info(
+                    f"{result.name} generated {len(result.comments)} comments "
+                    f"in {result.elapsed:.2f}s"
+                )
+        return results
+
+    def _timed(
+        self,
+        strategy: SupportsReview,
+        changes: List[Dict[str, Any]],
+        on_comment: Optional[Callable[[ReviewComment], None]] = None,
+    ) -> StrategyResult:
+        """Run one strategy and measure how long it took."""
+        name = strategy.__class__.__name__
+        logger.info(f"Applying review strategy: {name}")
+        started = time.monotonic()
+        # Strategies only need review_changes; those that define
+        # stream_changes pass on comments as they find them
+        stream = getattr(type(strategy), "stream_changes", None)
+        with metrics.span("strategy", strategy=name) as strategy_span:
+            shards = self._shards(strategy, changes)
+            if shards is not None:
+                strategy_span.attributes["shards"] = len(shards)
+                comments = self._review_shards(strategy, shards, on_comment)
+            elif on_comment is not None and stream is not None:
+                comments = stream(strategy, changes, on_comment)
+            else:
+                comments = strategy.review_changes(changes)
+                if on_comment is not None:
+                    for comment in comments:
+                        on_comment(comment)
+            strategy_span.attributes["comments"] = len(comments)
+        return StrategyResult(
+            name=name, comments=comments, elapsed=time.monotonic() - started
+        )
+
+    def _shards(
+        self, strategy: SupportsReview, changes: List[Dict[str, Any]]
+    ) -> Optional[List[List[Dict[str, Any]]]]:
+        """Split changes for review in worker processes.
+
+        Returns:
+            Contiguous shards of similar diff size, each change holding
+            only the strategy's shard_fields if it sets them, or None if
+            the strategy should run in its thread
+        """
+        # Strategies only need review_changes, so cpu_bound may be missing
+        if not getattr(strategy, "cpu_bound", False) or self.process_workers < 1:
+            return None
+        sizes = [len(change.get("diff") or "") for change in changes]
+        total = sum(sizes)
+        count = min(self.process_workers, len(changes), total // self.min_shard_bytes)
+        if count < 1:
+            return None
+
+        # Without shard_fields the whole change is sent
+        fields: Optional[Tuple[str, ...]] = getattr(strategy, "shard_fields", None)
+        shards: List[List[Dict[str, Any]]] = [[]]
+        cumulative = 0
+        for change, size in zip(changes, sizes):
+            # Start the next shard once this one holds its share of the bytes
+            if (
+                shards[-1]
+                and len(shards) < count
+                and cumulative >= total * len(shards) / count
+            ):
+                shards.append([])
+            if fields is None:
+                shards[-1].append(change)
+            else:
+                shards[-1].append({key: change[key] for key in fields if key in change})
+            cumulative += size
+        return shards
+
+    def _review_shards(
+        self,
+        strategy: SupportsReview,
+        shards: List[List[Dict[str, Any]]],
+        on_comment: Optional[Callable[[ReviewComment], None]],
+    ) -> List[ReviewComment]:
+        """Review shards in worker processes and merge their comments."""
+        pool = self._process_pool()
+        try:
+            futures = [pool.submit(strategy.review_changes, shard) for shard in shards]
+            comments: List[ReviewComment] = []
+            for future in futures:
+                shard_comments = future.result()
+                if on_comment is not None:
+                    for comment in shard_comments:
+                        on_comment(comment)
+                comments.extend(shard_comments)
+            return comments
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next review
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """Return the worker process pool, starting it on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                # Forking would copy locks held by the LLM client's and the
+                # strategies' threads, so workers start from a clean process
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    "forkserver" if "forkserver" in methods else "spawn"
+                )
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers, mp_context=context
+                )
+            return self._pool
+
+    def _collect(
+        self,
+        strategy: SupportsReview,
+        future: "Future[StrategyResult]",
+        start: float,
+    ) -> StrategyResult:
+        """Wait for a strategy's result within its timeout."""
+        name = strategy.__class__.__name__
+        # Strategies only need review_changes, so timeout may be missing
+        timeout = getattr(strategy, "timeout", None)
+        if not isinstance(timeout, (int, float)):
+            timeout = self.timeout
+        remaining = None
+        if timeout is not None:
+            remaining = max(0.0, start + timeout - time.monotonic())
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            logger.error(f"Strategy {name} timed out after {timeout}s")
+            return StrategyResult(
+                name=name, elapsed=time.monotonic() - start, timed_out=True
+            )
+        except Exception as e:
+            logger.error(f"Strategy {name} failed: {str(e)}")
+            return StrategyResult(
+                name=name, elapsed=time.monotonic() - start, error=str(e)
+            )
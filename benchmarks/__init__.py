@@ -0,0 +1 @@
+"""Benchmark harness for the reviewer using local GitLab and OpenAI stand-ins."""
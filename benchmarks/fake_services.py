@@ -0,0 +1,443 @@
+"""In-process HTTP stand-ins for the GitLab and OpenAI APIs.
+
+Both servers answer just enough of their API for a full review, with
+configurable latency and a fixed-window rate limit that answers 429 with
+Retry-After like the real services. Every request is recorded so the
+benchmark can count requests and derive phase timings.
+"""
+
+import json
+import math
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+# Handlers return a status and JSON body, optionally followed by headers
+Route = Callable[["FakeService", re.Match, Any], Tuple[Any, ...]]
+# A handler of a FakeService subclass, taking the subclass as self
+RouteT = TypeVar("RouteT", bound=Callable[..., Tuple[Any, ...]])
+ServiceT = TypeVar("ServiceT", bound="FakeService")
+
+
+@dataclass
+class EventStream:
+    """A route result sent as server-sent events instead of one JSON body."""
+
+    events: List[Any]
+
+
+@dataclass
+class RecordedRequest:
+    """A request received by a fake service."""
+
+    route: str
+    start: float
+    end: float
+    status: int
+
+
+class FakeService:
+    """Threaded HTTP server dispatching requests to regex routes."""
+
+    routes: List[Tuple[str, "re.Pattern[str]", str, Route]] = []
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: Optional[int] = None,
+        rate_window: float = 1.0,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            latency: Seconds added to every response
+            rate_limit: Requests allowed per window; None disables limiting
+            rate_window: Length of the rate limit window in seconds
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.requests: List[RecordedRequest] = []
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        setattr(self.httpd, "service", self)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running service."""
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self: ServiceT) -> ServiceT:
+        """Start serving in a background thread."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self) -> None:
+        """Forget recorded requests and rate limit state."""
+        with self._lock:
+            self.requests = []
+            self._window_start = 0.0
+            self._window_count = 0
+
+    def count(self, route: Optional[str] = None, status: Optional[int] = None) -> int:
+        """Count recorded requests, optionally by route and status."""
+        return sum(
+            1
+            for r in self.requests
+            if (route is None or r.route == route)
+            and (status is None or r.status == status)
+        )
+
+    def _throttle(self) -> Optional[float]:
+        """Apply the rate limit, returning seconds to wait if exceeded."""
+        if self.rate_limit is None:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.rate_window:
+                self._window_start, self._window_count = now, 0
+            if self._window_count >= self.rate_limit:
+                return self._window_start + self.rate_window - now
+            self._window_count += 1
+            return None
+
+    def handle(
+        self, method: str, path: str, body: Any
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        """Dispatch a request and record it.
+
+        Returns:
+            Tuple of status, JSON body and extra headers
+        """
+        start = time.monotonic()
+        path, _, query = path.partition("?")
+        if method == "GET":
+            body = dict(urllib.parse.parse_qsl(query))
+        route_name, status, payload, headers = "unknown", 404, {"error": "404"}, {}
+        for name, pattern, route_method, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                route_name = name
+                retry_after = self._throttle()
+                if retry_after is not None:
+                    status, payload = 429, {"error": "rate limited"}
+                    # Whole seconds, as GitLab and OpenAI send it
+                    headers = {"Retry-After": str(math.ceil(retry_after))}
+                else:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    status, payload, *extra = handler(self, match, body)
+                    headers = extra[0] if extra else {}
+                break
+        with self._lock:
+            self.requests.append(
+                RecordedRequest(route_name, start, time.monotonic(), status)
+            )
+        return status, payload, headers
+
+
+def route(method: str, name: str, pattern: str) -> Callable[[RouteT], RouteT]:
+    """Register a handler for requests matching pattern on a FakeService."""
+
+    def decorator(func: RouteT) -> RouteT:
+        func.route = (name, re.compile(pattern), method)  # type: ignore[attr-defined]
+        return func
+
+    return decorator
+
+
+def _collect_routes(cls: type) -> List[Tuple[str, "re.Pattern[str]", str, Route]]:
+    """Gather the handlers decorated with route() on a service class."""
+    routes = []
+    for value in vars(cls).values():
+        if hasattr(value, "route"):
+            name, pattern, method = value.route
+            routes.append((name, pattern, method, value))
+    return routes
+
+
+class FakeGitLab(FakeService):
+    """GitLab API stand-in serving one merge request per project."""
+
+    def __init__(
+        self,
+        changes: List[Dict[str, Any]],
+        latency: float = 0.0,
+        rate_limit: Optional[int] = None,
+        rate_window: float = 1.0,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            changes: Changes returned for every merge request
+            latency: Seconds added to every response
+            rate_limit: Requests allowed per window; None disables limiting
+            rate_window: Length of the rate limit window in seconds
+        """
+        super().__init__(latency, rate_limit, rate_window)
+        self.changes = changes
+        self.discussions: List[Dict[str, Any]] = []
+        self.notes: List[Dict[str, Any]] = []
+
+    def reset(self) -> None:
+        """Forget recorded requests and everything posted to the MR."""
+        super().reset()
+        self.discussions = []
+        self.notes = []
+
+    def _merge_request(self, match: re.Match) -> Dict[str, Any]:
+        """Attributes of the merge request addressed by a URL match."""
+        iid = int(match.group("iid"))
+        return {
+            "id": iid,
+            "iid": iid,
+            "project_id": int(match.group("project")),
+            "title": f"Benchmark merge request {iid}",
+            "sha": "0" * 40,
+            "state": "opened",
+        }
+
+    @route("GET", "user", r"/api/v4/user")
+    def _user(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        return 200, {"id": 1, "username": "benchmark"}
+
+    @route("GET", "project", r"/api/v4/projects/(?P<project>\d+)")
+    def _project(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        project = int(match.group("project"))
+        return 200, {"id": project, "name": f"project-{project}"}
+
+    @route(
+        "GET",
+        "merge_request",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)",
+    )
+    def _get_merge_request(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        return 200, self._merge_request(match)
+
+    @route(
+        "GET",
+        "changes",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/changes",
+    )
+    def _changes(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        return 200, {**self._merge_request(match), "changes": self.changes}
+
+    @route(
+        "GET",
+        "diffs",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/diffs",
+    )
+    def _diffs(self, match: re.Match, body: Any) -> Tuple[Any, ...]:
+        page = int(body.get("page", 1))
+        per_page = int(body.get("per_page", 20))
+        start = (page - 1) * per_page
+        headers = {}
+        if start + per_page < len(self.changes):
+            query = urllib.parse.urlencode({"page": page + 1, "per_page": per_page})
+            headers["Link"] = f'<{self.url}{match.group(0)}?{query}>; rel="next"'
+        return 200, self.changes[start : start + per_page], headers
+
+    @route(
+        "GET",
+        "list_discussions",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/discussions",
+    )
+    def _list_discussions(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        return 200, self.discussions
+
+    @route(
+        "POST",
+        "create_discussion",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/discussions",
+    )
+    def _create_discussion(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        with self._lock:
+            discussion = {
+                "id": f"d{len(self.discussions) + 1}",
+                "notes": [
+                    {
+                        "id": len(self.discussions) + 1,
+                        "body": body.get("body", ""),
+                        "position": body.get("position"),
+                        "resolved": False,
+                        "system": False,
+                    }
+                ],
+            }
+            self.discussions.append(discussion)
+        return 201, discussion
+
+    @route(
+        "GET",
+        "list_notes",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/notes",
+    )
+    def _list_notes(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        return 200, self.notes
+
+    @route(
+        "POST",
+        "create_note",
+        r"/api/v4/projects/(?P<project>\d+)/merge_requests/(?P<iid>\d+)/notes",
+    )
+    def _create_note(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        with self._lock:
+            note = {"id": len(self.notes) + 1, "body": body.get("body", "")}
+            self.notes.append(note)
+        return 201, note
+
+
+FakeGitLab.routes = _collect_routes(FakeGitLab)
+
+_REVIEWED_PATH = re.compile(
+    r"^(?:Review|In .*, summarize the risks of) this code change in (.+?):\n",
+    re.MULTILINE,
+)
+_NEW_START = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)", re.MULTILINE)
+
+
+class FakeOpenAI(FakeService):
+    """OpenAI chat completions stand-in returning a canned finding per file."""
+
+    @route("POST", "chat_completions", r"/v1/chat/completions")
+    def _chat_completions(self, match: re.Match, body: Any) -> Tuple[int, Any]:
+        findings = []
+        for message in body.get("messages", []):
+            text = message.get("content", "")
+            path = _REVIEWED_PATH.search(text)
+            if message.get("role") != "user" or path is None:
+                continue
+            hunk = _NEW_START.search(text)
+            findings.append(
+                {
+                    "path": path.group(1),
+                    "line": int(hunk.group(1)) if hunk else 1,
+                    "severity": "warning",
+                    "comment": "Consider validating the input before computing "
+                    "the result.",
+                }
+            )
+        # One finding per line, so streamed findings arrive one chunk each
+        content = (
+            '{"findings": [\n'
+            + ",\n".join(json.dumps(finding) for finding in findings)
+            + "\n]}"
+        )
+        # Roughly four characters per token, like the real tokenizer
+        prompt_tokens = (
+            sum(len(message.get("content", "")) for message in body.get("messages", []))
+            // 4
+        )
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            return 200, self._stream(body, content, usage)
+        return 200, {
+            "id": f"chatcmpl-{self.count()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    def _stream(self, body: Any, content: str, usage: Dict[str, int]) -> EventStream:
+        """Split a completion into chunks of one line each, as when streaming."""
+        chunk = {
+            "id": f"chatcmpl-{self.count()}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+        }
+        events: List[Any] = [
+            {
+                **chunk,
+                "choices": [
+                    {"index": 0, "delta": {"content": line}, "finish_reason": None}
+                ],
+            }
+            for line in content.splitlines(keepends=True)
+        ]
+        events.append(
+            {
+                **chunk,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+        )
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**chunk, "choices": [], "usage": usage})
+        return EventStream(events)
+
+
+FakeOpenAI.routes = _collect_routes(FakeOpenAI)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Decodes JSON requests and forwards them to the owning FakeService."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """Handle a GET request."""
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        """Handle a POST request."""
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:
+        """Handle a PUT request."""
+        self._dispatch("PUT")
+
+    def _dispatch(self, method: str) -> None:
+        """Read the body, run the route and send the JSON response."""
+        service: FakeService = getattr(self.server, "service")
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        status, payload, headers = service.handle(method, self.path, body)
+        content_type = "application/json"
+        if isinstance(payload, EventStream):
+            content_type = "text/event-stream"
+            data = "".join(
+                f"data: {json.dumps(event)}\n\n" for event in payload.events
+            ).encode()
+            data += b"data: [DONE]\n\n"
+        else:
+            data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep benchmark output quiet."""
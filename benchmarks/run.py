@@ -0,0 +1,345 @@
+"""Run the reviewer end to end against local fakes and report its cost.
+
+Example:
+    python -m benchmarks.run --files 50 --languages python:3,go:1 \\
+        --openai-latency 0.2 --repeat 3 --output report.json
+
+Each run starts ``python -m ai_reviewer`` as a subprocess pointed at a
+fake GitLab and a fake OpenAI server, then reports wall time, per-phase
+times derived from the requests the fakes received, request counts and
+the subprocess's peak memory. With --baseline, a report from an earlier
+run is compared and the command fails if the new one regressed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from .fake_services import FakeGitLab, FakeOpenAI, RecordedRequest
+from .synthetic import MergeRequestShape, generate_changes, parse_language_mix
+
+PROJECT_ID = 1
+MR_IID = 1
+
+# Variables from the caller's environment that would change what is reviewed
+_ISOLATED_PREFIXES = ("AI_REVIEWER_", "CI_", "GITLAB_", "OPENAI_")
+
+_FETCH_ROUTES = frozenset({"changes", "diffs"})
+_POST_ROUTES = frozenset({"list_discussions", "create_discussion", "create_note"})
+
+
+@dataclass
+class Scenario:
+    """Merge request shape and service behaviour for one benchmark."""
+
+    shape: MergeRequestShape = field(default_factory=MergeRequestShape)
+    gitlab_latency: float = 0.0
+    openai_latency: float = 0.0
+    gitlab_rate_limit: Optional[int] = None
+    openai_rate_limit: Optional[int] = None
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+def _span(requests: List[RecordedRequest]) -> float:
+    """Seconds from the first request's start to the last one's end."""
+    if not requests:
+        return 0.0
+    return max(r.end for r in requests) - min(r.start for r in requests)
+
+
+def phase_times(
+    started: float,
+    finished: float,
+    gitlab: List[RecordedRequest],
+    llm: List[RecordedRequest],
+) -> Dict[str, float]:
+    """Split a run into phases using the requests the fakes received.
+
+    Args:
+        started: Monotonic time the subprocess was started
+        finished: Monotonic time the subprocess exited
+        gitlab: Requests received by the fake GitLab
+        llm: Requests received by the fake OpenAI
+    Returns:
+        Seconds spent starting up, fetching the MR, reviewing, posting
+        comments and shutting down, plus the span of all LLM requests
+    """
+    if not gitlab:
+        return {"startup": finished - started}
+    first_gitlab = min(r.start for r in gitlab)
+    fetched = max(
+        (r.end for r in gitlab if r.route in _FETCH_ROUTES), default=first_gitlab
+    )
+    posting = [r for r in gitlab if r.route in _POST_ROUTES]
+    post_start = min((r.start for r in posting), default=fetched)
+    last = max(r.end for r in gitlab + llm)
+    return {
+        "startup": first_gitlab - started,
+        "fetch": fetched - first_gitlab,
+        "review": max(0.0, post_start - fetched),
+        "llm": _span(llm),
+        "post": _span(posting),
+        "shutdown": max(0.0, finished - last),
+    }
+
+
+def first_comment_time(started: float, gitlab: List[RecordedRequest]) -> float:
+    """Seconds from the start of a run until its first comment was posted.
+
+    Args:
+        started: Monotonic time the subprocess was started
+        gitlab: Requests received by the fake GitLab
+    Returns:
+        Time to the first posted comment; 0 if none was posted
+    """
+    posted = [
+        r.end for r in gitlab if r.route == "create_discussion" and r.status == 201
+    ]
+    return min(posted) - started if posted else 0.0
+
+
+def _request_counts(gitlab: FakeGitLab, llm: FakeOpenAI) -> Dict[str, int]:
+    """Count requests per route, and in total including throttled ones.
+
+    Throttled responses depend on timing, so they are only counted in the
+    totals and in their own counter.
+    """
+    counts: Dict[str, int] = {}
+    for prefix, service in (("gitlab", gitlab), ("openai", llm)):
+        counts[f"{prefix}_total"] = service.count()
+        counts[f"{prefix}_throttled"] = service.count(status=429)
+        for request in service.requests:
+            if request.status == 429:
+                continue
+            key = f"{prefix}_{request.route}"
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _environment(
+    gitlab: FakeGitLab, llm: FakeOpenAI, extra: Dict[str, str]
+) -> Dict[str, str]:
+    """Build an environment that points the reviewer at the fakes."""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(_ISOLATED_PREFIXES)
+    }
+    env.update(
+        {
+            "GITLAB_URL": gitlab.url,
+            "GITLAB_TOKEN": "benchmark-token",
+            "GITLAB_PROJECT_ID": str(PROJECT_ID),
+            "GITLAB_MR_IID": str(MR_IID),
+            "OPENAI_API_KEY": "benchmark-key",
+            "OPENAI_BASE_URL": f"{llm.url}/v1",
+        }
+    )
+    env.update(extra)
+    return env
+
+
+def run_once(
+    gitlab: FakeGitLab, llm: FakeOpenAI, env: Dict[str, str]
+) -> Dict[str, Any]:
+    """Review the fake merge request once in a subprocess.
+
+    Args:
+        gitlab: Running fake GitLab
+        llm: Running fake OpenAI
+        env: Extra environment variables for the reviewer
+    Returns:
+        Wall time, time to the first comment, phase times, request counts
+        and peak memory of the run
+    """
+    gitlab.reset()
+    llm.reset()
+    with tempfile.TemporaryFile() as log:
+        started = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "ai_reviewer"],
+            env=_environment(gitlab, llm, env),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        finished = time.monotonic()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            log.seek(0)
+            output = log.read().decode(errors="replace")[-2000:]
+            raise RuntimeError(f"Reviewer exited with {process.returncode}:\n{output}")
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "wall_time": finished - started,
+        "first_comment": first_comment_time(started, gitlab.requests),
+        "phases": phase_times(started, finished, gitlab.requests, llm.requests),
+        "requests": _request_counts(gitlab, llm),
+        "comments_posted": gitlab.count("create_discussion", status=201),
+        "peak_rss_mb": peak_rss / (1024 * 1024),
+    }
+
+
+def run_benchmark(scenario: Scenario, repeat: int = 1) -> Dict[str, Any]:
+    """Run a scenario several times and summarize the runs.
+
+    Args:
+        scenario: Merge request shape and service behaviour
+        repeat: Number of runs
+    Returns:
+        Report with every run and the median of each measurement
+    """
+    changes = generate_changes(scenario.shape)
+    runs = []
+    with (
+        FakeGitLab(
+            changes,
+            latency=scenario.gitlab_latency,
+            rate_limit=scenario.gitlab_rate_limit,
+        ) as gitlab,
+        FakeOpenAI(
+            latency=scenario.openai_latency, rate_limit=scenario.openai_rate_limit
+        ) as llm,
+    ):
+        for _ in range(repeat):
+            runs.append(run_once(gitlab, llm, scenario.env))
+
+    return {
+        "scenario": asdict(scenario),
+        "runs": runs,
+        "median": {
+            "wall_time": statistics.median(r["wall_time"] for r in runs),
+            "first_comment": statistics.median(r["first_comment"] for r in runs),
+            "peak_rss_mb": statistics.median(r["peak_rss_mb"] for r in runs),
+            "phases": {
+                phase: statistics.median(r["phases"].get(phase, 0.0) for r in runs)
+                for phase in runs[0]["phases"]
+            },
+        },
+        "requests": runs[-1]["requests"],
+    }
+
+
+def compare_to_baseline(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """List regressions of a report against a baseline report.
+
+    Wall time and peak memory may grow by tolerance (a fraction) before
+    counting as a regression. Request counts are deterministic for a
+    scenario, so any increase is a regression.
+
+    Args:
+        report: New report
+        baseline: Earlier report of the same scenario
+        tolerance: Allowed relative growth of time and memory
+    Returns:
+        Human readable regressions; empty if there are none
+    """
+    regressions = []
+    for metric in ("wall_time", "peak_rss_mb"):
+        old, new = baseline["median"][metric], report["median"][metric]
+        if new > old * (1 + tolerance):
+            regressions.append(f"{metric}: {old:.3f} -> {new:.3f}")
+    for name, old in baseline["requests"].items():
+        if name.endswith(("_throttled", "_total")):
+            continue
+        new = report["requests"].get(name, 0)
+        if new > old:
+            regressions.append(f"requests {name}: {old} -> {new}")
+    return regressions
+
+
+def _format_summary(report: Dict[str, Any]) -> str:
+    """Format the medians and request counts of a report."""
+    median = report["median"]
+    lines = [
+        f"wall time   {median['wall_time']:.3f}s",
+        f"first comment {median.get('first_comment', 0.0):.3f}s",
+        f"peak memory {median['peak_rss_mb']:.1f} MB",
+    ]
+    lines.extend(
+        f"  {phase:<9} {seconds:.3f}s" for phase, seconds in median["phases"].items()
+    )
+    lines.extend(
+        f"  {name:<28} {count}" for name, count in sorted(report["requests"].items())
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a benchmark from the command line.
+
+    Args:
+        argv: Command line arguments; defaults to sys.argv[1:]
+    Returns:
+        Exit code, 1 if the report regressed against the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=40, help="added lines per file")
+    parser.add_argument("--hunks", type=int, default=2, help="hunks per file")
+    parser.add_argument("--languages", default="python", help="e.g. python:3,go:1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gitlab-latency", type=float, default=0.0)
+    parser.add_argument("--openai-latency", type=float, default=0.0)
+    parser.add_argument("--gitlab-rate-limit", type=int, help="requests per second")
+    parser.add_argument("--openai-rate-limit", type=int, help="requests per second")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra reviewer environment variable, may be repeated",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative growth of time and memory (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    scenario = Scenario(
+        shape=MergeRequestShape(
+            files=args.files,
+            lines_per_file=args.lines,
+            hunks_per_file=args.hunks,
+            languages=parse_language_mix(args.languages),
+            seed=args.seed,
+        ),
+        gitlab_latency=args.gitlab_latency,
+        openai_latency=args.openai_latency,
+        gitlab_rate_limit=args.gitlab_rate_limit,
+        openai_rate_limit=args.openai_rate_limit,
+        env=dict(item.split("=", 1) for item in args.env),
+    )
+    report = run_benchmark(scenario, repeat=args.repeat)
+    print(_format_summary(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Deterministic generator of synthetic merge request changes."""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+# File extension and line templates per language; {n} is a unique number
+LANGUAGES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "python": (
+        "py",
+        (
+            "def handler_{n}(value):",
+            "    result = value * {n}",
+            "    if result > {n}:",
+            "        return compute(result, {n})",
+            "    logger.info('processed %s', result)",
+            "    return None",
+        ),
+    ),
+    "javascript": (
+        "js",
+        (
+            "function handler{n}(value) {{",
+            "  const result = value * {n};",
+            "  if (result > {n}) {{ return compute(result); }}",
+            "  console.log(`processed ${{result}}`);",
+            "  return null;",
+            "}}",
+        ),
+    ),
+    "go": (
+        "go",
+        (
+            "func handler{n}(value int) int {{",
+            "\tresult := value * {n}",
+            "\tif result > {n} {{",
+            "\t\treturn compute(result)",
+            "\t}}",
+            "\treturn 0",
+        ),
+    ),
+    "java": (
+        "java",
+        (
+            "public int handler{n}(int value) {{",
+            "    int result = value * {n};",
+            "    if (result > {n}) {{ return compute(result); }}",
+            '    LOG.info("processed {{}}", result);',
+            "    return 0;",
+            "}}",
+        ),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class MergeRequestShape:
+    """Size and content mix of a synthetic merge request."""
+
+    files: int = 20
+    lines_per_file: int = 40
+    hunks_per_file: int = 2
+    context_lines: int = 3
+    languages: Tuple[Tuple[str, int], ...] = (("python", 1),)
+    seed: int = 0
+
+
+def parse_language_mix(spec: str) -> Tuple[Tuple[str, int], ...]:
+    """Parse a language mix such as "python:3,go:1".
+
+    Args:
+        spec: Comma separated language names with optional integer weights
+    Returns:
+        Tuples of language name and weight
+    """
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in LANGUAGES:
+            raise ValueError(f"Unknown language {name!r}")
+        mix.append((name, int(weight or 1)))
+    return tuple(mix)
+
+
+def generate_changes(shape: MergeRequestShape) -> List[Dict[str, Any]]:
+    """Generate the file changes of a synthetic merge request.
+
+    The same shape always produces the same changes, so runs are
+    comparable across commits.
+
+    Args:
+        shape: Merge request size and language mix
+    Returns:
+        Changes in the format of GitLab's merge request changes API
+    """
+    rng = random.Random(shape.seed)
+    names = [name for name, _ in shape.languages]
+    weights = [weight for _, weight in shape.languages]
+    changes = []
+    for index in range(shape.files):
+        language = rng.choices(names, weights)[0]
+        extension, templates = LANGUAGES[language]
+        path = f"src/{language}/module_{index}.{extension}"
+        changes.append(
+            {
+                "old_path": path,
+                "new_path": path,
+                "new_file": False,
+                "deleted_file": False,
+                "renamed_file": False,
+                "diff": _generate_diff(rng, templates, shape),
+            }
+        )
+    return changes
+
+
+def _generate_diff(
+    rng: random.Random, templates: Tuple[str, ...], shape: MergeRequestShape
+) -> str:
+    """Generate a unified diff with evenly sized hunks."""
+    hunks = max(1, shape.hunks_per_file)
+    added_per_hunk = max(1, shape.lines_per_file // hunks)
+    lines: List[str] = []
+    old_start, shift = 1, 0
+
+    def line(prefix: str) -> str:
+        return prefix + rng.choice(templates).format(n=rng.randint(1, 10_000))
+
+    for _ in range(hunks):
+        old_start += rng.randint(5, 50)
+        removed = rng.randint(0, added_per_hunk // 2)
+        context = shape.context_lines
+        lines.append(
+            f"@@ -{old_start},{removed + 2 * context} "
+            f"+{old_start + shift},{added_per_hunk + 2 * context} @@"
+        )
+        lines.extend(line(" ") for _ in range(context))
+        lines.extend(line("-") for _ in range(removed))
+        lines.extend(line("+") for _ in range(added_per_hunk))
+        lines.extend(line(" ") for _ in range(context))
+        old_start += removed + 2 * context
+        shift += added_per_hunk - removed
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+"""Build a self-contained ai-reviewer.pyz that runs without an install step.
+
+Example:
+    python scripts/build_zipapp.py --output dist/ai-reviewer.pyz
+    python dist/ai-reviewer.pyz            # in a GitLab CI job
+
+The archive bundles the package and its dependencies with precompiled
+bytecode. Dependencies such as pydantic-core contain compiled extensions
+that cannot be imported from a zip file, so on first run the archive is
+extracted to a cache directory keyed by its build ID and later runs reuse
+it. Build with the same Python version and platform as the CI image.
+"""
+
+import argparse
+import compileall
+import hashlib
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+from typing import Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BOOTSTRAP = '''\
+"""Extract the bundled dependencies once and run the reviewer."""
+
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+
+BUILD_ID = {build_id!r}
+
+
+def _extract(archive):
+    """Return the cached site-packages for this build, extracting if needed."""
+    cache_root = os.environ.get("AI_REVIEWER_ZIPAPP_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "ai-reviewer"
+    )
+    target = os.path.join(cache_root, BUILD_ID)
+    if not os.path.exists(os.path.join(target, ".complete")):
+        os.makedirs(cache_root, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_root)
+        with zipfile.ZipFile(archive) as zf:
+            members = [n for n in zf.namelist() if n.startswith("site-packages/")]
+            zf.extractall(staging, members)
+        open(os.path.join(staging, ".complete"), "w").close()
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Another job extracted the same build first
+            shutil.rmtree(staging, ignore_errors=True)
+    return os.path.join(target, "site-packages")
+
+
+sys.path.insert(0, _extract(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_reviewer.main import main  # noqa: E402
+
+main()
+'''
+
+
+def install(site_packages: Path, no_deps: bool) -> None:
+    """Install the package and its dependencies into a directory."""
+    command = [
+        sys.executable,
+        "-m",
+        "pip",
+        "install",
+        "--quiet",
+        "--no-compile",
+        "--target",
+        str(site_packages),
+        str(ROOT),
+    ]
+    if no_deps:
+        command.append("--no-deps")
+    subprocess.check_call(command)
+    # Console scripts point at the build interpreter and are not needed
+    shutil.rmtree(site_packages / "bin", ignore_errors=True)
+
+
+def build_id(site_packages: Path) -> str:
+    """Hash the installed files so every distinct build gets its own cache."""
+    digest = hashlib.sha256(sys.version.encode())
+    for path in sorted(site_packages.rglob("*")):
+        if path.is_file():
+            digest.update(str(path.relative_to(site_packages)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def build(output: Path, no_deps: bool = False) -> str:
+    """Build the zipapp.
+
+    Args:
+        output: Path of the .pyz file to write
+        no_deps: Bundle only the package, relying on installed dependencies
+    Returns:
+        Build ID of the archive
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp) / "app"
+        site_packages = staging / "site-packages"
+        install(site_packages, no_deps)
+        identifier = build_id(site_packages)
+        # Unchecked hash-based pycs are used without comparing source mtimes,
+        # which extraction does not preserve
+        compileall.compile_dir(
+            str(site_packages),
+            quiet=1,
+            workers=0,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        (staging / "__main__.py").write_text(BOOTSTRAP.format(build_id=identifier))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        zipapp.create_archive(
+            staging,
+            target=output,
+            interpreter="/usr/bin/env python3",
+            compressed=True,
+        )
+    return identifier
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Build the zipapp from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="dist/ai-reviewer.pyz")
+    parser.add_argument(
+        "--no-deps",
+        action="store_true",
+        help="bundle only ai_reviewer and use the dependencies already installed",
+    )
+    args = parser.parse_args(argv)
+    identifier = build(Path(args.output), no_deps=args.no_deps)
+    size = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"Built {args.output} ({size:.1f} MB, build {identifier})")
+
+
+if __name__ == "__main__":
+    main()
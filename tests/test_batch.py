@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+from unittest.mock import Mock
+
+from ai_reviewer.batch import (
+    BatchItem,
+    BatchReviewer,
+    ProgressLog,
+    iter_open_merge_requests,
+    parse_args,
+)
+
+
+class RecordingReviewer:
+    """Reviewer stub that tracks how many reviews run at once."""
+
+    def __init__(
+        self,
+        delay: float = 0.02,
+        fail: Tuple[int, ...] = (),
+        incomplete: Tuple[int, ...] = (),
+    ) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.incomplete = incomplete
+        self.reviewed: List[Tuple[int, int]] = []
+        self.running: Dict[int, int] = {}
+        self.max_running = 0
+        self.max_per_project: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def process_merge_request(self, project_id: int, mr_iid: int) -> bool:
+        with self._lock:
+            self.running[project_id] = self.running.get(project_id, 0) + 1
+            self.max_running = max(self.max_running, sum(self.running.values()))
+            self.max_per_project[project_id] = max(
+                self.max_per_project.get(project_id, 0), self.running[project_id]
+            )
+        time.sleep(self.delay)
+        with self._lock:
+            self.running[project_id] -= 1
+            self.reviewed.append((project_id, mr_iid))
+        if mr_iid in self.fail:
+            raise SystemExit(1)
+        return mr_iid not in self.incomplete
+
+
+def make_mr(project_id: int, iid: int, sha: str = "abc", **attrs: Any) -> Any:
+    """Create a listed merge request."""
+    return SimpleNamespace(project_id=project_id, iid=iid, sha=sha, **attrs)
+
+
+def test_iter_open_merge_requests_dedupes_and_skips_drafts() -> None:
+    """Test that MRs listed by a project and its group are reviewed once."""
+    gl = Mock()
+    gl.projects.get.return_value.mergerequests.list.return_value = [
+        make_mr(1, 1),
+        make_mr(1, 2, draft=True),
+    ]
+    gl.groups.get.return_value.mergerequests.list.return_value = [
+        make_mr(1, 1),
+        make_mr(2, 7, title="Fix"),
+    ]
+
+    items = list(iter_open_merge_requests(gl, projects=["1"], groups=["team"]))
+
+    assert items == [BatchItem(1, 1, "abc"), BatchItem(2, 7, "abc", "Fix")]
+    gl.projects.get.assert_called_once_with("1", lazy=True)
+    gl.groups.get.assert_called_once_with("team", lazy=True)
+    gl.groups.get.return_value.mergerequests.list.assert_called_once_with(
+        state="opened", iterator=True
+    )
+
+
+def test_iter_open_merge_requests_includes_drafts() -> None:
+    """Test that drafts are listed when asked for."""
+    gl = Mock()
+    gl.projects.get.return_value.mergerequests.list.return_value = [
+        make_mr(1, 2, draft=True)
+    ]
+
+    items = list(iter_open_merge_requests(gl, projects=["1"], include_drafts=True))
+
+    assert items == [BatchItem(1, 2, "abc")]
+
+
+def test_batch_bounds_total_and_per_project_concurrency() -> None:
+    """Test that reviews run concurrently within both limits."""
+    reviewer = RecordingReviewer()
+    items = [BatchItem(1, iid, "a") for iid in range(6)] + [
+        BatchItem(2, iid, "a") for iid in range(3)
+    ]
+
+    summary = BatchReviewer(reviewer, max_workers=3, per_project=2).run(items)
+
+    assert len(summary.reviewed) == 9
+    assert not summary.failed
+    assert reviewer.max_running == 3
+    assert reviewer.max_per_project[1] == 2
+    assert max(reviewer.max_per_project.values()) <= 2
+
+
+def test_batch_records_failures_and_continues() -> None:
+    """Test that a failing review does not stop the batch."""
+    reviewer = RecordingReviewer(delay=0, fail=(2,))
+    items = [BatchItem(1, iid, "a") for iid in range(1, 4)]
+
+    summary = BatchReviewer(reviewer, max_workers=2).run(items)
+
+    assert [item.mr_iid for item in summary.failed] == [2]
+    assert sorted(item.mr_iid for item in summary.reviewed) == [1, 3]
+
+
+def test_incomplete_reviews_are_retried(tmp_path: Any) -> None:
+    """Test that a review that returns incomplete is recorded as failed."""
+    path = str(tmp_path / "progress.jsonl")
+    items = [BatchItem(1, 1, "a"), BatchItem(1, 2, "a")]
+
+    summary = BatchReviewer(
+        RecordingReviewer(delay=0, incomplete=(2,)), progress=ProgressLog(path)
+    ).run(items)
+
+    assert [item.mr_iid for item in summary.failed] == [2]
+    reviewer = RecordingReviewer(delay=0)
+    summary = BatchReviewer(reviewer, progress=ProgressLog(path)).run(items)
+    assert summary.skipped == 1
+    assert reviewer.reviewed == [(1, 2)]
+
+
+def test_batch_resumes_from_progress_file(tmp_path: Any) -> None:
+    """Test that reviewed versions are skipped and failed ones retried."""
+    path = str(tmp_path / "progress.jsonl")
+    items = [BatchItem(1, 1, "a"), BatchItem(1, 2, "a")]
+    BatchReviewer(
+        RecordingReviewer(delay=0, fail=(2,)), progress=ProgressLog(path)
+    ).run(items)
+    with open(path, "a") as f:
+        f.write('{"project_id": 1, "mr_iid"')  # cut off by an interruption
+
+    reviewer = RecordingReviewer(delay=0)
+    items.append(BatchItem(1, 1, "b"))  # new commits since the last run
+    summary = BatchReviewer(reviewer, progress=ProgressLog(path)).run(items)
+
+    assert summary.skipped == 1
+    assert sorted(reviewer.reviewed) == [(1, 1), (1, 2)]
+    with open(path) as f:
+        statuses = [json.loads(line)["status"] for line in f if line.endswith("}\n")]
+    assert statuses.count("reviewed") == 3
+
+
+def test_batch_stops_on_interrupt(mocker: Any) -> None:
+    """Test that an interrupt ends the run and is reported."""
+    mocker.patch("ai_reviewer.batch.wait", side_effect=KeyboardInterrupt)
+    reviewer = RecordingReviewer(delay=0)
+
+    summary = BatchReviewer(reviewer, max_workers=1).run(
+        [BatchItem(1, iid, "a") for iid in range(3)]
+    )
+
+    assert summary.interrupted
+    assert len(reviewer.reviewed) <= 1
+
+
+def test_parse_args() -> None:
+    """Test the batch command line."""
+    options = parse_args(["--project", "1", "--group", "team", "--workers", "8"])
+
+    assert options.projects == ["1"]
+    assert options.groups == ["team"]
+    assert options.workers == 8
+    assert options.per_project == 2
+    with pytest.raises(SystemExit):
+        parse_args(["--workers", "2"])
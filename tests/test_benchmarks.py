@@ -0,0 +1,96 @@
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.run import Scenario, compare_to_baseline, run_benchmark
+from benchmarks.synthetic import (
+    MergeRequestShape,
+    generate_changes,
+    parse_language_mix,
+)
+from ai_reviewer.diff_parser import ParsedDiff
+
+
+def test_generate_changes_is_deterministic() -> None:
+    """Test that a shape always produces the same merge request."""
+    shape = MergeRequestShape(
+        files=6, lines_per_file=12, hunks_per_file=3, languages=(("go", 1),)
+    )
+
+    changes = generate_changes(shape)
+
+    assert changes == generate_changes(shape)
+    assert len(changes) == 6
+    assert all(c["new_path"].endswith(".go") for c in changes)
+    parsed = ParsedDiff.parse(changes[0]["diff"])
+    assert len(parsed.hunks) == 3
+    added = list(parsed.added_lines(changes[0]["diff"]))
+    assert len(added) == 12
+    # Hunk headers agree with the lines that follow them
+    assert all(parsed.contains_new_line(line) for line, _ in added)
+
+
+def test_parse_language_mix() -> None:
+    """Test parsing weighted language mixes."""
+    assert parse_language_mix("python:3, go") == (("python", 3), ("go", 1))
+    with pytest.raises(ValueError):
+        parse_language_mix("cobol")
+
+
+def make_report(wall_time: float, posts: int) -> Dict[str, Any]:
+    """Create a minimal benchmark report.
+
+    Args:
+        wall_time: Median wall time
+        posts: Number of posted discussions
+    Returns:
+        Report with the fields compared against baselines
+    """
+    return {
+        "median": {"wall_time": wall_time, "peak_rss_mb": 50.0},
+        "requests": {
+            "gitlab_create_discussion": posts,
+            "gitlab_total": posts + 5,
+            "gitlab_throttled": 5,
+        },
+    }
+
+
+def test_compare_to_baseline() -> None:
+    """Test which differences count as regressions."""
+    baseline = make_report(1.0, 10)
+
+    assert compare_to_baseline(make_report(1.1, 10), baseline, 0.2) == []
+    assert compare_to_baseline(make_report(1.3, 10), baseline, 0.2) == [
+        "wall_time: 1.000 -> 1.300"
+    ]
+    assert compare_to_baseline(make_report(1.0, 11), baseline, 0.2) == [
+        "requests gitlab_create_discussion: 10 -> 11"
+    ]
+
+
+def test_run_benchmark_end_to_end() -> None:
+    """Test a full review of a synthetic MR against the fake services."""
+    scenario = Scenario(
+        shape=MergeRequestShape(files=3, lines_per_file=5),
+        gitlab_rate_limit=2,
+    )
+
+    report = run_benchmark(scenario)
+
+    run = report["runs"][0]
+    assert run["comments_posted"] == 3
+    assert 0 < run["first_comment"] <= run["wall_time"]
+    assert run["requests"]["openai_chat_completions"] == 1
+    assert run["requests"]["gitlab_diffs"] == 1
+    # The four requests that load the MR exceed two per second
+    assert run["requests"]["gitlab_throttled"] > 0
+    assert run["peak_rss_mb"] > 0
+    assert set(run["phases"]) == {
+        "startup",
+        "fetch",
+        "review",
+        "llm",
+        "post",
+        "shutdown",
+    }
@@ -0,0 +1,134 @@
+from typing import List, Optional
+
+from ai_reviewer.diff_compactor import DiffCompactor
+from ai_reviewer.diff_parser import ParsedDiff
+
+
+def context(start: int, count: int) -> List[str]:
+    """Unchanged lines numbered from start."""
+    return [f" line{n}" for n in range(start, start + count)]
+
+
+def new_lines(diff: str) -> List[Optional[int]]:
+    """New line number of each added line of a diff."""
+    parsed = ParsedDiff.parse(diff)
+    return [
+        parsed.new_line_at(offset)
+        for offset, line in enumerate(diff.splitlines())
+        if line.startswith("+")
+    ]
+
+
+def test_context_is_trimmed_to_radius() -> None:
+    """Test that far context is dropped and line numbers are kept."""
+    diff = "\n".join(
+        ["@@ -1,20 +1,21 @@"] + context(1, 10) + ["+added"] + context(11, 10)
+    )
+
+    compacted = DiffCompactor(context_lines=2).compact(diff)
+
+    assert compacted == "\n".join(
+        ["@@ -9,4 +9,5 @@", " line9", " line10", "+added", " line11", " line12"]
+    )
+    assert new_lines(compacted) == new_lines(diff) == [11]
+
+
+def test_changes_far_apart_get_separate_hunks() -> None:
+    """Test that trimmed context splits a hunk with correct headers."""
+    diff = "\n".join(
+        ["@@ -1,12 +1,12 @@", "-old", "+new"] + context(2, 10) + ["-gone"] + [" end"]
+    )
+
+    compacted = DiffCompactor(context_lines=1).compact(diff)
+
+    assert compacted is not None
+    assert compacted.splitlines() == [
+        "@@ -1,2 +1,2 @@",
+        "-old",
+        "+new",
+        " line2",
+        "@@ -11,3 +11,2 @@",
+        " line11",
+        "-gone",
+        " end",
+    ]
+    assert new_lines(compacted) == new_lines(diff)
+
+
+def test_whitespace_only_hunks_are_dropped() -> None:
+    """Test that whitespace changes within lines are not sent for review."""
+    diff = "\n".join(
+        [
+            "@@ -1,3 +1,3 @@",
+            "-if x:  return 1  ",
+            "+if x: return 1",
+            "+",
+            "@@ -10,1 +10,1 @@",
+            "-a = 1",
+            "+a = 2",
+        ]
+    )
+
+    compacted = DiffCompactor().compact(diff + "\n")
+
+    assert compacted == "@@ -10,1 +10,1 @@\n-a = 1\n+a = 2\n"
+    assert DiffCompactor().compact("@@ -1,1 +1,1 @@\n-x = 1\n+x  =  1") == ""
+    assert DiffCompactor().compact("@@ -1,1 +1,1 @@\n-a b\n+ab") != ""
+
+
+def test_indentation_changes_are_kept() -> None:
+    """Test that a dedent, which changes what Python code means, is reviewed."""
+    diff = "@@ -1,2 +1,2 @@\n for x in xs:\n-    total += x\n+total += x"
+
+    assert DiffCompactor().compact(diff) == diff
+
+
+def test_moved_blocks_are_collapsed() -> None:
+    """Test that code moved unchanged is replaced by notes."""
+    block = ["def helper():", "    value = compute()", "    return value"]
+    diff = "\n".join(
+        ["@@ -1,5 +1,1 @@", " start"]
+        + [f"-{line}" for line in block]
+        + ["-x = 1", "@@ -40,1 +36,5 @@", " middle"]
+        + [f"+{line}  " for line in block]
+        + ["+y = 2"]
+    )
+
+    compacted = DiffCompactor(context_lines=1).compact(diff)
+
+    assert compacted is not None
+    assert compacted.splitlines() == [
+        "\\ 3 lines moved to line 37",
+        "@@ -5,1 +1,0 @@",
+        "-x = 1",
+        "\\ 3 lines moved here unchanged from old line 2",
+        "@@ -40,0 +40,1 @@",
+        "+y = 2",
+    ]
+    assert new_lines(compacted) == [40] == new_lines(diff)[-1:]
+
+
+def test_reindented_blocks_are_not_moves() -> None:
+    """Test that a block moved into another indentation level is reviewed."""
+    block = ["if ready:", "    start()", "stop()"]
+    diff = "\n".join(
+        ["@@ -1,4 +1,1 @@", " start"]
+        + [f"-{line}" for line in block]
+        + ["@@ -40,1 +37,4 @@", " def run():"]
+        + [f"+    {line}" for line in block]
+    )
+
+    compacted = DiffCompactor(context_lines=1).compact(diff)
+
+    assert compacted is not None
+    assert "moved" not in compacted
+    assert new_lines(compacted) == new_lines(diff) == [38, 39, 40]
+
+
+def test_binary_and_minified_files_are_skipped() -> None:
+    """Test that files not worth reviewing compact to None."""
+    compactor = DiffCompactor(max_line_length=100)
+
+    assert compactor.compact("Binary files a/logo.png and b/logo.png differ\n") is None
+    assert compactor.compact("@@ -0,0 +1,1 @@\n+" + "a;" * 60) is None
+    assert compactor.compact("+x = 1") == "+x = 1"
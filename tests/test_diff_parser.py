@@ -0,0 +1,123 @@
+import pytest
+from typing import List, Optional
+
+from ai_reviewer.diff_parser import ParsedDiff
+
+DIFF = "\n".join(
+    [
+        "@@ -1,3 +1,4 @@ def main():",  # 0
+        " import os",  # 1
+        "-import sys",  # 2
+        "+import json",  # 3
+        "+import re",  # 4
+        " ",  # 5
+        "@@ -20,2 +21,2 @@",  # 6
+        "-    old()",  # 7
+        "+    new()",  # 8
+        "     done()",  # 9
+        "\\ No newline at end of file",  # 10
+    ]
+)
+
+
+def test_parse_hunks() -> None:
+    """Test that hunk headers are parsed with their diff line ranges."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert [
+        (h.old_start, h.old_count, h.new_start, h.new_count) for h in parsed.hunks
+    ] == [
+        (1, 3, 1, 4),
+        (20, 2, 21, 2),
+    ]
+    assert [(h.offset, h.end) for h in parsed.hunks] == [(0, 6), (6, 11)]
+    assert len(parsed) == 11
+
+
+line_map_test_cases = [
+    pytest.param(1, 1, 1, id="context"),
+    pytest.param(2, 2, None, id="removed"),
+    pytest.param(3, None, 2, id="added"),
+    pytest.param(0, None, None, id="header"),
+    pytest.param(9, 21, 22, id="second_hunk_context"),
+    pytest.param(10, None, None, id="no_newline_marker"),
+    pytest.param(99, None, None, id="out_of_range"),
+]
+
+
+@pytest.mark.parametrize("offset,old_line,new_line", line_map_test_cases)
+def test_line_maps(
+    offset: int, old_line: Optional[int], new_line: Optional[int]
+) -> None:
+    """Test mapping diff offsets to old and new file lines.
+
+    Args:
+        offset: Diff line index
+        old_line: Expected old-file line
+        new_line: Expected new-file line
+    """
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert parsed.old_line_at(offset) == old_line
+    assert parsed.new_line_at(offset) == new_line
+
+
+def test_hunk_lookup_and_nearest_line() -> None:
+    """Test hunk lookup and anchoring of removed lines and headers."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert parsed.hunk_at(4) is parsed.hunks[0]
+    assert parsed.hunk_at(7) is parsed.hunks[1]
+    assert parsed.nearest_new_line(2) == 2
+    assert parsed.nearest_new_line(6) == 21
+    assert parsed.is_added(8)
+    assert not parsed.is_added(9)
+
+
+def test_contains_new_line() -> None:
+    """Test which new-file lines can carry a diff comment."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    visible: List[int] = [line for line in range(30) if parsed.contains_new_line(line)]
+
+    assert visible == [1, 2, 3, 4, 21, 22]
+
+
+def test_first_added_line_in_range() -> None:
+    """Test finding the first added line in part of a diff."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert parsed.first_added_line() == 2
+    assert parsed.first_added_line(6) == 21
+    assert parsed.first_added_line(5, 7) is None
+
+
+def test_added_lines() -> None:
+    """Test iterating added lines with their new-file numbers."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert list(parsed.added_lines(DIFF)) == [
+        (2, "import json"),
+        (3, "import re"),
+        (21, "    new()"),
+    ]
+    # Context lines 1, 4 and 22 are shown but not added
+    assert parsed.added_new_lines() == {2, 3, 21}
+
+
+def test_fragment_without_hunk_header() -> None:
+    """Test indexing a plain code fragment."""
+    fragment = "x = 1\ny = 2"
+
+    assert list(ParsedDiff.parse(fragment).added_lines(fragment)) == []
+    parsed = ParsedDiff.parse(fragment, fragment_start=5)
+    assert list(parsed.added_lines(fragment)) == [(5, "x = 1"), (6, "y = 2")]
+    assert parsed.contains_new_line(6)
+
+
+def test_uses_slots() -> None:
+    """Test that the index does not carry a per-instance dict."""
+    parsed = ParsedDiff.parse(DIFF)
+
+    assert not hasattr(parsed, "__dict__")
+    assert not hasattr(parsed.hunks[0], "__dict__")
@@ -0,0 +1,102 @@
+from typing import Any, Optional
+
+from ai_reviewer.discussion_index import (
+    COMMENT_MARKER,
+    DiscussionIndex,
+    content_fingerprint,
+    fetch_discussion_index,
+)
+from ai_reviewer.review_strategies import ReviewComment
+
+
+def make_discussion(
+    mocker: Any,
+    body: str,
+    path: Optional[str] = "a.py",
+    line: Optional[int] = 1,
+    resolved: bool = False,
+) -> Any:
+    """Create a mock merge request discussion.
+
+    Args:
+        mocker: Pytest mocker fixture
+        body: Body of the first note
+        path: New path of the note position, or None for a general note
+        line: New line of the note position
+        resolved: Whether the discussion is resolved
+    Returns:
+        Mock discussion object
+    """
+    note = {"body": body, "resolved": resolved}
+    if path is not None:
+        note["position"] = {"new_path": path, "new_line": line}
+    discussion = mocker.Mock()
+    discussion.attributes = {"notes": [note]}
+    return discussion
+
+
+def test_fingerprint_ignores_whitespace_case_and_marker() -> None:
+    """Test that cosmetic differences do not change the fingerprint."""
+    assert content_fingerprint("Avoid  eval()\n") == content_fingerprint(
+        f"avoid eval()\n\n{COMMENT_MARKER}"
+    )
+
+
+def test_index_matches_by_path_line_and_content(mocker: Any) -> None:
+    """Test duplicate detection against existing discussions.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    index = DiscussionIndex.from_discussions(
+        [
+            make_discussion(mocker, f"Avoid eval()\n\n{COMMENT_MARKER}"),
+            make_discussion(mocker, "General note", path=None),
+        ]
+    )
+
+    assert len(index) == 1
+    assert index.contains(ReviewComment("a.py", 1, "Avoid eval()"))
+    assert not index.contains(ReviewComment("a.py", 2, "Avoid eval()"))
+    assert not index.contains(ReviewComment("b.py", 1, "Avoid eval()"))
+    assert not index.contains(ReviewComment("a.py", 1, "Avoid exec()"))
+
+
+def test_outdated_only_returns_our_open_discussions_on_reviewed_lines(
+    mocker: Any,
+) -> None:
+    """Test which discussions are reported as outdated.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    still_reported = make_discussion(mocker, f"Keep\n{COMMENT_MARKER}")
+    fixed = make_discussion(mocker, f"Fixed\n{COMMENT_MARKER}", line=5)
+    human = make_discussion(mocker, "Human comment", line=7)
+    resolved = make_discussion(mocker, f"Done\n{COMMENT_MARKER}", resolved=True)
+    other_file = make_discussion(mocker, f"Other\n{COMMENT_MARKER}", path="b.py")
+    unchecked = make_discussion(mocker, f"Unchecked\n{COMMENT_MARKER}", line=9)
+    index = DiscussionIndex.from_discussions(
+        [still_reported, fixed, human, resolved, other_file, unchecked]
+    )
+
+    outdated = index.outdated(
+        [ReviewComment("a.py", 1, "Keep")], {"a.py": {1, 5, 6, 7}}
+    )
+
+    assert outdated == [fixed]
+
+
+def test_fetch_discussion_index_paginates(mocker: Any) -> None:
+    """Test that discussions are fetched through the paginating iterator.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mock_mr = mocker.Mock()
+    mock_mr.discussions.list.return_value = iter([make_discussion(mocker, "x")])
+
+    index = fetch_discussion_index(mock_mr)
+
+    mock_mr.discussions.list.assert_called_once_with(iterator=True)
+    assert len(index) == 1
@@ -0,0 +1,54 @@
+from ai_reviewer.findings import FindingScanner, normalize_severity, parse_findings
+
+
+def test_parse_findings_repairs_fences_and_trailing_commas() -> None:
+    """Test that wrapped or sloppy JSON is repaired locally."""
+    content = (
+        "Here is the review:\n```json\n"
+        '{"findings": [{"path": "a.py", "line": 2, "comment": "x"},],}\n```'
+    )
+
+    assert parse_findings(content) == [{"path": "a.py", "line": 2, "comment": "x"}]
+    assert parse_findings('{"findings": []}') == []
+    assert parse_findings('{"path": "a.py", "comment": "x"}') == [
+        {"path": "a.py", "comment": "x"}
+    ]
+
+
+def test_parse_findings_keeps_complete_findings_of_cut_off_output() -> None:
+    """Test that output cut off by the token limit keeps whole findings."""
+    content = (
+        '{"findings": [{"path": "a.py", "comment": "use {} not dict()"}, '
+        '{"path": "b.py", "comm'
+    )
+
+    assert parse_findings(content) == [{"path": "a.py", "comment": "use {} not dict()"}]
+    assert parse_findings('{"findings": [{"path": "a.py"') == []
+
+
+def test_parse_findings_leaves_prose_alone() -> None:
+    """Test that text without JSON findings is not taken for JSON."""
+    assert parse_findings("Looks good.") is None
+    assert parse_findings("[nit] rename x") is None
+    assert parse_findings("Use {} instead of dict().") is None
+
+
+def test_scanner_finds_findings_as_they_complete() -> None:
+    """Test that findings are returned by the chunk that closes them."""
+    scanner = FindingScanner()
+    chunks = ['{"findings": [{"path": "a', '.py", "comment": "}\\""}, {"x": [1', "]}]}"]
+
+    assert [scanner.feed(chunk) for chunk in chunks] == [
+        [],
+        [{"path": "a.py", "comment": '}"'}],
+        [{"x": [1]}],
+    ]
+
+
+def test_normalize_severity() -> None:
+    """Test that severities map onto the known ones."""
+    assert normalize_severity("ERROR") == "error"
+    assert normalize_severity("high") == "error"
+    assert normalize_severity("medium") == "warning"
+    assert normalize_severity(None) == "info"
+    assert normalize_severity("unknown") == "info"
@@ -1,8 +1,21 @@
+import threading
 import pytest
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 import gitlab
-from ai_reviewer.gitlab_reviewer import GitLabReviewer
-from ai_reviewer.review_strategies import ReviewComment
+from ai_reviewer.gitlab_reviewer import CommentOutcome, CommentPoster, GitLabReviewer
+from ai_reviewer.llm_client import LLMClient
+from ai_reviewer.review_cache import ReviewCache
+from ai_reviewer.review_config import ReviewConfig
+from ai_reviewer.review_strategies import ReviewComment, StandardReviewStrategy
+
+
+def without_diffs_api(mock_gl: Any) -> None:
+    """Make a mocked GitLab behave like a version without the MR diffs API.
+
+    Args:
+        mock_gl: Mocked GitLab client
+    """
+    mock_gl.http_list.side_effect = gitlab.exceptions.GitlabHttpError(response_code=404)
 
 
 def create_test_comment(path: str, line: int, content: str) -> ReviewComment:
@@ -87,6 +100,7 @@ def test_process_merge_request(mocker: Any, test_case: Dict[str, Any]) -> None:
     mock_gl.projects.get.return_value = mock_project
     mock_project.mergerequests.get.return_value = mock_mr
     mock_mr.changes.return_value = mock_changes
+    without_diffs_api(mock_gl)
 
     # Mock GitLab class
     mock_gitlab = mocker.patch("gitlab.Gitlab")
@@ -297,3 +311,691 @@ def test_process_merge_request_error(mocker: Any) -> None:
     with pytest.raises(SystemExit) as exc_info:
         reviewer.process_merge_request(1, 100)
     assert exc_info.value.code == 1
+
+
+def create_incremental_reviewer(mocker: Any, last_sha: Any) -> Any:
+    """Create a reviewer with a mocked state store and GitLab client.
+
+    Args:
+        mocker: Pytest mocker fixture
+        last_sha: Head SHA the state store reports as last reviewed
+    Returns:
+        Tuple of reviewer, strategy, state store, project and merge request
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {
+            "GITLAB_URL": "https://gitlab.example.com",
+            "GITLAB_TOKEN": "test-token",
+        },
+    )
+    mock_gl = mocker.Mock()
+    mocker.patch("gitlab.Gitlab").return_value = mock_gl
+    mock_project = mocker.Mock()
+    mock_mr = mocker.Mock()
+    mock_mr.sha = "new-sha"
+    mock_mr.changes.return_value = {
+        "changes": [
+            {"new_path": "a.py", "diff": "@@ -1 +1,2 @@\n+a\n+b"},
+            {"new_path": "b.py", "diff": "@@ -1 +1 @@\n+c"},
+        ]
+    }
+    mock_gl.projects.get.return_value = mock_project
+    mock_project.mergerequests.get.return_value = mock_mr
+    without_diffs_api(mock_gl)
+
+    strategy = mocker.Mock()
+    strategy.review_changes.return_value = []
+    state_store = mocker.Mock()
+    state_store.load.return_value = last_sha
+
+    reviewer = GitLabReviewer([strategy], state_store=state_store)
+    return reviewer, strategy, state_store, mock_project, mock_mr
+
+
+def test_incremental_review_only_sends_new_changes(mocker: Any) -> None:
+    """Test that only files changed since the last reviewed SHA are reviewed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, project, mr = create_incremental_reviewer(
+        mocker, "old-sha"
+    )
+    project.repository_compare.return_value = {
+        "diffs": [
+            {"new_path": "a.py", "diff": "@@ -2 +2 @@\n+b"},
+            # Pulled in from the target branch by a rebase
+            {"new_path": "unrelated.py", "diff": "@@ -1 +1 @@\n+z"},
+        ]
+    }
+
+    assert reviewer.process_merge_request(1, 100) is True
+
+    project.repository_compare.assert_called_once_with("old-sha", "new-sha")
+    reviewed = strategy.review_changes.call_args.args[0]
+    assert [(c["new_path"], c["diff"], c["line"]) for c in reviewed] == [
+        ("a.py", "@@ -2 +2 @@\n+b", 2)
+    ]
+    state_store.save.assert_called_once_with(mr, "new-sha")
+
+
+def test_incremental_review_skips_rebased_hunks_in_mr_files(mocker: Any) -> None:
+    """Test that target branch edits to files of the MR are not reviewed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, project, mr = create_incremental_reviewer(
+        mocker, "old-sha"
+    )
+    project.repository_compare.return_value = {
+        "diffs": [
+            # Line 2 is in the MR diff; line 40 came in with the rebase
+            {"new_path": "a.py", "diff": "@@ -2 +2 @@\n-a\n+b\n@@ -40 +40 @@\n+z"},
+            {"new_path": "b.py", "diff": "@@ -30 +30 @@\n-x\n+y"},
+        ]
+    }
+
+    assert reviewer.process_merge_request(1, 100) is True
+
+    reviewed = strategy.review_changes.call_args.args[0]
+    assert [(c["new_path"], c["diff"]) for c in reviewed] == [
+        ("a.py", "@@ -2 +2 @@\n-a\n+b")
+    ]
+    state_store.save.assert_called_once_with(mr, "new-sha")
+
+
+def test_incremental_review_skips_already_reviewed_head(mocker: Any) -> None:
+    """Test that a head SHA that was already reviewed is not reviewed again.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, _, _ = create_incremental_reviewer(
+        mocker, "new-sha"
+    )
+
+    reviewer.process_merge_request(1, 100)
+
+    strategy.review_changes.assert_not_called()
+    state_store.save.assert_not_called()
+
+
+def test_incremental_review_falls_back_when_compare_fails(mocker: Any) -> None:
+    """Test that a missing old head results in a full review.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, _, project, _ = create_incremental_reviewer(
+        mocker, "force-pushed-sha"
+    )
+    project.repository_compare.side_effect = gitlab.exceptions.GitlabGetError(
+        "Not found", response_code=404
+    )
+
+    reviewer.process_merge_request(1, 100)
+
+    reviewed = strategy.review_changes.call_args.args[0]
+    assert [change["new_path"] for change in reviewed] == ["a.py", "b.py"]
+
+
+def test_incremental_review_only_resolves_discussions_on_new_hunks(
+    mocker: Any,
+) -> None:
+    """Test that an incremental review leaves lines it did not see alone.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, project, mr = create_incremental_reviewer(
+        mocker, "old-sha"
+    )
+    reviewer.resolve_outdated = True
+    project.repository_compare.return_value = {
+        "diffs": [{"new_path": "a.py", "diff": "@@ -2 +2 @@\n-b\n+B"}]
+    }
+
+    def make_discussion(body: str, line: int) -> Any:
+        discussion = mocker.Mock()
+        discussion.attributes = {
+            "notes": [
+                {
+                    "body": f"{body}\n\n<!-- ai-reviewer -->",
+                    "position": {"new_path": "a.py", "new_line": line},
+                }
+            ]
+        }
+        return discussion
+
+    fixed = make_discussion("Rename b", 2)
+    unchanged = make_discussion("Rename a", 1)
+    mr.discussions.list.return_value = [fixed, unchanged]
+
+    reviewer.process_merge_request(1, 100)
+
+    assert fixed.resolved is True
+    fixed.save.assert_called_once()
+    unchanged.save.assert_not_called()
+    state_store.save.assert_called_once_with(mr, "new-sha")
+
+
+def test_add_review_comments_reports_outcomes(mocker: Any) -> None:
+    """Test that throttled comments are retried and outcomes are reported.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {
+            "GITLAB_URL": "https://gitlab.example.com",
+            "GITLAB_TOKEN": "test-token",
+        },
+    )
+    mocker.patch("gitlab.Gitlab")
+    mocker.patch("ai_reviewer.rate_limit.time.sleep")
+    reviewer = GitLabReviewer([], max_post_workers=2)
+
+    def create(data: Dict[str, Any]) -> None:
+        if data["position"]["new_path"] == "bad.py":
+            raise gitlab.exceptions.GitlabCreateError("Bad", response_code=400)
+        if create_calls.count(data["position"]["new_path"]) == 0:
+            create_calls.append(data["position"]["new_path"])
+            raise gitlab.exceptions.GitlabCreateError("Too many", response_code=429)
+
+    create_calls: List[str] = []
+    mock_mr = mocker.Mock()
+    mock_mr.discussions.create.side_effect = create
+    comments = [
+        create_test_comment("ok.py", 1, "Comment 1"),
+        create_test_comment("bad.py", 2, "Comment 2"),
+    ]
+
+    outcomes = reviewer._add_review_comments(mock_mr, comments)
+
+    assert [outcome.comment for outcome in outcomes] == comments
+    assert outcomes[0].posted and outcomes[0].attempts == 2
+    assert not outcomes[1].posted and outcomes[1].attempts == 1
+    assert "Bad" in (outcomes[1].error or "")
+
+
+def test_existing_comments_are_not_posted_again(mocker: Any) -> None:
+    """Test that a rerun skips comments already on the MR and resolves fixed ones.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {
+            "GITLAB_URL": "https://gitlab.example.com",
+            "GITLAB_TOKEN": "test-token",
+        },
+    )
+    mock_gl = mocker.Mock()
+    mocker.patch("gitlab.Gitlab").return_value = mock_gl
+    mock_mr = mocker.Mock()
+    diff = "@@ -1,9 +1,10 @@\n+x" + "\n y" * 9
+    mock_mr.changes.return_value = {"changes": [{"new_path": "test.py", "diff": diff}]}
+    mock_gl.projects.get.return_value.mergerequests.get.return_value = mock_mr
+    without_diffs_api(mock_gl)
+
+    def make_discussion(body: str, line: int) -> Any:
+        discussion = mocker.Mock()
+        discussion.attributes = {
+            "notes": [
+                {
+                    "body": f"{body}\n\n<!-- ai-reviewer -->",
+                    "position": {"new_path": "test.py", "new_line": line},
+                }
+            ]
+        }
+        return discussion
+
+    fixed = make_discussion("Old finding", 9)
+    mock_mr.discussions.list.return_value = [make_discussion("Same finding", 1), fixed]
+
+    strategy = mocker.Mock()
+    strategy.review_changes.return_value = [
+        create_test_comment("test.py", 1, "Same finding"),
+        create_test_comment("test.py", 2, "New finding"),
+        create_test_comment("test.py", 2, "New finding"),
+    ]
+    reviewer = GitLabReviewer([strategy], resolve_outdated=True)
+
+    reviewer.process_merge_request(1, 100)
+
+    mock_mr.discussions.list.assert_called_once_with(iterator=True)
+    assert mock_mr.discussions.create.call_count == 1
+    posted = mock_mr.discussions.create.call_args.args[0]
+    assert posted["body"].startswith("New finding")
+    assert fixed.resolved is True
+    fixed.save.assert_called_once()
+
+
+def test_merge_request_changes_are_parsed(mocker: Any) -> None:
+    """Test that changes carry a parsed diff and their first changed line.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {
+            "GITLAB_URL": "https://gitlab.example.com",
+            "GITLAB_TOKEN": "test-token",
+        },
+    )
+    mocker.patch("gitlab.Gitlab")
+    reviewer = GitLabReviewer([])
+    mock_mr = mocker.Mock()
+    mock_mr.changes.return_value = {
+        "changes": [
+            {"new_path": "a.py", "diff": "@@ -10,2 +10,3 @@\n x\n+y\n z"},
+            {"new_path": "b.py", "diff": "@@ -4,2 +4,1 @@\n keep\n-gone"},
+        ]
+    }
+
+    changes = reviewer._get_merge_request_changes(mock_mr)
+
+    assert [change["line"] for change in changes] == [11, 4]
+    assert changes[0]["parsed"].new_line_at(2) == 11
+
+
+def test_failed_strategy_does_not_stop_review(mocker: Any) -> None:
+    """Test that one failing strategy does not exit or mark the head reviewed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, _, mock_mr = create_incremental_reviewer(
+        mocker, None
+    )
+    failing = mocker.Mock()
+    failing.review_changes.side_effect = RuntimeError("LLM down")
+    strategy.review_changes.return_value = [
+        create_test_comment("a.py", 1, "Security comment")
+    ]
+    mock_mr.discussions.list.return_value = []
+    reviewer.strategies = [failing, strategy]
+
+    assert reviewer.process_merge_request(1, 100) is False
+
+    assert mock_mr.discussions.create.call_count == 1
+    state_store.save.assert_not_called()
+
+
+def test_failed_llm_request_does_not_mark_head_reviewed(mocker: Any) -> None:
+    """Test that a batch the LLM never answered leaves the head unreviewed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, _, state_store, _, _ = create_incremental_reviewer(mocker, None)
+    create = mocker.AsyncMock(side_effect=Exception("Bad request"))
+    mocker.patch("openai.AsyncOpenAI").return_value.chat.completions.create = create
+    reviewer.strategies = [StandardReviewStrategy(LLMClient("test-key"))]
+
+    reviewer.process_merge_request(1, 100)
+
+    assert create.call_count >= 1
+    state_store.save.assert_not_called()
+
+
+def test_failed_post_does_not_mark_head_reviewed(mocker: Any) -> None:
+    """Test that a comment GitLab rejected leaves the head unreviewed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, state_store, _, mock_mr = create_incremental_reviewer(
+        mocker, None
+    )
+    strategy.review_changes.return_value = [create_test_comment("a.py", 1, "Fix")]
+    mock_mr.discussions.list.return_value = []
+    mock_mr.discussions.create.side_effect = gitlab.exceptions.GitlabCreateError(
+        "Bad", response_code=400
+    )
+
+    assert reviewer.process_merge_request(1, 100) is False
+
+    assert mock_mr.discussions.create.call_count == 1
+    state_store.save.assert_not_called()
+
+
+def test_review_metrics_are_exported(mocker: Any) -> None:
+    """Test that a review records its phases, including in worker threads.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, strategy, _, _, mock_mr = create_incremental_reviewer(mocker, None)
+    strategy.review_changes.return_value = [
+        create_test_comment("a.py", 1, "First"),
+        create_test_comment("a.py", 2, "Second"),
+    ]
+    mock_mr.discussions.list.return_value = []
+    exporter = mocker.Mock()
+    reviewer.metrics_exporter = exporter
+
+    reviewer.process_merge_request(1, 100)
+
+    review = exporter.export.call_args.args[0]
+    assert review.labels == {"project_id": 1, "mr_iid": 100}
+    phases = review.phases()
+    assert phases["fetch_changes"][0] == 1
+    assert phases["strategy"][0] == 1
+    assert phases["post_comment"][0] == 2
+    assert review.counters["comments_posted"] == 2
+
+
+def create_paginated_reviewer(
+    mocker: Any, entries: Any, review_config: Optional[ReviewConfig] = None
+) -> Any:
+    """Create a reviewer whose GitLab serves MR diffs through the diffs API.
+
+    Args:
+        mocker: Pytest mocker fixture
+        entries: Iterable returned by the paginated diffs API
+        review_config: Settings from .ai-reviewer.yml
+    Returns:
+        Tuple of reviewer, strategy, project and merge request
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {
+            "GITLAB_URL": "https://gitlab.example.com",
+            "GITLAB_TOKEN": "test-token",
+        },
+    )
+    mock_gl = mocker.Mock()
+    mocker.patch("gitlab.Gitlab").return_value = mock_gl
+    mock_project = mocker.Mock()
+    mock_mr = mocker.Mock()
+    mock_mr.project_id = 1
+    mock_mr.iid = 100
+    mock_mr.diff_refs = {"base_sha": "base", "head_sha": "head"}
+    mock_mr.discussions.list.return_value = []
+    mock_gl.projects.get.return_value = mock_project
+    mock_project.mergerequests.get.return_value = mock_mr
+    mock_gl.http_list.return_value = entries
+
+    strategy = mocker.Mock()
+    strategy.review_changes.return_value = []
+    reviewer = GitLabReviewer([strategy], diff_page_size=2, review_config=review_config)
+    return reviewer, strategy, mock_project, mock_mr
+
+
+def test_changes_are_reviewed_page_by_page_while_fetching(mocker: Any) -> None:
+    """Test that strategies start on the first page before the last is fetched.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    third_entry_fetched = threading.Event()
+    overlapped = []
+
+    def entries() -> Any:
+        for idx in range(5):
+            if idx == 2:
+                third_entry_fetched.set()
+            yield {"new_path": f"f{idx}.py", "diff": "@@ -1 +1 @@\n+x"}
+
+    def review(changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        if changes[0]["new_path"] == "f0.py":
+            # The next page is fetched while the first one is reviewed
+            overlapped.append(third_entry_fetched.wait(timeout=5))
+        return []
+
+    reviewer, strategy, _, mock_mr = create_paginated_reviewer(mocker, entries())
+    strategy.review_changes.side_effect = review
+
+    reviewer.process_merge_request(1, 100)
+
+    pages = [
+        [change["new_path"] for change in call.args[0]]
+        for call in strategy.review_changes.call_args_list
+    ]
+    assert pages == [["f0.py", "f1.py"], ["f2.py", "f3.py"], ["f4.py"]]
+    assert overlapped == [True]
+    mock_mr.changes.assert_not_called()
+    assert reviewer.gl.http_list.call_args.args[0] == (
+        "/projects/1/merge_requests/100/diffs"
+    )
+
+
+def test_too_large_diffs_are_fetched_as_raw_files(mocker: Any) -> None:
+    """Test that files without a diff are rebuilt from their raw versions.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    entries = [
+        {"new_path": "big.py", "old_path": "big.py", "diff": "", "too_large": True},
+        {"new_path": "new.py", "diff": "", "collapsed": True, "new_file": True},
+        {"new_path": "gone.py", "diff": "", "too_large": True, "deleted_file": True},
+        {"new_path": "logo.png", "diff": "", "too_large": True, "new_file": True},
+    ]
+    reviewer, strategy, mock_project, _ = create_paginated_reviewer(mocker, entries)
+    files = {
+        ("big.py", "base"): b"a\nb\nc\n",
+        ("big.py", "head"): b"a\nB\nc\n",
+        ("new.py", "head"): b"x\n",
+        ("logo.png", "head"): b"\x89PNG\xff",
+    }
+    mock_project.files.raw.side_effect = lambda file_path, ref: files[(file_path, ref)]
+
+    reviewer.process_merge_request(1, 100)
+
+    changes = [
+        change
+        for call in strategy.review_changes.call_args_list
+        for change in call.args[0]
+    ]
+    assert [change["new_path"] for change in changes] == ["big.py", "new.py"]
+    assert changes[0]["diff"] == "@@ -1,3 +1,3 @@\n a\n-b\n+B\n c"
+    assert changes[0]["line"] == 2
+    assert changes[1]["diff"] == "@@ -0,0 +1 @@\n+x"
+
+
+def test_truncated_changes_are_reported(mocker: Any, caplog: Any) -> None:
+    """Test the warning when GitLab without the diffs API truncates changes.
+
+    Args:
+        mocker: Pytest mocker fixture
+        caplog: Log capture fixture
+    """
+    reviewer, _, _, mock_mr = create_paginated_reviewer(mocker, [])
+    without_diffs_api(reviewer.gl)
+    mock_mr.changes.return_value = {
+        "changes": [{"new_path": "a.py", "diff": "+a"}],
+        "overflow": True,
+        "changes_count": "1000+",
+    }
+
+    changes = [
+        change
+        for page in reviewer._iter_change_pages(mocker.Mock(), mock_mr)
+        for change in page
+    ]
+
+    assert [change["new_path"] for change in changes] == ["a.py"]
+    assert "truncated the changes to 1 of 1000+ files" in caplog.text
+
+
+def test_fetch_errors_stop_the_review(mocker: Any) -> None:
+    """Test that an error while fetching a later page is not swallowed.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+
+    def entries() -> Any:
+        yield {"new_path": "a.py", "diff": "+a"}
+        yield {"new_path": "b.py", "diff": "+b"}
+        raise gitlab.exceptions.GitlabListError("page 2 failed")
+
+    reviewer, strategy, _, mock_mr = create_paginated_reviewer(mocker, entries())
+
+    with pytest.raises(SystemExit):
+        reviewer.process_merge_request(1, 100)
+
+    mock_mr.discussions.create.assert_not_called()
+
+
+def test_excluded_and_low_priority_files_are_not_reviewed(mocker: Any) -> None:
+    """Test that excludes and max_files_per_review apply before any strategy.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    entries = [
+        {"new_path": "package-lock.json", "diff": "@@ -1 +1 @@\n-a\n+b"},
+        {"new_path": "docs/guide.md", "diff": "@@ -1 +1 @@\n-a\n+b"},
+        {"new_path": "README.txt", "diff": "@@ -0,0 +1,3 @@\n+a\n+b\n+c"},
+        {"new_path": "src/auth.py", "diff": "@@ -1 +1 @@\n-a\n+b"},
+        {"new_path": "src/big.py", "diff": "@@ -0,0 +1,9 @@\n" + "+x\n" * 9},
+        {"new_path": "src/tiny.py", "diff": "@@ -1 +1 @@\n-a\n+b"},
+    ]
+    config = ReviewConfig(
+        max_files_per_review=2,
+        excluded_files=("*.md",),
+        review_comment_prefix="AI Review:",
+    )
+    reviewer, strategy, _, mock_mr = create_paginated_reviewer(mocker, entries, config)
+    strategy.review_changes.return_value = [
+        ReviewComment(path="src/auth.py", line=1, content="Check this")
+    ]
+
+    reviewer.process_merge_request(1, 100)
+
+    reviewed = [
+        change["new_path"]
+        for call in strategy.review_changes.call_args_list
+        for change in call.args[0]
+    ]
+    assert reviewed == ["src/auth.py", "src/big.py"]
+    body = mock_mr.discussions.create.call_args.args[0]["body"]
+    assert body.startswith("AI Review: Check this")
+
+
+def test_comments_are_posted_while_the_review_runs(mocker: Any) -> None:
+    """Test that a streamed comment is posted before its strategy finishes.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    reviewer, _, _, mock_mr = create_paginated_reviewer(
+        mocker,
+        [{"new_path": "a.py", "diff": "@@ -1 +1 @@\n+x"}],
+        review_config=ReviewConfig(review_comment_prefix="[AI]"),
+    )
+    first_posted = threading.Event()
+    mock_mr.discussions.create.side_effect = lambda data: first_posted.set()
+    posted_during_review = []
+
+    class StreamingLLM:
+        def analyze_code(
+            self, changes: List[Dict[str, Any]], on_comment: Any = None
+        ) -> List[ReviewComment]:
+            comments = [
+                create_test_comment("a.py", 1, "First"),
+                create_test_comment("a.py", 1, "First"),
+                create_test_comment("a.py", 1, "Second"),
+            ]
+            on_comment(comments[0])
+            posted_during_review.append(first_posted.wait(timeout=5))
+            on_comment(comments[1])
+            on_comment(comments[2])
+            return comments
+
+    reviewer.strategies = [StandardReviewStrategy(StreamingLLM())]
+
+    reviewer.process_merge_request(1, 100)
+
+    assert posted_during_review == [True]
+    bodies = [call.args[0]["body"] for call in mock_mr.discussions.create.mock_calls]
+    assert [body.split("\n")[0] for body in bodies] == ["[AI] First", "[AI] Second"]
+
+
+def test_comment_poster_drops_repeats_without_existing_discussions() -> None:
+    """Test that repeated comments are dropped when discussions are unknown."""
+    posted: List[ReviewComment] = []
+
+    def post(comment: ReviewComment) -> CommentOutcome:
+        posted.append(comment)
+        return CommentOutcome(comment, posted=True, attempts=1)
+
+    poster = CommentPoster(post, lambda: None, max_workers=1)
+    for content in ("Fix", "Fix", "Other"):
+        poster.submit(create_test_comment("a.py", 1, content))
+    outcomes = poster.close()
+
+    assert [outcome.comment.content for outcome in outcomes] == ["Fix", "Other"]
+    assert [comment.content for comment in posted] == ["Fix", "Other"]
+    assert poster.skipped == 1
+
+
+def test_comment_poster_applies_backpressure(mocker: Any) -> None:
+    """Test that submit blocks while the queue is full and order is kept.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    release = threading.Event()
+
+    def post(comment: ReviewComment) -> CommentOutcome:
+        release.wait(timeout=5)
+        return CommentOutcome(comment, posted=True, attempts=1)
+
+    poster = CommentPoster(post, lambda: None, max_workers=1, max_pending=1)
+    comments = [create_test_comment("a.py", line, "Comment") for line in range(3)]
+    submitted = threading.Event()
+
+    def submit_all() -> None:
+        for comment in comments:
+            poster.submit(comment)
+        submitted.set()
+
+    threading.Thread(target=submit_all, daemon=True).start()
+    # One comment is being posted and one waits in the queue
+    assert not submitted.wait(timeout=0.2)
+    release.set()
+    assert submitted.wait(timeout=5)
+
+    outcomes = poster.close()
+
+    assert [outcome.comment for outcome in outcomes] == comments
+
+
+def test_prefix_is_not_applied_twice_to_cached_comments(
+    mocker: Any, tmp_path: Any
+) -> None:
+    """Test that a cached review posts the same prefixed body on a rerun.
+
+    Args:
+        mocker: Pytest mocker fixture
+        tmp_path: Temporary directory for the review cache
+    """
+    reviewer, _, _, mock_mr = create_paginated_reviewer(
+        mocker,
+        [{"new_path": "a.py", "diff": "@@ -1 +1 @@\n+x"}],
+        review_config=ReviewConfig(review_comment_prefix="[AI]"),
+    )
+    choice = mocker.Mock()
+    choice.message = {
+        "content": '{"findings": [{"path": "a.py", "line": 1, "comment": "Fix it"}]}'
+    }
+    create = mocker.AsyncMock(return_value=mocker.Mock(choices=[choice]))
+    mocker.patch("openai.AsyncOpenAI").return_value.chat.completions.create = create
+    llm_client = LLMClient("test-key", cache=ReviewCache(str(tmp_path)))
+    reviewer.strategies = [StandardReviewStrategy(llm_client)]
+
+    reviewer.process_merge_request(1, 100)
+    reviewer.process_merge_request(1, 100)
+
+    assert create.call_count == 1
+    bodies = [call.args[0]["body"] for call in mock_mr.discussions.create.mock_calls]
+    assert [body.split("\n")[0] for body in bodies] == ["[AI] **Info:** Fix it"] * 2
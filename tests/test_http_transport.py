@@ -0,0 +1,106 @@
+import threading
+from typing import Any
+
+from benchmarks.fake_services import FakeGitLab, FakeOpenAI
+from ai_reviewer import metrics
+from ai_reviewer.http_transport import EventLoopThread, TransportConfig
+from ai_reviewer.llm_client import LLMClient
+from ai_reviewer.rate_limit import LLMRateLimiter
+
+
+def test_from_env(monkeypatch: Any) -> None:
+    """Test reading the transport settings from the environment."""
+    monkeypatch.setenv("AI_REVIEWER_HTTP_POOL_SIZE", "32")
+    monkeypatch.setenv("AI_REVIEWER_HTTP_KEEPALIVE", "0")
+    monkeypatch.setenv("AI_REVIEWER_HTTP_CONNECT_TIMEOUT", "2.5")
+    monkeypatch.setenv("AI_REVIEWER_HTTP_READ_TIMEOUT", "30")
+    monkeypatch.setenv("AI_REVIEWER_HTTP2", "true")
+
+    config = TransportConfig.from_env()
+
+    assert config == TransportConfig(
+        pool_size=32,
+        keepalive_seconds=0,
+        connect_timeout=2.5,
+        read_timeout=30,
+        http2=True,
+    )
+    assert config.timeout == (2.5, 30)
+
+
+def test_requests_session_reuses_connections() -> None:
+    """Test that GitLab requests share one kept-alive connection."""
+    session = TransportConfig().requests_session()
+
+    with FakeGitLab([]) as gitlab, metrics.collect() as review:
+        for _ in range(3):
+            session.get(f"{gitlab.url}/api/v4/user").raise_for_status()
+
+    assert review.counters == {
+        "gitlab_http_requests": 3,
+        "gitlab_connections_opened": 1,
+    }
+
+
+def test_requests_session_without_keepalive() -> None:
+    """Test that a keep-alive of 0 opens a connection per request."""
+    session = TransportConfig(keepalive_seconds=0).requests_session()
+
+    with FakeGitLab([]) as gitlab, metrics.collect() as review:
+        for _ in range(2):
+            session.get(f"{gitlab.url}/api/v4/user").raise_for_status()
+
+    assert review.counters["gitlab_connections_opened"] == 2
+
+
+def test_llm_client_reuses_connections_across_calls(monkeypatch: Any) -> None:
+    """Test that separate reviews share the LLM client's connection pool."""
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "line": 1}]
+
+    with FakeOpenAI() as llm:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{llm.url}/v1")
+        client = LLMClient("test-key", transport=TransportConfig())
+        with metrics.collect() as review:
+            for _ in range(3):
+                assert client.analyze_code(changes)
+
+    assert review.counters["llm_http_requests"] == 3
+    assert review.counters["llm_connections_opened"] == 1
+
+
+def test_event_loop_thread_runs_in_callers_context() -> None:
+    """Test that coroutines run on one loop and record into the caller's review."""
+    loop_thread = EventLoopThread()
+    loops = []
+
+    async def work(value: int) -> int:
+        loops.append(threading.current_thread().name)
+        metrics.add("calls")
+        return value * 2
+
+    with metrics.collect() as review:
+        assert loop_thread.run(work(1)) == 2
+        assert loop_thread.run(work(2)) == 4
+
+    assert review.counters == {"calls": 2}
+    assert loops == ["event-loop", "event-loop"]
+
+
+def test_llm_client_waits_out_rate_limits(monkeypatch: Any) -> None:
+    """Test that a rate limited API still reviews every file."""
+    changes = [
+        {"new_path": f"f{idx}.py", "diff": f"+x = {idx}", "line": 1} for idx in range(3)
+    ]
+
+    with FakeOpenAI(rate_limit=2, rate_window=0.5) as llm:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{llm.url}/v1")
+        client = LLMClient(
+            "test-key",
+            max_input_tokens=150,
+            transport=TransportConfig(),
+            rate_limiter=LLMRateLimiter(base_delay=0.05),
+        )
+        comments = client.analyze_code(changes)
+
+    assert sorted(c.path for c in comments) == ["f0.py", "f1.py", "f2.py"]
+    assert llm.count(status=429) >= 1
@@ -1,6 +1,20 @@
+import asyncio
+import json
 import pytest
-from typing import Any, Dict, List
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from openai.types.chat import ChatCompletion
+from ai_reviewer import metrics
+from ai_reviewer.diff_compactor import DiffCompactor
 from ai_reviewer.llm_client import LLMClient
+from ai_reviewer.rate_limit import LLMRateLimiter
+from ai_reviewer.resilience import (
+    CircuitBreaker,
+    IncompleteReviewError,
+    LatencyTracker,
+    LLMUnavailableError,
+)
+from ai_reviewer.review_cache import ReviewCache
 from ai_reviewer.review_strategies import ReviewComment
 
 
@@ -13,11 +27,11 @@ def mock_openai(mocker: Any) -> Any:
     Returns:
         Mock object for OpenAI API
     """
-    # Create a mock OpenAI client
+    # Create a mock async OpenAI client
     mock_openai_client = mocker.Mock()
-    mock_openai_instance = mocker.Mock()
+    mock_openai_instance = mocker.AsyncMock()
     mock_openai_client.return_value = mock_openai_instance
-    mocker.patch("openai.OpenAI", mock_openai_client)
+    mocker.patch("openai.AsyncOpenAI", mock_openai_client)
 
     # Create a mock response structure
     mock_choice = mocker.Mock()
@@ -62,13 +76,744 @@ def test_analyze_code_error_handling(mocker: Any) -> None:
     """
     # Mock the completions call to raise an exception
     mock_openai = mocker.Mock()
-    mock_instance = mocker.Mock()
+    mock_instance = mocker.AsyncMock()
     mock_openai.return_value = mock_instance
-    mocker.patch("openai.OpenAI", mock_openai)
+    mocker.patch("openai.AsyncOpenAI", mock_openai)
 
     mock_instance.chat.completions.create.side_effect = Exception("API Error")
     client = LLMClient("test-key")
     changes: List[Dict[str, Any]] = [{"new_path": "test.py", "diff": "code", "line": 1}]
 
-    comments: List[ReviewComment] = client.analyze_code(changes)
-    assert len(comments) == 0
+    with pytest.raises(IncompleteReviewError) as exc_info:
+        client.analyze_code(changes)
+    assert exc_info.value.comments == []
+
+
+def make_response(mocker: Any, content: str) -> Any:
+    """Create a mock chat completion response.
+
+    Args:
+        mocker: Pytest mocker fixture
+        content: Message content of the single choice
+    Returns:
+        Mock response object
+    """
+    choice = mocker.Mock()
+    choice.message = {"content": content}
+    response = mocker.Mock()
+    response.choices = [choice]
+    return response
+
+
+def test_analyze_code_reviews_files_concurrently_in_stable_order(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that files are reviewed in parallel and returned in input order.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    in_flight = 0
+    peak = 0
+
+    async def fake_create(**kwargs: Any) -> Any:
+        nonlocal in_flight, peak
+        content = kwargs["messages"][-1]["content"]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later files finish first to prove ordering does not follow completion
+        await asyncio.sleep(0.01 if "a.py" in content else 0)
+        in_flight -= 1
+        return make_response(mocker, content.split(":")[0])
+
+    mock_openai.side_effect = fake_create
+    # A budget that only fits one file per request
+    client = LLMClient("test-key", max_concurrency=2, max_input_tokens=150)
+    changes = [
+        {"new_path": name, "diff": "x = 1", "line": 1}
+        for name in ["a.py", "b.py", "c.py"]
+    ]
+
+    comments = client.analyze_code(changes)
+
+    assert [c.path for c in comments] == ["a.py", "b.py", "c.py"]
+    assert comments[0].content == "Review this code change in a.py"
+    assert mock_openai.call_count == 3
+    assert peak == 2
+
+
+def test_analyze_code_isolates_failed_requests(mocker: Any, mock_openai: Any) -> None:
+    """Test that one failing request does not drop the other files.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.side_effect = [
+        Exception("API Error"),
+        make_response(mocker, "Second file feedback"),
+    ]
+    client = LLMClient("test-key", max_concurrency=1, max_input_tokens=150)
+    changes = [
+        {"new_path": "first.py", "diff": "a", "line": 1},
+        {"new_path": "second.py", "diff": "b", "line": 1},
+    ]
+
+    with pytest.raises(IncompleteReviewError) as exc_info:
+        client.analyze_code(changes)
+
+    comments = exc_info.value.comments
+    assert len(comments) == 1
+    assert comments[0].path == "second.py"
+    assert comments[0].content == "Second file feedback"
+
+
+def test_analyze_code_parses_sdk_response_objects(mock_openai: Any) -> None:
+    """Test parsing responses returned by the OpenAI SDK, not dict mocks.
+
+    Args:
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.return_value = ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-3.5-turbo",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": " Looks good "},
+                }
+            ],
+        }
+    )
+    client = LLMClient("test-key")
+
+    comments = client.analyze_code([{"new_path": "a.py", "diff": "+x", "line": 1}])
+
+    assert comments == [ReviewComment(path="a.py", line=1, content="Looks good")]
+
+
+def test_analyze_code_records_token_usage(mocker: Any, mock_openai: Any) -> None:
+    """Test that token usage and request spans are added to the review metrics.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    response = make_response(mocker, "Looks good")
+    response.usage.prompt_tokens = 120
+    response.usage.completion_tokens = 15
+    mock_openai.return_value = response
+    client = LLMClient("test-key")
+
+    with metrics.collect() as review:
+        client.analyze_code([{"new_path": "a.py", "diff": "+x", "line": 1}])
+
+    assert review.counters == {"llm_prompt_tokens": 120, "llm_completion_tokens": 15}
+    assert review.spans[0].name == "llm_request"
+    assert review.spans[0].attributes["prompt_tokens"] == 120
+
+
+def test_invalid_max_concurrency() -> None:
+    """Test that a concurrency limit below one is rejected."""
+    with pytest.raises(ValueError):
+        LLMClient("test-key", max_concurrency=0)
+
+
+def test_analyze_code_packs_small_files_into_one_request(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that small diffs share a request and sections are split per file.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.return_value = make_response(
+        mocker, "### a.py\nRename x.\n### `b.py`\nLooks good."
+    )
+    client = LLMClient("test-key")
+    changes = [
+        {"new_path": "a.py", "diff": "x = 1", "line": 1},
+        {"new_path": "b.py", "diff": "y = 2", "line": 3},
+    ]
+
+    comments = client.analyze_code(changes)
+
+    assert mock_openai.call_count == 1
+    messages = mock_openai.call_args.kwargs["messages"]
+    assert '{"findings": [' in messages[0]["content"]
+    assert len(messages) == 3
+    assert comments == [
+        ReviewComment(path="a.py", line=1, content="Rename x."),
+        ReviewComment(path="b.py", line=3, content="Looks good."),
+    ]
+    assert client.last_plan is not None
+    assert client.last_plan.request_count == 1
+
+
+def test_packed_response_without_headings_goes_to_first_file(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test fallback when the model ignores the per-file heading format.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.return_value = make_response(mocker, "General feedback")
+    client = LLMClient("test-key")
+    changes = [
+        {"new_path": "a.py", "diff": "x = 1", "line": 1},
+        {"new_path": "b.py", "diff": "y = 2", "line": 1},
+    ]
+
+    comments = client.analyze_code(changes)
+
+    assert comments == [ReviewComment(path="a.py", line=1, content="General feedback")]
+
+
+def test_analyze_code_uses_cache(mocker: Any, mock_openai: Any, tmp_path: Any) -> None:
+    """Test that a repeated review of the same diff is served from the cache.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+        tmp_path: Pytest temporary directory fixture
+    """
+    cache = ReviewCache(str(tmp_path))
+    client = LLMClient("test-key", cache=cache)
+    changes = [{"new_path": "test.py", "diff": "@@ -1 +1 @@\n+x = 1", "line": 1}]
+    rebased = [{"new_path": "test.py", "diff": "@@ -9 +9 @@\n+x = 1", "line": 1}]
+
+    first = client.analyze_code(changes)
+    second = client.analyze_code(rebased)
+
+    assert [comment.line for comment in first] == [1]
+    # The cached comment moves with the rebased hunk
+    assert [comment.line for comment in second] == [9]
+    assert [c.content for c in first] == [c.content for c in second]
+    assert mock_openai.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_failed_requests_are_not_cached(mocker: Any, tmp_path: Any) -> None:
+    """Test that an API error does not store an empty review.
+
+    Args:
+        mocker: Pytest mocker fixture
+        tmp_path: Pytest temporary directory fixture
+    """
+    mock_openai = mocker.Mock()
+    mock_instance = mocker.AsyncMock()
+    mock_openai.return_value = mock_instance
+    mocker.patch("openai.AsyncOpenAI", mock_openai)
+    mock_instance.chat.completions.create.side_effect = Exception("API Error")
+
+    cache = ReviewCache(str(tmp_path))
+    client = LLMClient("test-key", cache=cache)
+    changes = [{"new_path": "test.py", "diff": "code", "line": 1}]
+
+    with pytest.raises(IncompleteReviewError):
+        client.analyze_code(changes)
+
+    assert cache.stats()["entries"] == 0
+
+
+class ThrottledError(Exception):
+    """Error carrying an HTTP status code, like the SDK's APIStatusError."""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def test_throttled_requests_are_retried(mocker: Any, mock_openai: Any) -> None:
+    """Test that a 429 is retried with backoff instead of losing the review.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.side_effect = [
+        ThrottledError(429),
+        ThrottledError(503),
+        make_response(mocker, "Retried feedback"),
+    ]
+    client = LLMClient("test-key", rate_limiter=LLMRateLimiter(base_delay=0.01))
+    changes = [{"new_path": "test.py", "diff": "code", "line": 1}]
+
+    with metrics.collect() as review:
+        comments = client.analyze_code(changes)
+
+    assert [c.content for c in comments] == ["Retried feedback"]
+    assert mock_openai.call_count == 3
+    assert review.counters["llm_retries"] == 2
+    assert review.spans[0].attributes["attempts"] == 3
+
+
+def test_client_errors_are_not_retried(mock_openai: Any) -> None:
+    """Test that requests the API rejected as invalid fail at once.
+
+    Args:
+        mock_openai: Mock OpenAI API fixture
+    """
+    mock_openai.side_effect = ThrottledError(400)
+    client = LLMClient("test-key", rate_limiter=LLMRateLimiter(base_delay=0.01))
+
+    with pytest.raises(IncompleteReviewError):
+        client.analyze_code([{"new_path": "a.py", "diff": "x", "line": 1}])
+    assert mock_openai.call_count == 1
+
+
+def test_compacted_diffs_keep_comment_lines(mock_openai: Any) -> None:
+    """Test that compacted diffs are sent and comments keep their lines.
+
+    Args:
+        mock_openai: Mock OpenAI API fixture
+    """
+    far_context = [f" line{n}" for n in range(1, 30)]
+    diff = "\n".join(["@@ -1,30 +1,31 @@"] + far_context + ["+added", " end"])
+    changes = [
+        {"new_path": "a.py", "diff": diff, "line": 1},
+        {
+            "new_path": "logo.png",
+            "diff": "Binary files a/logo.png and b/logo.png differ",
+        },
+    ]
+    client = LLMClient("test-key", compactor=DiffCompactor(context_lines=1))
+
+    with metrics.collect() as review:
+        comments = client.analyze_code(changes)
+
+    assert comments == [ReviewComment(path="a.py", line=30, content="Test feedback")]
+    prompt = mock_openai.call_args.kwargs["messages"][1]["content"]
+    assert "line5" not in prompt
+    assert "@@ -29,2 +29,3 @@" in prompt
+    assert review.counters["llm_tokens_saved"] > 0
+    assert review.counters["files_compacted_away"] == 1
+
+
+def test_reviewed_lines_leave_out_what_the_llm_is_not_sent() -> None:
+    """Test that summaries and compacted-away hunks count as not reviewed."""
+    client = LLMClient("test-key", compactor=DiffCompactor(context_lines=1))
+    diff = "@@ -1,3 +1,3 @@\n a\n-b\n+B\n c\n" "@@ -20,2 +20,2 @@\n-if x:  \n+if x:\n y"
+    change = {"new_path": "a.py", "diff": diff}
+
+    assert client.reviewed_lines(change) == {1, 2, 3}
+    assert client.reviewed_lines({**change, "review_depth": "summary"}) == set()
+
+
+def test_streamed_feedback_is_passed_on_per_file(mocker: Any, mock_openai: Any) -> None:
+    """Test that each file's section is passed on as soon as it is complete.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    received: List[ReviewComment] = []
+    received_while_streaming: List[List[str]] = []
+
+    def chunk(content: Optional[str], usage: Any = None) -> Any:
+        choices = [] if content is None else [make_delta(content)]
+        return SimpleNamespace(choices=choices, usage=usage)
+
+    def make_delta(content: str) -> Any:
+        return SimpleNamespace(delta=SimpleNamespace(content=content))
+
+    async def stream() -> Any:
+        for part in ["### a.py\nRen", "ame x.\n", "### b.py\n", "Looks good."]:
+            received_while_streaming.append([c.path for c in received])
+            yield chunk(part)
+        yield chunk(None, SimpleNamespace(prompt_tokens=40, completion_tokens=8))
+
+    mock_openai.side_effect = lambda **kwargs: stream()
+    client = LLMClient("test-key")
+    changes = [
+        {"new_path": "a.py", "diff": "x = 1", "line": 1},
+        {"new_path": "b.py", "diff": "y = 2", "line": 3},
+    ]
+
+    with metrics.collect() as review:
+        comments = client.analyze_code(changes, on_comment=received.append)
+
+    assert comments == [
+        ReviewComment(path="a.py", line=1, content="Rename x."),
+        ReviewComment(path="b.py", line=3, content="Looks good."),
+    ]
+    assert received == comments
+    # a.py was passed on once b.py's heading arrived, before the stream ended
+    assert received_while_streaming[-1] == ["a.py"]
+    assert mock_openai.call_args.kwargs["stream"] is True
+    assert review.counters["llm_prompt_tokens"] == 40
+
+
+def test_cherry_picked_hunks_reuse_earlier_reviews(
+    mocker: Any, mock_openai: Any, tmp_path: Any
+) -> None:
+    """Test that known hunks are re-anchored and only new hunks are sent.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+        tmp_path: Pytest temporary directory fixture
+    """
+    mock_openai.return_value = make_response(mocker, "Check the bounds.")
+    client = LLMClient("test-key", cache=ReviewCache(str(tmp_path)))
+    hunk = [" def first(items):", "-    return items[0]", "+    return items[1]"]
+    original = {
+        "new_path": "list.py",
+        "diff": "\n".join(["@@ -9,2 +9,2 @@"] + hunk),
+        "line": 10,
+        "project_id": 1,
+    }
+    client.analyze_code([original])
+
+    # The same change on another branch: moved, renamed and with a new hunk
+    backport = {
+        "new_path": "legacy/list.py",
+        "diff": "\n".join(
+            ["@@ -40,2 +42,2 @@"] + hunk + ["@@ -60,0 +62,1 @@", "+x = 1"]
+        ),
+        "line": 42,
+        "project_id": 1,
+    }
+    mock_openai.return_value = make_response(mocker, "Unused variable.")
+    with metrics.collect() as review:
+        comments = client.analyze_code([backport])
+
+    assert comments == [
+        ReviewComment(path="legacy/list.py", line=43, content="Check the bounds."),
+        ReviewComment(path="legacy/list.py", line=62, content="Unused variable."),
+    ]
+    prompt = mock_openai.call_args.kwargs["messages"][1]["content"]
+    assert "items[1]" not in prompt
+    assert "+x = 1" in prompt
+    assert review.counters["llm_hunks_reused"] == 1
+
+    # Other projects only see the hunk when reviews are shared
+    other_project = {
+        "new_path": "list.py",
+        "diff": "\n".join(["@@ -9,2 +9,2 @@"] + hunk + ["@@ -30,0 +31,1 @@", "+z = 3"]),
+        "line": 10,
+        "project_id": 2,
+    }
+    client.analyze_code([other_project])
+    assert mock_openai.call_count == 3
+    client.share_across_projects = True
+    third_project = dict(backport, project_id=3)
+    third_project["diff"] = third_project["diff"].replace("x = 1", "y = 2")
+    client.analyze_code([third_project])
+    assert mock_openai.call_count == 4
+    assert "items[1]" not in mock_openai.call_args.kwargs["messages"][1]["content"]
+
+
+def test_hunks_only_reuse_comments_on_their_own_lines(
+    mocker: Any, mock_openai: Any, tmp_path: Any
+) -> None:
+    """Test that a comment on one hunk is not reused for another one.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+        tmp_path: Pytest temporary directory fixture
+    """
+    client = LLMClient("test-key", cache=ReviewCache(str(tmp_path)))
+    risky = [" def run(data):", "-    return parse(data)", "+    return eval(data)"]
+    quiet = [" import sys", "+import json", " import time"]
+    first = {
+        "new_path": "a.py",
+        "diff": "\n".join(["@@ -1,3 +1,4 @@"] + quiet + ["@@ -20,2 +21,2 @@"] + risky),
+        "line": 2,
+        "project_id": 1,
+    }
+    mock_openai.return_value = make_response(
+        mocker,
+        '{"findings": [{"path": "a.py", "line": 22, "message": "eval is RCE"}]}',
+    )
+    assert client.analyze_code([first]) == [
+        ReviewComment(path="a.py", line=22, content="**Info:** eval is RCE")
+    ]
+
+    # The quiet hunk alone, elsewhere, reuses its own empty review
+    later = {
+        "new_path": "b.py",
+        "diff": "\n".join(["@@ -5,2 +5,3 @@"] + quiet),
+        "line": 6,
+        "project_id": 1,
+    }
+    assert client.analyze_code([later]) == []
+    assert mock_openai.call_count == 1
+
+
+def test_review_depth_picks_prompt_and_skips_files(mock_openai: Any) -> None:
+    """Test that summary-only files get a short prompt and skipped files none.
+
+    Args:
+        mock_openai: Mock OpenAI API fixture
+    """
+    context = [f" line{n}" for n in range(1, 10)]
+    diff = "\n".join(["@@ -1,9 +1,10 @@"] + context[:5] + ["+added"] + context[5:])
+    changes = [
+        {"new_path": "a.py", "diff": diff, "line": 1, "review_depth": "summary"},
+        {"new_path": "b.py", "diff": "+x = 1", "line": 1, "review_depth": "none"},
+    ]
+    client = LLMClient("test-key")
+
+    comments = client.analyze_code(changes)
+
+    assert comments == [ReviewComment(path="a.py", line=6, content="Test feedback")]
+    messages = mock_openai.call_args.kwargs["messages"]
+    assert len(messages) == 2
+    assert messages[1]["content"] == (
+        "In one or two sentences, summarize the risks of this code change in "
+        "a.py:\n@@ -5,0 +6,1 @@\n+added"
+    )
+
+
+def test_json_findings_become_comments_across_files(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that one response yields many placed comments in several files.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    findings = [
+        {"path": "a.py", "line": 3, "severity": "error", "comment": "Off by one."},
+        {"path": "`b/b.py`", "line": 11, "severity": "low", "comment": "Rename y."},
+        {"path": "a.py", "line": 99, "severity": "warning", "comment": "No test."},
+        {"path": "other.py", "line": 1, "comment": "Not reviewed."},
+    ]
+    # Cut off by the token limit after the last complete finding
+    content = json.dumps({"findings": findings})[:-30]
+    mock_openai.return_value = make_response(mocker, content)
+    changes = [
+        {
+            "new_path": "a.py",
+            "diff": "@@ -1,2 +1,3 @@\n x = 1\n+y = 2\n z = 3",
+            "line": 1,
+        },
+        {"new_path": "b.py", "diff": "@@ -10,1 +10,2 @@\n a\n+b", "line": 10},
+    ]
+
+    comments = LLMClient("test-key").analyze_code(changes)
+
+    # Line 3 is unchanged context and line 99 not in the diff, so both
+    # comments go to the added line
+    assert comments == [
+        ReviewComment(path="a.py", line=2, content="**Error:** Off by one."),
+        ReviewComment(path="a.py", line=2, content="**Warning:** No test."),
+        ReviewComment(path="b.py", line=11, content="**Info:** Rename y."),
+    ]
+    assert mock_openai.call_count == 1
+    kwargs = mock_openai.call_args.kwargs
+    assert kwargs["response_format"] == {"type": "json_object"}
+
+
+def test_streamed_json_findings_are_passed_on_when_complete(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that each JSON finding is passed on as soon as its object closes.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    received: List[ReviewComment] = []
+    received_while_streaming: List[int] = []
+    parts = [
+        '{"findings": [{"path": "a.py", "line": 1, "comment": "First."}',
+        ', {"path": "a.py", "line": 1, "comment": "Sec',
+        'ond."}]}',
+    ]
+
+    async def stream() -> Any:
+        for part in parts:
+            received_while_streaming.append(len(received))
+            delta = SimpleNamespace(delta=SimpleNamespace(content=part))
+            yield SimpleNamespace(choices=[delta], usage=None)
+
+    mock_openai.side_effect = lambda **kwargs: stream()
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "line": 1}]
+
+    comments = LLMClient("test-key").analyze_code(changes, on_comment=received.append)
+
+    assert [c.content for c in comments] == ["**Info:** First.", "**Info:** Second."]
+    assert received == comments
+    assert received_while_streaming == [0, 1, 1]
+
+
+def test_slow_requests_are_hedged(mocker: Any, mock_openai: Any) -> None:
+    """Test that a request slower than recent ones gets a duplicate.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    calls = 0
+
+    async def fake_create(**kwargs: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+        return make_response(mocker, f"Answer {calls}")
+
+    mock_openai.side_effect = fake_create
+    latency = LatencyTracker(min_samples=3)
+    for _ in range(3):
+        latency.observe(0.05)
+    client = LLMClient("test-key", latency=latency)
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "line": 1}]
+
+    with metrics.collect() as review:
+        comments = client.analyze_code(changes)
+
+    assert [c.content for c in comments] == ["Answer 2"]
+    assert review.counters["llm_hedged_requests"] == 1
+    assert review.counters["llm_hedge_wins"] == 1
+    assert review.duration < 1
+
+
+def test_hedged_streams_pass_on_only_the_winners_comments(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that a hedged streaming request posts one copy's findings.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    received: List[ReviewComment] = []
+    calls = 0
+
+    def chunk(part: str) -> Any:
+        delta = SimpleNamespace(delta=SimpleNamespace(content=part))
+        return SimpleNamespace(choices=[delta], usage=None)
+
+    def finding(text: str) -> Any:
+        return chunk(json.dumps({"path": "a.py", "line": 1, "comment": text}) + ",")
+
+    async def stream(copy: int) -> Any:
+        yield chunk('{"findings": [')
+        if copy == 1:
+            await asyncio.sleep(0.2)
+            yield finding("Wording 1 A")
+            await asyncio.sleep(5)
+        await asyncio.sleep(0.3)
+        yield finding(f"Wording {copy} A")
+        yield finding(f"Wording {copy} B")
+
+    def fake_create(**kwargs: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        return stream(calls)
+
+    mock_openai.side_effect = fake_create
+    latency = LatencyTracker(min_samples=3)
+    for _ in range(3):
+        latency.observe(0.05)
+    client = LLMClient("test-key", latency=latency)
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "line": 1}]
+
+    with metrics.collect() as review:
+        comments = client.analyze_code(changes, on_comment=received.append)
+
+    assert [c.content for c in comments] == [
+        "**Info:** Wording 2 A",
+        "**Info:** Wording 2 B",
+    ]
+    assert received == comments
+    assert review.counters["llm_hedge_wins"] == 1
+
+
+def test_every_reservation_is_settled(mocker: Any, mock_openai: Any) -> None:
+    """Test that both copies of a hedged request give back unused tokens.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    calls = 0
+
+    async def fake_create(**kwargs: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+        response = make_response(mocker, "Answer")
+        response.usage = SimpleNamespace(prompt_tokens=30, completion_tokens=5)
+        return response
+
+    mock_openai.side_effect = fake_create
+    latency = LatencyTracker(min_samples=3)
+    for _ in range(3):
+        latency.observe(0.05)
+    rate_limiter = LLMRateLimiter()
+    reserve = mocker.spy(rate_limiter, "reserve")
+    settle = mocker.spy(rate_limiter, "settle")
+    client = LLMClient("test-key", latency=latency, rate_limiter=rate_limiter)
+
+    client.analyze_code([{"new_path": "a.py", "diff": "+x = 1", "line": 1}])
+
+    assert reserve.call_count == 2
+    estimated = reserve.call_args.args[0]
+    assert settle.call_args_list == [mocker.call(estimated, 35)] * 2
+
+
+def test_short_circuited_requests_reserve_nothing(
+    mocker: Any, mock_openai: Any
+) -> None:
+    """Test that a request the circuit breaker refuses takes no tokens.
+
+    Args:
+        mocker: Pytest mocker fixture
+        mock_openai: Mock OpenAI API fixture
+    """
+    breaker = mocker.Mock(is_open=False)
+    breaker.allow.return_value = False
+    rate_limiter = LLMRateLimiter()
+    reserve = mocker.spy(rate_limiter, "reserve")
+    client = LLMClient("test-key", rate_limiter=rate_limiter, circuit_breaker=breaker)
+
+    with pytest.raises(IncompleteReviewError):
+        client.analyze_code([{"new_path": "a.py", "diff": "+x = 1", "line": 1}])
+
+    reserve.assert_not_called()
+    mock_openai.assert_not_called()
+
+
+def test_failing_api_opens_the_circuit(mock_openai: Any) -> None:
+    """Test that timeouts open the breaker and later reviews fail fast.
+
+    Args:
+        mock_openai: Mock OpenAI API fixture
+    """
+
+    async def never_answers(**kwargs: Any) -> Any:
+        await asyncio.sleep(5)
+
+    mock_openai.side_effect = never_answers
+    client = LLMClient(
+        "test-key",
+        request_timeout=0.05,
+        rate_limiter=LLMRateLimiter(max_retries=1, base_delay=0.01),
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "line": 1}]
+
+    with metrics.collect() as review:
+        with pytest.raises(LLMUnavailableError):
+            client.analyze_code(changes)
+        with pytest.raises(LLMUnavailableError):
+            client.analyze_code(changes)
+
+    assert mock_openai.call_count == 2
+    assert review.counters["llm_request_timeouts"] == 2
+    assert review.counters["llm_reviews_short_circuited"] == 1
@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import Mock
 import os
+import subprocess
 import sys
-from ai_reviewer.main import main
+from gitlab.exceptions import GitlabHttpError
+from ai_reviewer.main import build_reviewer, main
 
 
 @pytest.fixture
@@ -62,6 +64,8 @@ def test_gitlab_ci_variables(mock_environment, monkeypatch, mocker):
     mock_gl.projects.get.return_value = mock_project
     mock_project.mergerequests.get.return_value = mock_mr
     mock_mr.changes.return_value = mock_changes
+    # GitLab without the paginated MR diffs API
+    mock_gl.http_list.side_effect = GitlabHttpError(response_code=404)
 
     # Mock GitLab class
     mock_gitlab = mocker.patch("gitlab.Gitlab")
@@ -104,6 +108,8 @@ def test_local_environment_variables(mock_environment, monkeypatch, mocker):
     mock_gl.projects.get.return_value = mock_project
     mock_project.mergerequests.get.return_value = mock_mr
     mock_mr.changes.return_value = mock_changes
+    # GitLab without the paginated MR diffs API
+    mock_gl.http_list.side_effect = GitlabHttpError(response_code=404)
 
     # Mock GitLab class
     mock_gitlab = mocker.patch("gitlab.Gitlab")
@@ -125,3 +131,96 @@ def test_local_environment_variables(mock_environment, monkeypatch, mocker):
     # Verify GitLab interactions
     mock_gl.projects.get.assert_called_once_with(789)
     mock_project.mergerequests.get.assert_called_once_with(101)
+
+
+def test_serve_command(mock_environment, monkeypatch, mocker):
+    """Test that the serve command starts the webhook server."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("AI_REVIEWER_SERVER_PORT", "9000")
+    monkeypatch.setenv("AI_REVIEWER_WEBHOOK_SECRET", "secret")
+    reviewer = Mock()
+    mocker.patch("ai_reviewer.main.build_reviewer").return_value = reviewer
+    mock_server = mocker.patch("ai_reviewer.server.ReviewServer")
+
+    main(["serve"])
+
+    assert mock_server.call_args.args == (reviewer,)
+    assert mock_server.call_args.kwargs["port"] == 9000
+    assert mock_server.call_args.kwargs["secret"] == "secret"
+    mock_server.return_value.serve_forever.assert_called_once()
+
+
+def test_startup_profile(mock_environment, capsys):
+    """Test that --startup-profile reports import times without any config."""
+    main(["--startup-profile"])
+
+    output = capsys.readouterr().out
+    assert output.startswith("Startup profile (ms):")
+    assert "openai" in output
+    assert "deferred imports" in output
+
+
+def test_cli_startup_does_not_import_heavy_dependencies():
+    """Test that importing the CLI leaves openai, gitlab and yaml unloaded."""
+    code = (
+        "import sys, ai_reviewer.main\n"
+        "print([m for m in ('openai', 'gitlab', 'yaml') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    assert result.stdout.strip() == "[]"
+
+
+def test_batch_command(mock_environment, monkeypatch, mocker):
+    """Test that the batch command reviews with the state store enabled."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    build_reviewer = mocker.patch("ai_reviewer.main.build_reviewer")
+    run_batch = mocker.patch("ai_reviewer.batch.run_batch")
+    run_batch.return_value.interrupted = False
+    run_batch.return_value.failed = [Mock()]
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["batch", "--group", "team", "--per-project", "1"])
+
+    assert exc_info.value.code == 1
+    build_reviewer.assert_called_once_with("test-key", incremental=True)
+    options = run_batch.call_args.args[1]
+    assert options.groups == ["team"]
+    assert options.per_project == 1
+
+
+def test_review_config_selects_strategies(
+    mock_environment, monkeypatch, mocker, tmp_path
+):
+    """Test that .ai-reviewer.yml decides which strategies are built."""
+    config = tmp_path / "review.yml"
+    config.write_text("review_strategies: [security]\n")
+    monkeypatch.setenv("AI_REVIEWER_CONFIG", str(config))
+    reviewer = mocker.patch("ai_reviewer.gitlab_reviewer.GitLabReviewer")
+    standard = mocker.patch("ai_reviewer.review_strategies.StandardReviewStrategy")
+    security = mocker.patch("ai_reviewer.review_strategies.SecurityReviewStrategy")
+
+    build_reviewer("test-key")
+
+    standard.assert_not_called()
+    assert reviewer.call_args.args[0] == [security.return_value]
+    assert reviewer.call_args.kwargs["review_config"].review_strategies == ("security",)
+
+
+def test_risk_triage_is_opt_in(mock_environment, monkeypatch, mocker):
+    """Test that files are only triaged when AI_REVIEWER_RISK_TRIAGE is set."""
+    monkeypatch.delenv("AI_REVIEWER_RISK_TRIAGE", raising=False)
+    reviewer = mocker.patch("ai_reviewer.gitlab_reviewer.GitLabReviewer")
+
+    build_reviewer("test-key")
+    assert reviewer.call_args.kwargs["risk_scorer"] is None
+
+    monkeypatch.setenv("AI_REVIEWER_RISK_TRIAGE", "true")
+    build_reviewer("test-key")
+    assert reviewer.call_args.kwargs["risk_scorer"] is not None
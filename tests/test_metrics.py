@@ -0,0 +1,141 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from ai_reviewer import metrics
+from ai_reviewer.metrics import MetricsExporter, ReviewMetrics
+
+
+def test_spans_and_counters_outside_a_review_are_ignored() -> None:
+    """Test that instrumented code runs normally without a collector."""
+    with metrics.span("fetch_changes") as span:
+        span.attributes["files"] = 1
+    metrics.add("comments_posted")
+
+
+def test_collect_records_spans_from_worker_threads() -> None:
+    """Test that bound functions record into the submitting review."""
+
+    def work(value: int) -> int:
+        with metrics.span("post_comment", value=value):
+            metrics.add("comments_posted")
+        return value
+
+    with metrics.collect(project_id=1, mr_iid=2) as review:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(metrics.bind(work), range(5)))
+        # A second review in another thread does not see this one's spans
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(work, 99).result()
+
+    assert results == list(range(5))
+    assert review.labels == {"project_id": 1, "mr_iid": 2}
+    assert sorted(s.attributes["value"] for s in review.spans) == list(range(5))
+    assert review.counters == {"comments_posted": 5}
+    assert review.phases()["post_comment"][0] == 5
+    assert review.duration >= 0
+
+
+def make_review() -> ReviewMetrics:
+    """Create the metrics of a finished review.
+
+    Returns:
+        Review metrics with two phases and token counters
+    """
+    review = ReviewMetrics(project_id=1, mr_iid=2)
+    with review.span("llm_request", files=2):
+        pass
+    with review.span("post_comment", path="a.py"):
+        pass
+    with review.span("post_comment", path="b.py"):
+        pass
+    review.add("llm_prompt_tokens", 120)
+    review.add("comments_posted", 2)
+    review.finish()
+    return review
+
+
+def test_export_json_lines(tmp_path: Any) -> None:
+    """Test that every span and the review totals are appended as JSON lines.
+
+    Args:
+        tmp_path: Temporary directory fixture
+    """
+    path = tmp_path / "metrics.jsonl"
+    exporter = MetricsExporter(json_lines_path=str(path))
+
+    exporter.export(make_review())
+    exporter.export(make_review())
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 8
+    assert lines[0]["type"] == "span"
+    assert lines[0]["name"] == "llm_request"
+    assert lines[0]["files"] == 2
+    assert lines[0]["mr_iid"] == 2
+    assert lines[3]["type"] == "review"
+    assert lines[3]["llm_prompt_tokens"] == 120
+
+
+def test_export_prometheus_accumulates_reviews(tmp_path: Any) -> None:
+    """Test the Prometheus textfile totals across reviews.
+
+    Args:
+        tmp_path: Temporary directory fixture
+    """
+    path = tmp_path / "ai_reviewer.prom"
+    exporter = MetricsExporter(prometheus_path=str(path))
+
+    exporter.export(make_review())
+    exporter.export(make_review())
+
+    text = path.read_text()
+    assert "ai_reviewer_reviews_total 2\n" in text
+    assert 'ai_reviewer_phase_calls_total{phase="post_comment"} 4\n' in text
+    assert "ai_reviewer_llm_prompt_tokens_total 240\n" in text
+    assert "# TYPE ai_reviewer_comments_posted_total counter\n" in text
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_export_summary_line(caplog: Any, tmp_path: Any) -> None:
+    """Test the one-line summary and that write errors do not raise.
+
+    Args:
+        caplog: Log capture fixture
+        tmp_path: Temporary directory fixture
+    """
+    exporter = MetricsExporter(
+        json_lines_path=str(tmp_path / "missing" / "metrics.jsonl"),
+        log_summary=True,
+    )
+
+    with caplog.at_level(logging.INFO):
+        exporter.export(make_review())
+
+    assert "Failed to write review metrics" in caplog.text
+    summary = [r.message for r in caplog.records if "Review metrics" in r.message]
+    assert len(summary) == 1
+    assert "post_comment=" in summary[0]
+    assert "(2)" in summary[0]
+    assert "llm_prompt_tokens=120" in summary[0]
+
+
+def test_counters_keep_their_precision(tmp_path: Any) -> None:
+    """Test that large and fractional counters are written exactly.
+
+    Args:
+        tmp_path: Temporary directory fixture
+    """
+    path = tmp_path / "ai_reviewer.prom"
+    exporter = MetricsExporter(prometheus_path=str(path))
+    review = ReviewMetrics()
+    review.add("llm_prompt_tokens", 12345678)
+    review.add("llm_throttle_seconds", 0.125)
+
+    exporter.export(review)
+
+    text = path.read_text()
+    assert "ai_reviewer_llm_prompt_tokens_total 12345678\n" in text
+    assert "ai_reviewer_llm_throttle_seconds_total 0.125\n" in text
+    assert "llm_prompt_tokens=12345678" in exporter.summary(review)
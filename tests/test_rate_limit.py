@@ -0,0 +1,243 @@
+import pytest
+from typing import Any, List
+
+import gitlab
+from ai_reviewer.rate_limit import (
+    GitLabRateLimiter,
+    LLMRateLimiter,
+    parse_reset_duration,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Clock whose time only advances when sleep is called."""
+
+    def __init__(self) -> None:
+        """Start the clock at a fixed time."""
+        self.now = 1000.0
+        self.sleeps: List[float] = []
+
+    def time(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Record the sleep and advance the clock."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock: FakeClock, **kwargs: Any) -> GitLabRateLimiter:
+    """Create a limiter driven by a fake clock.
+
+    Args:
+        clock: Fake clock
+        **kwargs: Extra limiter settings
+    Returns:
+        Rate limiter instance
+    """
+    return GitLabRateLimiter(sleep=clock.sleep, clock=clock.time, **kwargs)
+
+
+def make_response(mocker: Any, status: int, headers: Any) -> Any:
+    """Create a mock HTTP response.
+
+    Args:
+        mocker: Pytest mocker fixture
+        status: HTTP status code
+        headers: Response headers
+    Returns:
+        Mock response object
+    """
+    response = mocker.Mock()
+    response.status_code = status
+    response.headers = headers
+    return response
+
+
+retry_after_test_cases = [
+    pytest.param("5", 5.0, id="seconds"),
+    pytest.param("Thu, 01 Jan 1970 00:16:50 GMT", 10.0, id="http_date"),
+    pytest.param("soon", None, id="invalid"),
+]
+
+
+@pytest.mark.parametrize("value,expected", retry_after_test_cases)
+def test_parse_retry_after(value: str, expected: Any) -> None:
+    """Test parsing of Retry-After header values.
+
+    Args:
+        value: Header value
+        expected: Expected delay in seconds
+    """
+    assert parse_retry_after(value, now=1000.0) == expected
+
+
+def test_observed_retry_after_pauses_all_callers(mocker: Any) -> None:
+    """Test that a 429 with Retry-After delays the next call.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+
+    limiter.observe(make_response(mocker, 429, {"Retry-After": "3"}))
+    limiter.call(lambda: None)
+
+    assert clock.sleeps == [3.0]
+
+
+def test_exhausted_rate_limit_waits_for_reset(mocker: Any) -> None:
+    """Test that RateLimit-Remaining of zero waits until RateLimit-Reset.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+
+    limiter.observe(
+        make_response(
+            mocker, 201, {"RateLimit-Remaining": "0", "RateLimit-Reset": "1007"}
+        )
+    )
+    limiter.wait()
+
+    assert clock.sleeps == [7.0]
+
+
+def test_call_retries_throttled_requests(mocker: Any) -> None:
+    """Test that 429 errors are retried until the call succeeds.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    clock = FakeClock()
+    limiter = make_limiter(clock, base_delay=1.0)
+    func = mocker.Mock(
+        side_effect=[
+            gitlab.exceptions.GitlabCreateError("Too many", response_code=429),
+            gitlab.exceptions.GitlabCreateError("Unavailable", response_code=503),
+            "created",
+        ]
+    )
+
+    assert limiter.call(func) == "created"
+    assert func.call_count == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_call_does_not_retry_client_errors(mocker: Any) -> None:
+    """Test that errors other than throttling and server errors are raised.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    func = mocker.Mock(
+        side_effect=gitlab.exceptions.GitlabCreateError("Bad", response_code=400)
+    )
+
+    with pytest.raises(gitlab.exceptions.GitlabCreateError):
+        limiter.call(func)
+    assert func.call_count == 1
+
+
+def test_call_gives_up_after_max_retries(mocker: Any) -> None:
+    """Test that persistent throttling eventually raises.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    clock = FakeClock()
+    limiter = make_limiter(clock, max_retries=2)
+    func = mocker.Mock(
+        side_effect=gitlab.exceptions.GitlabCreateError("Too many", response_code=429)
+    )
+
+    with pytest.raises(gitlab.exceptions.GitlabCreateError):
+        limiter.call(func)
+    assert func.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m0.5s", 3720.5), ("x", None)],
+)
+def test_parse_reset_duration(value: str, expected: Any) -> None:
+    """Test parsing of OpenAI x-ratelimit-reset-* header values."""
+    assert parse_reset_duration(value) == expected
+
+
+def test_llm_limiter_queues_requests_beyond_the_limit() -> None:
+    """Test that reservations past the request limit wait their turn."""
+    clock = FakeClock()
+    limiter = LLMRateLimiter(requests_per_minute=60, clock=clock.time)
+
+    delays = [limiter.reserve(10) for _ in range(62)]
+
+    # A full bucket lets 60 through, then one request per second is queued
+    assert delays[:60] == [0.0] * 60
+    assert delays[60:] == pytest.approx([1.0, 2.0])
+
+
+def test_llm_limiter_learns_limits_from_headers() -> None:
+    """Test that response headers set the limits and remaining budget."""
+    clock = FakeClock()
+    limiter = LLMRateLimiter(clock=clock.time)
+    assert limiter.reserve(1000) == 0.0
+
+    limiter.observe(
+        200,
+        {
+            "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-requests": "599",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "2s",
+        },
+    )
+
+    # No tokens left: wait for the reset, which also covers the refill
+    assert limiter.reserve(100) == pytest.approx(2.0)
+    clock.sleep(2.0)
+    # 200 tokens refilled at 100/s, 100 of them already reserved
+    assert limiter.reserve(300) == pytest.approx(2.0)
+
+
+def test_llm_limiter_settle_returns_unused_tokens() -> None:
+    """Test that tokens reserved but not used are given back."""
+    clock = FakeClock()
+    limiter = LLMRateLimiter(tokens_per_minute=600, clock=clock.time)
+
+    limiter.reserve(600)
+    limiter.settle(600, 100)
+
+    assert limiter.reserve(500) == 0.0
+
+
+def test_llm_limiter_backoff_honours_retry_after() -> None:
+    """Test that a 429's Retry-After holds every caller and sets the backoff."""
+    clock = FakeClock()
+    limiter = LLMRateLimiter(base_delay=0.5, clock=clock.time)
+
+    limiter.observe(429, {"retry-after": "7"})
+
+    assert limiter.backoff(0) == 7.0
+    assert limiter.reserve(1) == 7.0
+    assert 0.25 <= LLMRateLimiter(base_delay=0.5).backoff(0) <= 0.5
+
+
+def test_llm_limiter_shares_state_through_file(tmp_path: Any) -> None:
+    """Test that limiters in different processes share one budget."""
+    clock = FakeClock()
+    path = str(tmp_path / "limits.json")
+    first = LLMRateLimiter(requests_per_minute=2, state_path=path, clock=clock.time)
+    second = LLMRateLimiter(requests_per_minute=2, state_path=path, clock=clock.time)
+
+    assert first.reserve(1) == 0.0
+    assert second.reserve(1) == 0.0
+    assert first.reserve(1) == pytest.approx(30.0)
@@ -0,0 +1,159 @@
+import pytest
+from typing import Any, Dict, List
+
+from ai_reviewer.request_planner import RequestPlanner, estimate_tokens
+
+
+def make_change(path: str, diff: str) -> Dict[str, Any]:
+    """Create a test code change.
+
+    Args:
+        path: File path
+        diff: Diff text
+    Returns:
+        Code change dictionary
+    """
+    return {"new_path": path, "diff": diff, "line": 1}
+
+
+def make_hunk(start: int, lines: int) -> str:
+    """Create a diff hunk that adds a number of lines.
+
+    Args:
+        start: First new-file line of the hunk
+        lines: Number of added lines
+    Returns:
+        Hunk text
+    """
+    body = "".join(f"+value_{start + i} = compute({i})\n" for i in range(lines))
+    return f"@@ -{start},0 +{start},{lines} @@\n{body}"
+
+
+estimate_test_cases = [
+    pytest.param("", 0, id="empty"),
+    pytest.param("x = 1", 3, id="short_statement"),
+    pytest.param("a_very_long_identifier_name", 7, id="long_identifier"),
+]
+
+
+@pytest.mark.parametrize("text,expected", estimate_test_cases)
+def test_estimate_tokens(text: str, expected: int) -> None:
+    """Test offline token estimation.
+
+    Args:
+        text: Text to estimate
+        expected: Expected token count
+    """
+    assert estimate_tokens(text) == expected
+
+
+def test_plan_packs_small_changes_in_order() -> None:
+    """Test that small changes share requests without being reordered."""
+    planner = RequestPlanner(prompt_tokens=10, max_input_tokens=60)
+    changes = [make_change(f"file{i}.py", "x = 1") for i in range(5)]
+
+    plan = planner.plan(changes)
+
+    packed: List[Dict[str, Any]] = [
+        change for request in plan.requests for change in request.changes
+    ]
+    assert packed == changes
+    assert 1 < plan.request_count < len(changes)
+    assert all(request.estimated_tokens <= 60 for request in plan.requests)
+    assert plan.total_tokens == sum(r.estimated_tokens for r in plan.requests)
+
+
+def test_plan_splits_oversized_change_at_hunks() -> None:
+    """Test that a change larger than the budget is split by hunk."""
+    diff = make_hunk(1, 10) + make_hunk(50, 10) + make_hunk(100, 10)
+    planner = RequestPlanner(prompt_tokens=10, max_input_tokens=150)
+
+    plan = planner.plan([make_change("big.py", diff)])
+
+    pieces = [change["diff"] for request in plan.requests for change in request.changes]
+    assert len(pieces) > 1
+    assert "".join(pieces) == diff
+    assert all(piece.startswith("@@ ") for piece in pieces)
+    assert all(request.estimated_tokens <= 150 for request in plan.requests)
+
+
+def test_plan_splits_oversized_hunk_by_lines() -> None:
+    """Test that a single hunk larger than the budget is split by lines."""
+    diff = make_hunk(1, 40)
+    planner = RequestPlanner(prompt_tokens=10, max_input_tokens=100)
+
+    plan = planner.plan([make_change("huge.py", diff)])
+
+    pieces = [change["diff"] for request in plan.requests for change in request.changes]
+    assert len(pieces) > 1
+    assert all(request.estimated_tokens <= 100 for request in plan.requests)
+    # Every piece gets a header giving the new-file lines it shows
+    next_line = 1
+    for piece in pieces:
+        header, *body = piece.splitlines()
+        assert header == f"@@ -1,0 +{next_line},{len(body)} @@"
+        assert body[0] == f"+value_{next_line} = compute({next_line - 1})"
+        next_line += len(body)
+    assert next_line == 41
+
+
+def test_split_hunk_headers_count_both_sides() -> None:
+    """Test that pieces of a split hunk count their old and new lines."""
+    body = "".join(
+        f" keep_{i} = {i}\n-old_{i} = {i}\n+new_{i} = {i}\n" for i in range(30)
+    )
+    diff = f"@@ -10,60 +20,60 @@ def main():\n{body}"
+    planner = RequestPlanner(prompt_tokens=10, max_input_tokens=100)
+
+    plan = planner.plan([make_change("mixed.py", diff)])
+
+    pieces = [change["diff"] for request in plan.requests for change in request.changes]
+    assert len(pieces) > 1
+    old, new = 10, 20
+    for piece in pieces:
+        header, *lines = piece.splitlines()
+        old_count = sum(1 for line in lines if line[0] in "- ")
+        new_count = sum(1 for line in lines if line[0] in "+ ")
+        assert header == (f"@@ -{old},{old_count} +{new},{new_count} @@ def main():")
+        old += old_count
+        new += new_count
+    assert (old, new) == (70, 80)
+
+
+def test_plan_estimates_with_the_change_template() -> None:
+    """Test that changes are charged for the template they are sent with."""
+    change = make_change("a.py", make_hunk(1, 5))
+    summary = {**change, "review_depth": "summary"}
+    template = "Summarize the risks of this long change in {path} briefly:\n{diff}"
+    planner = RequestPlanner(
+        prompt_tokens=10,
+        user_template=lambda c: template if c.get("review_depth") else "{diff}",
+    )
+
+    plan = planner.plan([change, summary])
+
+    diff_tokens = estimate_tokens(change["diff"])
+    template_tokens = estimate_tokens(template.format(path="a.py", diff=""))
+    assert plan.total_tokens == 10 + 2 * (diff_tokens + 4) + template_tokens
+
+
+def test_invalid_budget() -> None:
+    """Test that a budget smaller than the prompt is rejected."""
+    with pytest.raises(ValueError):
+        RequestPlanner(prompt_tokens=100, max_input_tokens=50)
+
+
+def test_split_pieces_record_original_line_ranges() -> None:
+    """Test that split pieces know which lines of the original diff they cover."""
+    diff = make_hunk(1, 10) + make_hunk(50, 10) + make_hunk(100, 10)
+    planner = RequestPlanner(prompt_tokens=10, max_input_tokens=150)
+
+    plan = planner.plan([make_change("big.py", diff)])
+
+    pieces = [change for request in plan.requests for change in request.changes]
+    original = diff.splitlines()
+    for piece in pieces:
+        covered = original[piece["diff_offset"] : piece["diff_end"]]
+        assert piece["diff"].splitlines() == covered
+    assert pieces[0]["diff_offset"] == 0
+    assert pieces[-1]["diff_end"] == len(original)
@@ -0,0 +1,57 @@
+from typing import List
+
+import pytest
+
+from ai_reviewer.resilience import CircuitBreaker, LatencyTracker
+
+
+def test_hedge_delay_is_a_percentile_of_recent_latencies() -> None:
+    """Test that hedging waits for enough samples and follows the window."""
+    tracker = LatencyTracker(percentile=90, window=10, min_samples=5)
+    for seconds in [1.0, 2.0, 3.0, 4.0]:
+        tracker.observe(seconds)
+
+    assert tracker.hedge_delay() is None
+
+    for seconds in [5.0, 6.0, 7.0, 8.0, 9.0, 10.0]:
+        tracker.observe(seconds)
+    assert tracker.hedge_delay() == 9.0
+
+    for _ in range(10):
+        tracker.observe(0.5)
+    assert tracker.hedge_delay() == 0.5
+
+
+def test_invalid_percentile() -> None:
+    """Test that percentiles outside (0, 100] are rejected."""
+    with pytest.raises(ValueError):
+        LatencyTracker(percentile=0)
+
+
+def test_circuit_opens_probes_and_closes() -> None:
+    """Test the closed, open and half-open states of the breaker."""
+    now: List[float] = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_timeout=30, clock=lambda: now[0]
+    )
+
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    now[0] = 31.0
+    assert not breaker.is_open
+    assert breaker.allow()
+    # Only one trial request at a time
+    assert not breaker.allow()
+    assert breaker.is_open
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 62.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.is_open
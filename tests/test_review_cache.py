@@ -0,0 +1,166 @@
+import pytest
+from typing import Any
+
+from ai_reviewer.review_cache import (
+    ReviewCache,
+    cache_key,
+    hunk_fingerprint,
+    normalize_diff,
+)
+from ai_reviewer.review_strategies import ReviewComment
+
+
+def test_normalize_diff_ignores_rebase_offsets() -> None:
+    """Test that hunk offsets, line endings and trailing spaces are ignored."""
+    original = "@@ -1,2 +1,3 @@\r\n x = 1  \r\n+y = 2\r\n"
+    rebased = "@@ -40,2 +42,3 @@\n x = 1\n+y = 2\n"
+
+    assert normalize_diff(original) == normalize_diff(rebased)
+
+
+key_test_cases = [
+    pytest.param(("gpt-4", "prompt", "+x = 1"), id="different_model"),
+    pytest.param(("gpt-3.5-turbo", "other prompt", "+x = 1"), id="different_prompt"),
+    pytest.param(("gpt-3.5-turbo", "prompt", "+x = 2"), id="different_diff"),
+]
+
+
+@pytest.mark.parametrize("key_parts", key_test_cases)
+def test_cache_key_covers_model_prompt_and_diff(key_parts: Any) -> None:
+    """Test that every part of the review input changes the key.
+
+    Args:
+        key_parts: Model, prompt template and diff to compare
+    """
+    base = cache_key("gpt-3.5-turbo", "prompt", "+x = 1")
+    assert cache_key(*key_parts) != base
+
+
+def test_get_and_put_round_trip(tmp_path: Any) -> None:
+    """Test storing and loading comments, and the hit/miss counters.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    cache = ReviewCache(str(tmp_path))
+    key = cache_key("model", "prompt", "+x = 1")
+
+    assert cache.get(key, "a.py", "+x = 1") is None
+    cache.put(key, [ReviewComment(path="old.py", line=3, content="Nice")], "+x = 1")
+
+    # A second instance sharing the directory sees the stored entry
+    shared = ReviewCache(str(tmp_path))
+    assert shared.get(key, "a.py", "+x = 1") == [
+        ReviewComment(path="a.py", line=3, content="Nice")
+    ]
+    assert cache.stats() == {"hits": 0, "misses": 1, "entries": 1}
+    assert shared.stats() == {"hits": 1, "misses": 0, "entries": 1}
+
+
+def test_cached_comments_follow_their_hunk(tmp_path: Any) -> None:
+    """Test that cached comments move with a rebased hunk.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    cache = ReviewCache(str(tmp_path))
+    diff = "@@ -1,1 +1,2 @@\n x = 1\n+y = 2\n@@ -10,0 +11,1 @@\n+z = 3"
+    rebased = "@@ -1,1 +1,2 @@\n x = 1\n+y = 2\n@@ -199,0 +200,1 @@\n+z = 3"
+    key = cache_key("model", "prompt", diff)
+    cache.put(
+        key,
+        [
+            ReviewComment(path="a.py", line=2, content="First"),
+            ReviewComment(path="a.py", line=11, content="Second"),
+            ReviewComment(path="a.py", line=50, content="Outside the diff"),
+        ],
+        diff,
+    )
+
+    assert cache_key("model", "prompt", rebased) == key
+    assert cache.get(key, "a.py", rebased) == [
+        ReviewComment(path="a.py", line=2, content="First"),
+        ReviewComment(path="a.py", line=200, content="Second"),
+    ]
+
+
+def test_expired_entries_are_evicted(tmp_path: Any, mocker: Any) -> None:
+    """Test age-based eviction.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+        mocker: Pytest mocker fixture
+    """
+    clock = mocker.patch("ai_reviewer.review_cache.time.time", return_value=1000.0)
+    cache = ReviewCache(str(tmp_path), max_age_seconds=60)
+    cache.put("key", [], "")
+
+    clock.return_value = 1061.0
+    assert cache.get("key", "a.py", "") is None
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_over_size(
+    tmp_path: Any, mocker: Any
+) -> None:
+    """Test size-based eviction keeps the most recently used entries.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+        mocker: Pytest mocker fixture
+    """
+    clock = mocker.patch("ai_reviewer.review_cache.time.time", return_value=1000.0)
+    comment = [ReviewComment(path="a.py", line=1, content="x" * 100)]
+    cache = ReviewCache(str(tmp_path), max_bytes=300)
+
+    cache.put("first", comment, "")
+    clock.return_value = 1001.0
+    cache.put("second", comment, "")
+    clock.return_value = 1002.0
+    cache.get("first", "a.py", "")
+    clock.return_value = 1003.0
+    cache.put("third", comment, "")
+
+    assert cache.get("first", "a.py", "") is not None
+    assert cache.get("second", "a.py", "") is None
+    assert cache.get("third", "a.py", "") is not None
+
+
+def test_hunk_fingerprint_ignores_position_and_whitespace() -> None:
+    """Test that only the code of a hunk decides its fingerprint."""
+    original = [" def f():", "-    return 1", "+    return 2", "+"]
+    cherry_picked = ["  def f():  ", "-  return  1", "+\treturn 2"]
+
+    assert hunk_fingerprint("m", "p", original) == hunk_fingerprint(
+        "m", "p", cherry_picked
+    )
+    assert hunk_fingerprint("m", "p", original) != hunk_fingerprint(
+        "m", "p", [" def f():", "-    return 1", "+    return 3"]
+    )
+    # The same change in other surroundings is another hunk
+    assert hunk_fingerprint("m", "p", original) != hunk_fingerprint(
+        "m", "p", [" def g():", "-    return 1", "+    return 2"]
+    )
+    assert hunk_fingerprint("other", "p", original) != hunk_fingerprint(
+        "m", "p", original
+    )
+    assert hunk_fingerprint("m", "p", [" context", "+", "-  "]) is None
+    # Hunks this small are too common to be told apart
+    assert hunk_fingerprint("m", "p", ["+import os"]) is None
+    assert hunk_fingerprint("m", "p", [" a", " b", " c"]) is None
+
+
+def test_hunks_are_stored_per_scope(tmp_path: Any) -> None:
+    """Test that hunk reviews are only found in the scope they were stored in.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    cache = ReviewCache(str(tmp_path))
+    cache.put_hunks({"abc": [(2, "Nice"), (0, "Check this")], "def": []}, "1")
+
+    assert cache.get_hunk("abc", "1") == [(2, "Nice"), (0, "Check this")]
+    assert cache.get_hunk("def", "1") == []
+    assert cache.get_hunk("abc", "2") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,104 @@
+import pytest
+from typing import Any
+
+from ai_reviewer.review_config import (
+    FileSelector,
+    ReviewConfig,
+    load_review_config,
+    priority,
+)
+
+
+def change(path: str, lines: int = 1) -> Any:
+    """Create a change adding lines to path."""
+    return {"new_path": path, "diff": f"@@ -0,0 +1,{lines} @@\n" + "+x\n" * lines}
+
+
+def test_load_review_config(tmp_path: Any) -> None:
+    """Test loading the documented .ai-reviewer.yml layout."""
+    path = tmp_path / ".ai-reviewer.yml"
+    path.write_text(
+        "review_strategies:\n"
+        "  - security\n"
+        "settings:\n"
+        "  max_files_per_review: 10\n"
+        "  excluded_files:\n"
+        '    - "*.md"\n'
+        '  review_comment_prefix: "AI Review:"\n'
+    )
+
+    assert load_review_config(str(path)) == ReviewConfig(
+        review_strategies=("security",),
+        max_files_per_review=10,
+        excluded_files=("*.md",),
+        review_comment_prefix="AI Review:",
+    )
+
+
+def test_missing_config_uses_defaults(tmp_path: Any) -> None:
+    """Test that projects without a config file get every strategy."""
+    config = load_review_config(str(tmp_path / "missing.yml"))
+
+    assert config == ReviewConfig()
+    assert config.review_strategies == ("standard", "security")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param(["standard"], id="not_a_mapping"),
+        pytest.param({"review_strategies": ["style"]}, id="unknown_strategy"),
+        pytest.param({"settings": {"max_files_per_review": 0}}, id="max_files"),
+        pytest.param({"settings": {"excluded_files": "*.md"}}, id="excludes"),
+    ],
+)
+def test_invalid_config(data: Any) -> None:
+    """Test that malformed settings are reported instead of ignored."""
+    with pytest.raises(ValueError):
+        ReviewConfig.from_dict(data)
+
+
+@pytest.mark.parametrize(
+    "path,excluded",
+    [
+        ("package-lock.json", True),
+        ("web/yarn.lock", True),
+        ("vendor/lib/a.go", True),
+        ("app/node_modules/x/index.js", True),
+        ("static/app.min.js", True),
+        ("api/service_pb2.py", True),
+        ("docs/index.md", True),
+        ("my-package-lock.json", False),
+        ("src/vendor.py", False),
+        ("src/app.py", False),
+    ],
+)
+def test_default_and_configured_excludes(path: str, excluded: bool) -> None:
+    """Test matching of the built-in excludes and a configured glob."""
+    selector = FileSelector(ReviewConfig(excluded_files=("*.md",)))
+
+    assert selector.is_excluded(path) is excluded
+
+
+def test_priority_ranks_code_above_docs_and_tests() -> None:
+    """Test the relative order of the priority heuristics."""
+    assert priority(change("src/app.py", 5)) > priority(change("README.txt", 5))
+    assert priority(change("src/app.py", 5)) > priority(change("tests/test_app.py", 5))
+    assert priority(change("src/auth/login.py", 5)) > priority(change("src/app.py", 5))
+    assert priority(change("src/app.py", 50)) > priority(change("src/app.py", 5))
+
+
+def test_select_keeps_top_files_in_order() -> None:
+    """Test that max_files_per_review keeps the highest scores, in MR order."""
+    selector = FileSelector(ReviewConfig(max_files_per_review=2))
+    changes = [
+        change("notes.txt", 3),
+        change("src/b.py", 2),
+        change("yarn.lock", 100),
+        change("src/a.py", 20),
+    ]
+
+    selected, skipped = selector.select(changes)
+
+    assert [c["new_path"] for c in selected] == ["src/b.py", "src/a.py"]
+    assert skipped == ["yarn.lock", "notes.txt"]
@@ -0,0 +1,69 @@
+from typing import Any
+
+from ai_reviewer.review_state import ReviewStateStore
+
+
+def make_note(mocker: Any, body: str, system: bool = False) -> Any:
+    """Create a mock merge request note.
+
+    Args:
+        mocker: Pytest mocker fixture
+        body: Note body
+        system: Whether the note is a GitLab system note
+    Returns:
+        Mock note object
+    """
+    note = mocker.Mock()
+    note.body = body
+    note.system = system
+    return note
+
+
+def test_load_without_state_note(mocker: Any) -> None:
+    """Test that an MR without a state note has no reviewed SHA.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mock_mr = mocker.Mock()
+    mock_mr.notes.list.return_value = [make_note(mocker, "LGTM")]
+
+    assert ReviewStateStore().load(mock_mr) is None
+
+
+def test_save_creates_then_updates_note(mocker: Any) -> None:
+    """Test that the state note is created once and then edited in place.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    store = ReviewStateStore()
+    mock_mr = mocker.Mock()
+    mock_mr.notes.list.return_value = []
+
+    store.save(mock_mr, "abc123")
+
+    body = mock_mr.notes.create.call_args.args[0]["body"]
+    existing = make_note(mocker, body)
+    mock_mr.notes.list.return_value = [existing]
+    assert store.load(mock_mr) == "abc123"
+
+    store.save(mock_mr, "def456")
+
+    assert mock_mr.notes.create.call_count == 1
+    existing.save.assert_called_once()
+    assert store.load(mock_mr) == "def456"
+
+
+def test_system_notes_are_ignored(mocker: Any) -> None:
+    """Test that system notes quoting the marker are not treated as state.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mock_mr = mocker.Mock()
+    mock_mr.notes.list.return_value = [
+        make_note(mocker, "<!-- ai-reviewer-state: head_sha=abc123 -->", system=True)
+    ]
+
+    assert ReviewStateStore().load(mock_mr) is None
@@ -139,3 +139,36 @@ def test_security_review_strategy(
     strategy = SecurityReviewStrategy()
     result = strategy.review_changes(changes["changes"])
     assert result == expected_comments
+
+
+def test_security_review_strategy_uses_diff_line_numbers() -> None:
+    """Test that findings in unified diffs are placed on their real lines."""
+    strategy = SecurityReviewStrategy()
+    changes = [
+        {
+            "new_path": "app.py",
+            "diff": "@@ -3,2 +3,3 @@\n x = 1\n-token = old\n+token = new\n+y = 2",
+            "line": 1,
+        }
+    ]
+
+    assert strategy.review_changes(changes) == [
+        create_test_comment("app.py", 4, "Security Issue: Avoid hardcoding tokens")
+    ]
+
+
+def test_security_review_strategy_loads_rule_packs(tmp_path: Any) -> None:
+    """Test that rule packs extend the built-in rules.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    pack = tmp_path / "rules.yml"
+    pack.write_text("- pattern: 'pickle\\.loads\\('\n  message: Avoid pickle\n")
+    strategy = SecurityReviewStrategy(rule_files=[str(pack)])
+    changes = [{"new_path": "a.py", "diff": "@@ -0,0 +1,1 @@\n+pickle.loads(eval(x))"}]
+
+    assert [c.content for c in strategy.review_changes(changes)] == [
+        "Security Issue: Avoid using eval() for security reasons",
+        "Security Issue: Avoid pickle",
+    ]
@@ -0,0 +1,105 @@
+import logging
+from typing import Any, Dict, List
+
+from ai_reviewer import metrics
+from ai_reviewer.risk_scoring import (
+    FULL_REVIEW,
+    NO_REVIEW,
+    SUMMARY_REVIEW,
+    ReviewTriage,
+    RiskScorer,
+    review_cost,
+)
+
+
+def change(path: str, added: List[str], removed: List[str] = []) -> Dict[str, Any]:
+    """Build a change adding and removing lines."""
+    lines = [f"-{line}" for line in removed] + [f"+{line}" for line in added]
+    header = f"@@ -1,{len(removed)} +1,{len(added)} @@"
+    return {"new_path": path, "diff": "\n".join([header] + lines), "line": 1}
+
+
+def test_trivial_changes_are_not_reviewed() -> None:
+    """Test that renames and version bumps skip the LLM."""
+    scorer = RiskScorer()
+
+    rename = scorer.assess({"new_path": "src/new_name.py", "diff": ""})
+    bump = scorer.assess(
+        change(
+            "package.json",
+            ['  "version": "1.3.0",', '    "lodash": "^4.17.21",'],
+            ['  "version": "1.2.9",', '    "lodash": "^4.17.20",'],
+        )
+    )
+
+    assert (rename.depth, rename.reasons) == (NO_REVIEW, ["no changed lines"])
+    assert (bump.depth, bump.reasons) == (NO_REVIEW, ["version bump"])
+    assert scorer.assess(change("setup.py", ["version = '2.0.1'"])).depth == NO_REVIEW
+
+
+def test_risky_source_scores_above_docs_and_tests() -> None:
+    """Test that keywords, security hits and file type shape the score."""
+    scorer = RiskScorer()
+    code = ["def load(data):", "    return eval(data)", "    x = 1"]
+
+    source = scorer.assess(change("src/auth/session.py", code))
+    test = scorer.assess(change("tests/test_session.py", code))
+    docs = scorer.assess(change("docs/guide.md", ["Some words", "More words"]))
+    small = scorer.assess(change("src/util.py", ["x = 1", "y = 2"]))
+
+    assert source.depth == FULL_REVIEW
+    assert source.reasons == [
+        "3 changed lines",
+        "keywords eval",
+        "1 security rule hits",
+        "sensitive path",
+    ]
+    assert source.score > test.score > small.score > docs.score
+    assert "test file" in test.reasons
+    assert small.depth == SUMMARY_REVIEW
+    assert docs.depth == NO_REVIEW
+
+
+def test_triage_spends_budget_on_riskiest_files(caplog: Any) -> None:
+    """Test that files over the token budget are downgraded in score order."""
+    risky = change("src/auth.py", [f"password = load({n})" for n in range(20)])
+    plain = change("src/util.py", [f"value_{n} = compute({n})" for n in range(20)])
+    scorer = RiskScorer()
+    full_cost = scorer.cost(risky, FULL_REVIEW)
+    triage = ReviewTriage(scorer, token_budget=full_cost + 10)
+
+    caplog.set_level(logging.INFO)
+    with metrics.collect() as review:
+        plain_assessment, risky_assessment = triage.assign([plain, risky])
+
+    assert risky["review_depth"] == FULL_REVIEW
+    assert plain["review_depth"] == NO_REVIEW
+    assert plain_assessment.reasons[-1] == "over token budget"
+    assert triage.remaining == 10
+    assert review.counters["files_full_review"] == 1
+    assert review.counters["files_none_review"] == 1
+    assert "src/util.py" in caplog.text and "none review" in caplog.text
+
+
+def test_triage_without_budget_keeps_scored_depths() -> None:
+    """Test that without a budget every file keeps the depth of its score."""
+    changes = [change("src/a.py", ["x = 1", "y = 2"]), change("README.md", ["x"])]
+
+    ReviewTriage(RiskScorer()).assign(changes)
+
+    assert [c["review_depth"] for c in changes] == [SUMMARY_REVIEW, NO_REVIEW]
+
+
+def test_budget_without_scorer_serves_files_in_order() -> None:
+    """Test that a budget is enforced even without risk triage."""
+    first = change("src/a.py", [f"value_{n} = compute({n})" for n in range(20)])
+    second = change("src/b.py", [f"value_{n} = compute({n})" for n in range(20)])
+    summary_cost = review_cost(second, SUMMARY_REVIEW)
+    budget = review_cost(first, FULL_REVIEW) + summary_cost
+
+    triage = ReviewTriage(None, token_budget=budget)
+    triage.assign([first, second])
+
+    assert first["review_depth"] == FULL_REVIEW
+    assert second["review_depth"] == SUMMARY_REVIEW
+    assert triage.remaining == 0
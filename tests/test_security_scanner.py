@@ -0,0 +1,184 @@
+import json
+import time
+import pytest
+from typing import Any
+
+from ai_reviewer.security_scanner import (
+    DEFAULT_RULES,
+    CompiledRuleSet,
+    SecurityRule,
+    compile_rules,
+    load_rule_pack,
+)
+
+
+def test_scan_diff_reports_added_lines_with_new_line_numbers() -> None:
+    """Test that only added lines are scanned and real lines are reported."""
+    diff = (
+        "@@ -10,4 +20,5 @@ def handler():\n"
+        "     context = eval(old)\n"
+        "-    password = 'old'\n"
+        "+    password = 'new'\n"
+        "+    run(exec(cmd))\n"
+        "     return token = 1\n"
+    )
+
+    findings = compile_rules(DEFAULT_RULES).scan_diff(diff)
+
+    assert [(f.rule.id, f.line) for f in findings] == [
+        ("hardcoded-password", 21),
+        ("exec", 22),
+    ]
+
+
+def test_scan_diff_handles_multiple_hunks() -> None:
+    """Test that line numbers restart at each hunk header."""
+    diff = "@@ -1,1 +1,1 @@\n+eval(a)\n@@ -50,2 +60,2 @@\n x = 1\n+eval(b)\n"
+
+    findings = compile_rules(DEFAULT_RULES).scan_diff(diff)
+
+    assert [f.line for f in findings] == [1, 61]
+
+
+def test_scan_line_reports_each_rule_once() -> None:
+    """Test that several rules on one line are all reported, once each."""
+    scanner = compile_rules(DEFAULT_RULES)
+
+    matched = list(scanner.scan_line("eval(x); eval(y); token = exec(z)"))
+
+    assert [rule.id for rule in matched] == ["hardcoded-token", "eval", "exec"]
+
+
+def test_overlapping_and_literal_free_rules() -> None:
+    """Test rules whose literals overlap and rules without a usable literal."""
+    scanner = CompiledRuleSet(
+        [
+            SecurityRule("word", r"word\b", "word"),
+            SecurityRule("password", r"password", "password"),
+            SecurityRule("pass", r"pass", "pass"),
+            SecurityRule("digits", r"\d{12,}", "digits"),
+            SecurityRule("inline-flag", r"(?i)secret_key", "inline"),
+        ]
+    )
+
+    matched = scanner.scan_line("password = 123456789012 # SECRET_KEY")
+
+    assert [rule.id for rule in matched] == [
+        "word",
+        "password",
+        "pass",
+        "digits",
+        "inline-flag",
+    ]
+
+
+def test_rules_run_on_every_line_without_the_regex_parser(mocker: Any) -> None:
+    """Test that rules still match when re's private parser cannot be imported.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mocker.patch("ai_reviewer.security_scanner.sre_parse", None)
+    rules = [
+        SecurityRule("password", r"password", "password"),
+        SecurityRule("inline-flag", r"(?i)secret_key", "inline"),
+        SecurityRule("eval", r"eval\(", "eval"),
+    ]
+
+    scanner = CompiledRuleSet(rules)
+
+    assert scanner._always == {0, 1, 2}
+    matched = scanner.scan_line("password = SECRET_KEY")
+    assert [rule.id for rule in matched] == ["password", "inline-flag"]
+    assert list(scanner.scan_line("harmless = 1")) == []
+
+
+def test_ignore_case_rules() -> None:
+    """Test per-rule case-insensitive matching."""
+    scanner = CompiledRuleSet(
+        [
+            SecurityRule("strict", r"secret", "strict"),
+            SecurityRule("loose", r"api_key", "loose", ignore_case=True),
+        ]
+    )
+
+    assert [r.id for r in scanner.scan_line("SECRET = API_KEY")] == ["loose"]
+
+
+invalid_rule_test_cases = [
+    pytest.param(SecurityRule("bad", "(", "x"), id="invalid_regex"),
+    pytest.param(SecurityRule("bad_group", "(?P<1>x)", "x"), id="invalid_group"),
+]
+
+
+@pytest.mark.parametrize("rule", invalid_rule_test_cases)
+def test_invalid_rules_are_rejected(rule: SecurityRule) -> None:
+    """Test validation of rule patterns.
+
+    Args:
+        rule: Invalid rule
+    """
+    with pytest.raises(ValueError):
+        CompiledRuleSet([rule])
+
+
+def test_compiled_rules_are_cached() -> None:
+    """Test that identical rule sets share their compiled form."""
+    assert compile_rules(DEFAULT_RULES) is compile_rules(tuple(DEFAULT_RULES))
+
+
+def test_load_rule_pack_from_yaml_and_json(tmp_path: Any) -> None:
+    """Test loading rule packs in both supported formats.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    yaml_pack = tmp_path / "rules.yml"
+    yaml_pack.write_text(
+        "rules:\n"
+        "  - id: aws-key\n"
+        "    pattern: 'AKIA[0-9A-Z]{16}'\n"
+        "    message: Avoid committing AWS keys\n"
+    )
+    json_pack = tmp_path / "rules.json"
+    json_pack.write_text(
+        json.dumps([{"pattern": "md5\\(", "message": "Weak hash", "ignore_case": 1}])
+    )
+
+    assert load_rule_pack(str(yaml_pack)) == (
+        SecurityRule("aws-key", "AKIA[0-9A-Z]{16}", "Avoid committing AWS keys"),
+    )
+    assert load_rule_pack(str(json_pack)) == (
+        SecurityRule("rules.json:0", "md5\\(", "Weak hash", ignore_case=True),
+    )
+
+
+def test_load_rule_pack_rejects_malformed_files(tmp_path: Any) -> None:
+    """Test that rule packs without patterns are rejected.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+    """
+    pack = tmp_path / "rules.yml"
+    pack.write_text("- message: no pattern\n")
+
+    with pytest.raises(ValueError):
+        load_rule_pack(str(pack))
+
+
+def test_large_rule_set_scans_large_diff() -> None:
+    """Test that hundreds of rules over a large diff stay fast."""
+    rules = [
+        SecurityRule(f"rule-{i}", rf"dangerous_call_{i}\(", f"Rule {i}")
+        for i in range(500)
+    ]
+    scanner = CompiledRuleSet(rules)
+    diff = "@@ -1,1 +1,50000 @@\n" + "+value = compute(x, y)\n" * 50000
+    diff += "+dangerous_call_499(x)\n"
+
+    start = time.perf_counter()
+    findings = scanner.scan_diff(diff)
+    elapsed = time.perf_counter() - start
+
+    assert [(f.rule.id, f.line) for f in findings] == [("rule-499", 50001)]
+    assert elapsed < 5
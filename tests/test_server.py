@@ -0,0 +1,232 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_reviewer.gitlab_reviewer import GitLabReviewer
+from ai_reviewer.review_strategies import ReviewComment, StandardReviewStrategy
+from ai_reviewer.server import ReviewQueue, ReviewServer, parse_merge_request_event
+
+
+def make_event(
+    action: str = "update", project_id: int = 1, iid: int = 10, oldrev: bool = True
+) -> Dict[str, Any]:
+    """Create a merge request webhook payload.
+
+    Args:
+        action: Merge request action
+        project_id: Project ID
+        iid: Merge request IID
+        oldrev: Whether the update pushed new commits
+    Returns:
+        Webhook payload
+    """
+    attributes: Dict[str, Any] = {"iid": iid, "action": action}
+    if oldrev:
+        attributes["oldrev"] = "abc"
+    return {
+        "object_kind": "merge_request",
+        "project": {"id": project_id},
+        "object_attributes": attributes,
+    }
+
+
+def post(
+    server: ReviewServer, payload: Any, token: Optional[str] = None
+) -> Tuple[int, Dict[str, Any]]:
+    """Send a webhook to a running server.
+
+    Args:
+        server: Running review server
+        payload: JSON payload
+        token: Value for the X-Gitlab-Token header
+    Returns:
+        Tuple of HTTP status and decoded response body
+    """
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.port}/",
+        data=json.dumps(payload).encode(),
+        headers={"X-Gitlab-Token": token or ""},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+event_test_cases = [
+    pytest.param(make_event("open", oldrev=False), (1, 10), id="open"),
+    pytest.param(make_event("reopen", oldrev=False), (1, 10), id="reopen"),
+    pytest.param(make_event("update"), (1, 10), id="push"),
+    pytest.param(make_event("update", oldrev=False), None, id="title_edit"),
+    pytest.param(make_event("merge"), None, id="merge"),
+    pytest.param({"object_kind": "push"}, None, id="push_hook"),
+]
+
+
+@pytest.mark.parametrize("payload,expected", event_test_cases)
+def test_parse_merge_request_event(payload: Dict[str, Any], expected: Any) -> None:
+    """Test which webhook events trigger a review.
+
+    Args:
+        payload: Webhook payload
+        expected: Expected merge request key
+    """
+    assert parse_merge_request_event(payload) == expected
+
+
+def test_queue_coalesces_events() -> None:
+    """Test that repeated events for one MR are queued once."""
+    queue = ReviewQueue()
+
+    assert queue.put((1, 10))
+    assert not queue.put((1, 10))
+    assert queue.put((1, 11))
+    assert len(queue) == 2
+
+
+def test_queue_does_not_hand_out_mr_under_review() -> None:
+    """Test that an MR updated during its review is reviewed again afterwards."""
+    queue = ReviewQueue()
+    queue.put((1, 10))
+    assert queue.get() == (1, 10)
+
+    queue.put((1, 10))
+    queue.put((2, 20))
+    # The re-queued MR waits for the running review to finish
+    assert queue.get() == (2, 20)
+    queue.done((2, 20))
+    queue.done((1, 10))
+    assert queue.get() == (1, 10)
+    queue.done((1, 10))
+
+    assert queue.wait_idle(timeout=1)
+    queue.close()
+    assert queue.get() is None
+
+
+class RecordingReviewer:
+    """Reviewer stub recording processed merge requests."""
+
+    def __init__(self) -> None:
+        """Initialize the stub."""
+        self.processed: List[Tuple[int, int]] = []
+        self.release = threading.Event()
+
+    def process_merge_request(self, project_id: int, mr_iid: int) -> None:
+        """Record the merge request once released."""
+        self.release.wait(timeout=5)
+        self.processed.append((project_id, mr_iid))
+        if mr_iid == 99:
+            raise SystemExit(1)
+
+
+@pytest.fixture
+def recording_server() -> Any:
+    """Run a server with a recording reviewer.
+
+    Returns:
+        Tuple of server and reviewer stub
+    """
+    reviewer = RecordingReviewer()
+    server = ReviewServer(reviewer, host="127.0.0.1", port=0, workers=2, secret="s3")
+    server.start()
+    yield server, reviewer
+    reviewer.release.set()
+    server.stop()
+
+
+def test_webhook_requests_are_queued_and_coalesced(recording_server: Any) -> None:
+    """Test the HTTP endpoint, authentication and coalescing.
+
+    Args:
+        recording_server: Running server fixture
+    """
+    server, reviewer = recording_server
+
+    assert post(server, make_event(), token="wrong")[0] == 401
+    assert post(server, make_event("close"), token="s3") == (200, {"status": "ignored"})
+    # Both workers pick up the first two MRs; further events are coalesced
+    assert post(server, make_event(iid=1), token="s3")[1]["status"] == "queued"
+    assert post(server, make_event(iid=2), token="s3")[1]["status"] == "queued"
+    server.queue.wait_idle(timeout=0.2)
+    assert post(server, make_event(iid=3), token="s3")[1]["status"] == "queued"
+    assert post(server, make_event(iid=3), token="s3")[1]["status"] == "coalesced"
+    assert post(server, make_event(iid=99), token="s3")[1]["status"] == "queued"
+
+    reviewer.release.set()
+    assert server.queue.wait_idle(timeout=5)
+
+    assert sorted(reviewer.processed) == [(1, 1), (1, 2), (1, 3), (1, 99)]
+
+
+def test_malformed_merge_request_reference_is_rejected(
+    recording_server: Any,
+) -> None:
+    """Test that an event with a non-numeric project ID gets a 400.
+
+    Args:
+        recording_server: Running server fixture
+    """
+    server, _ = recording_server
+    event = make_event()
+    event["project"]["id"] = "not-a-number"
+
+    assert post(server, event, token="s3") == (400, {"status": "invalid payload"})
+    assert len(server.queue) == 0
+
+
+def test_health_check(recording_server: Any) -> None:
+    """Test the health endpoint.
+
+    Args:
+        recording_server: Running server fixture
+    """
+    server, _ = recording_server
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/healthz") as r:
+        assert json.loads(r.read()) == {"status": "ok", "queued": 0}
+
+
+def test_server_reviews_with_stub_gitlab_and_llm(mocker: Any) -> None:
+    """Test a full review through the server with stubbed GitLab and LLM.
+
+    Args:
+        mocker: Pytest mocker fixture
+    """
+    mocker.patch.dict(
+        "os.environ",
+        {"GITLAB_URL": "https://gitlab.example.com", "GITLAB_TOKEN": "test-token"},
+    )
+    mock_gl = mocker.Mock()
+    mocker.patch("gitlab.Gitlab").return_value = mock_gl
+    mock_mr = mocker.Mock()
+    mock_gl.http_list.return_value = [
+        {"new_path": "a.py", "diff": "@@ -1 +1,2 @@\n x\n+y"}
+    ]
+    mock_mr.discussions.list.return_value = []
+    mock_gl.projects.get.return_value.mergerequests.get.return_value = mock_mr
+
+    stub_llm = mocker.Mock()
+    stub_llm.analyze_code.side_effect = lambda changes: [
+        ReviewComment(path=c["new_path"], line=c["line"], content="LGTM")
+        for c in changes
+    ]
+    reviewer = GitLabReviewer([StandardReviewStrategy(stub_llm)])
+    server = ReviewServer(reviewer, host="127.0.0.1", port=0, workers=1)
+    server.start()
+    try:
+        assert post(server, make_event(project_id=7, iid=3))[0] == 202
+        assert server.queue.wait_idle(timeout=5)
+    finally:
+        server.stop()
+
+    mock_gl.projects.get.assert_called_once_with(7)
+    # Authentication happened once, when the reviewer was created
+    mock_gl.auth.assert_called_once()
+    posted = mock_mr.discussions.create.call_args.args[0]
+    assert posted["position"]["new_line"] == 2
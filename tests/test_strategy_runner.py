@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from ai_reviewer.diff_parser import ParsedDiff
+from ai_reviewer.review_strategies import (
+    ReviewComment,
+    ReviewStrategy,
+    SecurityReviewStrategy,
+)
+from ai_reviewer.strategy_runner import StrategyRunner
+
+
+class FakeStrategy(ReviewStrategy):
+    """Strategy returning a fixed comment after an optional delay."""
+
+    def __init__(self, content: str, delay: float = 0.0) -> None:
+        """Initialize the fake strategy.
+
+        Args:
+            content: Content of the single comment returned
+            delay: Seconds to wait before returning
+        """
+        self.content = content
+        self.delay = delay
+        self.thread_name = ""
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Return one comment after the configured delay."""
+        self.thread_name = threading.current_thread().name
+        time.sleep(self.delay)
+        return [ReviewComment(path="a.py", line=1, content=self.content)]
+
+
+class FailingStrategy(ReviewStrategy):
+    """Strategy that always raises."""
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Raise an error."""
+        raise RuntimeError("boom")
+
+
+class ProcessStrategy(ReviewStrategy):
+    """CPU-bound strategy reporting the process and keys it saw."""
+
+    cpu_bound = True
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Return one comment per change naming the process and keys."""
+        return [
+            ReviewComment(
+                path=change["new_path"],
+                line=os.getpid(),
+                content=",".join(sorted(change)),
+            )
+            for change in changes
+        ]
+
+
+class DuckProcessStrategy:
+    """CPU-bound strategy without ReviewStrategy's shard_fields."""
+
+    cpu_bound = True
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Return one comment per change naming the process and keys."""
+        return ProcessStrategy().review_changes(changes)
+
+
+class DuckStrategy:
+    """Strategy that streams comments without deriving from ReviewStrategy."""
+
+    def review_changes(self, changes: List[Dict[str, Any]]) -> List[ReviewComment]:
+        """Return nothing; the runner should stream instead."""
+        return []
+
+    def stream_changes(
+        self,
+        changes: List[Dict[str, Any]],
+        on_comment: Callable[[ReviewComment], None],
+    ) -> List[ReviewComment]:
+        """Pass on and return one comment."""
+        comment = ReviewComment(path="a.py", line=1, content="Streamed")
+        on_comment(comment)
+        return [comment]
+
+
+def test_run_is_concurrent_and_ordered() -> None:
+    """Test that strategies overlap but results keep the strategy order."""
+    slow = FakeStrategy("slow", delay=0.2)
+    fast = FakeStrategy("fast")
+    runner = StrategyRunner()
+
+    start = time.monotonic()
+    results = runner.run([slow, FakeStrategy("slow too", delay=0.2), fast], [])
+    elapsed = time.monotonic() - start
+
+    assert [r.comments[0].content for r in results] == ["slow", "slow too", "fast"]
+    assert elapsed < 0.35
+    assert slow.thread_name.startswith("review-strategy")
+    assert all(result.succeeded for result in results)
+
+
+def test_failing_strategy_is_isolated() -> None:
+    """Test that a failing strategy does not affect the others."""
+    results = StrategyRunner().run([FailingStrategy(), FakeStrategy("ok")], [])
+
+    assert results[0].error == "boom"
+    assert results[0].comments == []
+    assert not results[0].succeeded
+    assert results[1].comments[0].content == "ok"
+
+
+def test_strategy_timeout() -> None:
+    """Test runner and per-strategy timeouts."""
+    slow = FakeStrategy("slow", delay=0.5)
+    patient = FakeStrategy("patient", delay=0.2)
+    patient.timeout = 1.0
+
+    results = StrategyRunner(timeout=0.05).run([slow, patient], [])
+
+    assert results[0].timed_out
+    assert results[0].comments == []
+    assert results[1].comments[0].content == "patient"
+
+
+def test_run_without_strategies() -> None:
+    """Test that running no strategies returns no results."""
+    assert StrategyRunner().run([], []) == []
+
+
+def test_comments_are_passed_on_as_strategies_finish() -> None:
+    """Test that a fast strategy's comments arrive before a slow one finishes."""
+    received: List[str] = []
+    slow = FakeStrategy("slow", delay=0.2)
+
+    def on_comment(comment: ReviewComment) -> None:
+        received.append(comment.content)
+
+    results = StrategyRunner().run(
+        [slow, FakeStrategy("fast")], [], on_comment=on_comment
+    )
+
+    assert received == ["fast", "slow"]
+    assert [r.comments[0].content for r in results] == ["slow", "fast"]
+
+
+def test_cpu_bound_strategies_run_sharded_in_processes() -> None:
+    """Test that CPU-bound strategies review shards in worker processes."""
+    diff = "@@ -0,0 +1,2 @@\n+x = 1\n+password = 'secret'\n"
+    changes = [
+        {
+            "new_path": f"f{idx}.py",
+            "diff": diff * (idx + 1),
+            "parsed": ParsedDiff.parse(diff * (idx + 1)),
+            "line": 1,
+            "project_id": 7,
+        }
+        for idx in range(4)
+    ]
+    runner = StrategyRunner(process_workers=2, min_shard_bytes=1)
+    try:
+        keys, security = runner.run(
+            [ProcessStrategy(), SecurityReviewStrategy()], changes
+        )
+    finally:
+        runner.close()
+
+    assert [c.path for c in keys.comments] == ["f0.py", "f1.py", "f2.py", "f3.py"]
+    pids = {c.line for c in keys.comments}
+    assert os.getpid() not in pids
+    assert {c.content for c in keys.comments} == {"diff,line,new_path,parsed"}
+    assert [c.path for c in security.comments] == [
+        path for idx in range(4) for path in [f"f{idx}.py"] * (idx + 1)
+    ]
+    assert {c.line for c in security.comments} == {2}
+
+
+def test_small_changes_stay_in_thread() -> None:
+    """Test that diffs too small to shard are reviewed in the strategy thread."""
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "extra": True}]
+    runner = StrategyRunner(process_workers=2)
+
+    (result,) = runner.run([ProcessStrategy()], changes)
+
+    assert result.comments[0].line == os.getpid()
+    assert result.comments[0].content == "diff,extra,new_path"
+
+
+def test_duck_typed_strategies_can_stream() -> None:
+    """Test that any strategy defining stream_changes streams its comments."""
+    received: List[ReviewComment] = []
+
+    results = StrategyRunner().run(
+        [DuckStrategy()], [{"new_path": "a.py", "diff": "+x"}], received.append
+    )
+
+    assert [c.content for c in results[0].comments] == ["Streamed"]
+    assert received == results[0].comments
+
+
+def test_shards_keep_whole_changes_without_shard_fields() -> None:
+    """Test that a duck-typed CPU-bound strategy gets every change key."""
+    changes = [{"new_path": "a.py", "diff": "+x = 1", "extra": True}]
+    runner = StrategyRunner(process_workers=2, min_shard_bytes=1)
+    try:
+        (result,) = runner.run([DuckProcessStrategy()], changes)
+    finally:
+        runner.close()
+
+    assert result.succeeded
+    assert result.comments[0].line != os.getpid()
+    assert result.comments[0].content == "diff,extra,new_path"